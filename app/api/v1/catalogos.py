@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, joinedload
+from typing import Optional
 from app.db.session import get_db
 from app.db.models import UnidadNegocio, Articulo, Departamento, Proveedor, Clasificador
 from app.schemas.catalogos import (
     UnidadNegocioCreate, UnidadNegocioOut,
-    ArticuloCreate, ArticuloOut,
+    ArticuloCreate, ArticuloOut, ArticuloBusquedaOut,
     DepartamentoCreate, DepartamentoOut,
     ClasificadorCreate, ClasificadorOut,
 )
+from app.schemas.paginacion import Pagina
+from app.core.pagination import PageParams, page_params, keyset, page
+from app.core.catalog_cache import catalogos
+from app.core.etags import cache_catalogo, versiones
+from app.core.busqueda import indice_articulos
 
 router = APIRouter(prefix="/api", tags=["Catálogos"])
 
@@ -18,11 +24,15 @@ def crear_unidad_negocio(payload: UnidadNegocioCreate, db: Session = Depends(get
         raise HTTPException(status_code=400, detail="Unidad de negocio ya existe")
     uen = UnidadNegocio(nombre=payload.nombre)
     db.add(uen)
+    versiones.incrementar(db, UnidadNegocio)
     db.commit()
     db.refresh(uen)
+    catalogos.invalidar(UnidadNegocio)
     return uen
 
-@router.get("/unidades-negocio", response_model=list[UnidadNegocioOut])
+@router.get(
+    "/unidades-negocio", response_model=list[UnidadNegocioOut], dependencies=[cache_catalogo(UnidadNegocio)]
+)
 def listar_unidades_negocio(db: Session = Depends(get_db)):
     return db.query(UnidadNegocio).all()
 
@@ -33,12 +43,16 @@ def crear_clasificador(payload: ClasificadorCreate, db: Session = Depends(get_db
         raise HTTPException(status_code=400, detail="Clasificador ya existe")
     nuevo = Clasificador(nombre=payload.nombre)
     db.add(nuevo)
+    versiones.incrementar(db, Clasificador)
     db.commit()
     db.refresh(nuevo)
+    catalogos.invalidar(Clasificador)
     return nuevo
 
 
-@router.get("/clasificadores", response_model=list[ClasificadorOut])
+@router.get(
+    "/clasificadores", response_model=list[ClasificadorOut], dependencies=[cache_catalogo(Clasificador)]
+)
 def listar_clasificadores(db: Session = Depends(get_db)):
     return db.query(Clasificador).all()
 
@@ -47,22 +61,50 @@ def listar_clasificadores(db: Session = Depends(get_db)):
 @router.post("/articulos", response_model=ArticuloOut)
 def crear_articulo(payload: ArticuloCreate, db: Session = Depends(get_db)):
     # Validar que el clasificador exista si se envía
-    clasificador = None
     if payload.clasificador_id:
-        clasificador = db.query(Clasificador).filter_by(id=payload.clasificador_id).first()
-        if not clasificador:
+        if not catalogos.existe(db, Clasificador, payload.clasificador_id):
             raise HTTPException(status_code=404, detail="Clasificador no encontrado")
 
     art = Articulo(nombre=payload.nombre, clasificador_id=payload.clasificador_id)
     db.add(art)
+    versiones.incrementar(db, Articulo)
     db.commit()
     db.refresh(art)
+    catalogos.invalidar(Articulo, art.id)
+    indice_articulos.agregar(art.id, art.nombre, art.clasificador_id)
     return art
 
 
-@router.get("/articulos", response_model=list[ArticuloOut])
-def listar_articulos(db: Session = Depends(get_db)):
-    return db.query(Articulo).all()
+@router.get("/articulos/buscar", response_model=list[ArticuloBusquedaOut])
+def buscar_articulos(
+    q: str = Query(..., min_length=1, max_length=150, description="Texto a buscar (prefijo o nombre aproximado)"),
+    clasificador_id: Optional[int] = Query(None, description="Filtrar por clasificador"),
+    limite: int = Query(20, ge=1, le=100, description="Máximo de resultados"),
+    db: Session = Depends(get_db),
+):
+    """
+    Búsqueda para autocompletar: artículos ordenados por parecido con `q`,
+    sin distinguir acentos ni mayúsculas. Se resuelve en el índice en memoria.
+    """
+    indice_articulos.sincronizar(db)
+    return indice_articulos.buscar(q, limite, clasificador_id)
+
+
+# El listado embebe el clasificador de cada artículo
+@router.get(
+    "/articulos", response_model=Pagina[ArticuloOut], dependencies=[cache_catalogo(Articulo, Clasificador)]
+)
+def listar_articulos(
+    clasificador_id: Optional[int] = Query(None, description="Filtrar por clasificador"),
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    query = db.query(Articulo).options(joinedload(Articulo.clasificador_rel))
+    if clasificador_id:
+        query = query.filter(Articulo.clasificador_id == clasificador_id)
+
+    orden = [Articulo.id]
+    return page(keyset(query, orden, params, descending=False).all(), orden, params)
 
 
 # ---- DEPARTAMENTOS ----
@@ -72,18 +114,22 @@ def crear_departamento(payload: DepartamentoCreate, db: Session = Depends(get_db
         raise HTTPException(status_code=400, detail="Departamento ya existe")
     dep = Departamento(nombre=payload.nombre)
     db.add(dep)
+    versiones.incrementar(db, Departamento)
     db.commit()
     db.refresh(dep)
+    catalogos.invalidar(Departamento)
     return dep
 
 
-@router.get("/departamentos", response_model=list[DepartamentoOut])
+@router.get(
+    "/departamentos", response_model=list[DepartamentoOut], dependencies=[cache_catalogo(Departamento)]
+)
 def listar_departamentos(db: Session = Depends(get_db)):
     return db.query(Departamento).all()
 
 
 # ---- PROVEEDORES ----
-@router.get("/proveedores")
+@router.get("/proveedores", dependencies=[cache_catalogo(Proveedor)])
 def listar_proveedores(db: Session = Depends(get_db)):
     data = db.query(Proveedor).all()
     return [{"id": x.id, "nombre": x.nombre} for x in data]
@@ -92,8 +138,10 @@ def listar_proveedores(db: Session = Depends(get_db)):
 def crear_proveedor(nombre: str, db: Session = Depends(get_db)):
     p = Proveedor(nombre=nombre)
     db.add(p)
+    versiones.incrementar(db, Proveedor)
     db.commit()
     db.refresh(p)
+    catalogos.invalidar(Proveedor)
     return {"id": p.id, "nombre": p.nombre}
 
 
@@ -1,5 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import math
+from decimal import Decimal, InvalidOperation
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
+from typing import Iterable, Optional
 from collections import defaultdict
 
 from app.db.session import get_db
@@ -9,10 +15,19 @@ from app.db.models import (
     Cotizacion, CotizacionProveedor, CotItem,
     OrdenCompra, OCItem
 )
+from app.core.catalog_cache import catalogos
+from app.core.config import settings
+from app.db.bulk import bulk_upsert
+from app.core.comparativo import MatrizPrecios
 from app.schemas.cotizaciones import (
     CotCreate, CotOut, CotProvAdd, CotProvOut, CotItemIn,
-    CotComparativo, SeleccionLinea, GenerarOCsResponse
+    PrecioProveedorIn, CargaPreciosOut,
+    CotComparativo, CotAnalisis, SeleccionLinea, GenerarOCsResponse
 )
+from app.schemas.lotes import TransicionLoteIn, TransicionLoteOut, ItemCola
+from app.schemas.paginacion import Pagina
+from app.core.pagination import PageParams, page_params, page
+from app.core.workflow import FLUJO_COT
 
 router = APIRouter(prefix="/api", tags=["Cotizaciones"])
 
@@ -31,6 +46,16 @@ def crear_cotizacion(payload: CotCreate, db: Session = Depends(get_db)):
     db.add(cot); db.commit(); db.refresh(cot)
     return cot
 
+@router.get("/cotizaciones/cola", response_model=Pagina[ItemCola])
+def cola_cotizaciones(
+    estatus: str = Query("ABIERTA", description="Estatus de la cola"),
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    """Cotizaciones en un estatus, de la más antigua a la más reciente."""
+    rows = db.execute(FLUJO_COT.cola(estatus, params)).all()
+    return page(rows, FLUJO_COT.orden_cola, params)
+
 @router.get("/cotizaciones/{cot_id}", response_model=CotOut)
 def obtener_cotizacion(cot_id: int, db: Session = Depends(get_db)):
     cot = db.get(Cotizacion, cot_id)
@@ -46,7 +71,7 @@ def agregar_proveedor(cot_id: int, payload: CotProvAdd, db: Session = Depends(ge
         raise HTTPException(404, "Cotización no encontrada")
     if cot.estatus != "ABIERTA":
         raise HTTPException(400, "Cotización cerrada; no se pueden agregar proveedores")
-    if not db.get(Proveedor, payload.proveedor_id):
+    if not catalogos.existe(db, Proveedor, payload.proveedor_id):
         raise HTTPException(404, "Proveedor no existe")
     # evita duplicado
     ya = db.query(CotizacionProveedor).filter_by(cotizacion_id=cot.id, proveedor_id=payload.proveedor_id).first()
@@ -57,40 +82,117 @@ def agregar_proveedor(cot_id: int, payload: CotProvAdd, db: Session = Depends(ge
     return cp
 
 # -------- Cargar precios por proveedor --------
-@router.post("/cotizaciones/{cot_id}/proveedores/{prov_id}/items")
-def cargar_items_proveedor(cot_id: int, prov_id: int, items: list[CotItemIn], db: Session = Depends(get_db)):
-    cot = db.get(Cotizacion, cot_id)
-    if not cot:
-        raise HTTPException(404, "Cotización no encontrada")
+def _cargar_precios(db: Session, cot: Cotizacion, lineas: Iterable[tuple[int, int, float]]) -> dict:
+    """
+    Valida líneas (proveedor_id, articulo_id, precio_unit) contra los
+    proveedores de la cotización y los ítems del requerimiento en una sola
+    pasada, y las escribe con upsert nativo por bloques. La cantidad se toma
+    siempre del requerimiento. No hace commit.
+    """
     if cot.estatus != "ABIERTA":
         raise HTTPException(400, "Cotización cerrada; no se pueden editar precios")
-    cp = db.query(CotizacionProveedor).filter_by(cotizacion_id=cot.id, proveedor_id=prov_id).first()
-    if not cp:
-        raise HTTPException(404, "El proveedor no está agregado a esta cotización")
 
     # Cantidades vienen del requerimiento
-    req_items = {ri.articulo_id: ri.cantidad for ri in db.query(ReqItem).filter_by(requerimiento_id=cot.requerimiento_id).all()}
+    req_items = dict(db.execute(
+        select(ReqItem.articulo_id, ReqItem.cantidad).where(ReqItem.requerimiento_id == cot.requerimiento_id)
+    ).all())
     if not req_items:
         raise HTTPException(400, "El requerimiento no tiene items")
+    cps = dict(db.execute(
+        select(CotizacionProveedor.proveedor_id, CotizacionProveedor.id)
+        .where(CotizacionProveedor.cotizacion_id == cot.id)
+    ).all())
+
+    # La última línea de un mismo (proveedor, artículo) es la que vale
+    filas: dict[tuple[int, int], dict] = {}
+    for n, (pid, aid, precio) in enumerate(lineas, start=1):
+        if n > settings.PRICE_UPLOAD_MAX_LINES:
+            raise HTTPException(413, f"La carga excede el máximo de {settings.PRICE_UPLOAD_MAX_LINES} líneas")
+        cp_id = cps.get(pid)
+        if cp_id is None:
+            raise HTTPException(404, f"El proveedor {pid} no está agregado a esta cotización")
+        if aid not in req_items:
+            raise HTTPException(400, f"Artículo {aid} no está en el requerimiento")
+        # Un Decimal finito como 1e999 se vuelve inf al pasar a float (columna Float)
+        precio = float(precio)
+        if not math.isfinite(precio):
+            raise HTTPException(400, f"Precio no válido en la línea {n}")
+        filas[(cp_id, aid)] = {
+            "cotizacion_proveedor_id": cp_id,
+            "articulo_id": aid,
+            "cantidad": req_items[aid],
+            "precio_unit": precio,
+        }
+
+    escritas = bulk_upsert(
+        db,
+        CotItem.__table__,
+        filas.values(),
+        index_elements=["cotizacion_proveedor_id", "articulo_id"],
+        update_cols=["cantidad", "precio_unit"],
+        chunk_size=settings.BULK_CHUNK_SIZE,
+    )
+    return {"lineas": escritas, "proveedores": len({cp_id for cp_id, _ in filas})}
 
-    # upsert simple
-    existentes = {(ci.articulo_id): ci for ci in db.query(CotItem).filter_by(cotizacion_proveedor_id=cp.id).all()}
-    for it in items:
-        if it.articulo_id not in req_items:
-            raise HTTPException(400, f"Artículo {it.articulo_id} no está en el requerimiento")
-        if it.articulo_id in existentes:
-            existentes[it.articulo_id].precio_unit = float(it.precio_unit)
-            existentes[it.articulo_id].cantidad = req_items[it.articulo_id]
-        else:
-            db.add(CotItem(
-                cotizacion_proveedor_id=cp.id,
-                articulo_id=it.articulo_id,
-                cantidad=req_items[it.articulo_id],
-                precio_unit=float(it.precio_unit),
-            ))
+
+def _get_cot(db: Session, cot_id: int) -> Cotizacion:
+    cot = db.get(Cotizacion, cot_id)
+    if not cot:
+        raise HTTPException(404, "Cotización no encontrada")
+    return cot
+
+
+@router.post("/cotizaciones/{cot_id}/proveedores/{prov_id}/items")
+def cargar_items_proveedor(cot_id: int, prov_id: int, items: list[CotItemIn], db: Session = Depends(get_db)):
+    cot = _get_cot(db, cot_id)
+    _cargar_precios(db, cot, ((prov_id, it.articulo_id, it.precio_unit) for it in items))
     db.commit()
     return {"ok": True}
 
+
+@router.post("/cotizaciones/{cot_id}/precios", response_model=CargaPreciosOut)
+def cargar_precios(cot_id: int, lineas: list[PrecioProveedorIn], db: Session = Depends(get_db)):
+    """
+    Carga masiva de precios de uno o varios proveedores (JSON).
+    Si alguna línea no es válida no se escribe ninguna.
+    """
+    cot = _get_cot(db, cot_id)
+    resultado = _cargar_precios(db, cot, ((l.proveedor_id, l.articulo_id, l.precio_unit) for l in lineas))
+    db.commit()
+    return resultado
+
+
+def _lineas_csv(archivo: UploadFile) -> Iterable[tuple[int, int, Decimal]]:
+    """Lee el CSV (columnas proveedor_id, articulo_id, precio_unit) fila por fila."""
+    texto = io.TextIOWrapper(archivo.file, encoding="utf-8-sig", newline="")
+    lector = csv.DictReader(texto)
+    try:
+        faltantes = {"proveedor_id", "articulo_id", "precio_unit"} - set(lector.fieldnames or [])
+        if faltantes:
+            raise HTTPException(400, f"Faltan columnas en el CSV: {', '.join(sorted(faltantes))}")
+        for fila in lector:
+            try:
+                precio = Decimal(fila["precio_unit"].strip())
+                if not precio.is_finite() or precio < 0:
+                    raise InvalidOperation
+                yield int(fila["proveedor_id"]), int(fila["articulo_id"]), precio
+            except (ValueError, TypeError, AttributeError, InvalidOperation):
+                raise HTTPException(400, f"Fila {lector.line_num} del CSV no válida")
+    except UnicodeDecodeError:
+        # Igual que la importación de catálogos: la fila es aproximada (se decodifica por bloques)
+        raise HTTPException(400, f"El CSV no está en UTF-8 (cerca de la fila {lector.line_num + 1})")
+    except csv.Error as e:
+        raise HTTPException(400, f"CSV mal formado en la fila {lector.line_num}: {e}")
+
+
+@router.post("/cotizaciones/{cot_id}/precios/csv", response_model=CargaPreciosOut)
+def cargar_precios_csv(cot_id: int, archivo: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Carga masiva de precios desde un archivo CSV con encabezados proveedor_id, articulo_id, precio_unit."""
+    cot = _get_cot(db, cot_id)
+    resultado = _cargar_precios(db, cot, _lineas_csv(archivo))
+    db.commit()
+    return resultado
+
 # -------- Comparativo --------
 @router.get("/cotizaciones/{cot_id}/comparativo", response_model=CotComparativo)
 def comparativo(cot_id: int, db: Session = Depends(get_db)):
@@ -110,6 +212,39 @@ def comparativo(cot_id: int, db: Session = Depends(get_db)):
         proveedores.append({"proveedor_id": cp.proveedor_id, "precios": precios})
     return {"items": items_list, "proveedores": proveedores}
 
+# -------- Análisis de precios (matriz artículo × proveedor) --------
+@router.get("/cotizaciones/{cot_id}/analisis", response_model=CotAnalisis)
+def analisis_cotizacion(
+    cot_id: int,
+    max_proveedores: Optional[int] = Query(None, ge=1, description="Máximo de proveedores en la adjudicación"),
+    db: Session = Depends(get_db),
+):
+    """
+    Construye la matriz de precios de la cotización y devuelve el mejor precio
+    por artículo, totales y faltantes por proveedor, y la adjudicación: la más
+    barata por línea o, con `max_proveedores`, la más barata con a lo más esos
+    proveedores. Esta última es exacta mientras las combinaciones no pasen de
+    ADJUDICACION_MAX_COMBINACIONES; si pasan es aproximada (`heuristica: true`).
+    """
+    cot = db.get(Cotizacion, cot_id)
+    if not cot:
+        raise HTTPException(404, "Cotización no encontrada")
+
+    req_items = db.execute(
+        select(ReqItem.articulo_id, ReqItem.cantidad).where(ReqItem.requerimiento_id == cot.requerimiento_id)
+    ).all()
+    proveedores = db.execute(
+        select(CotizacionProveedor.proveedor_id).where(CotizacionProveedor.cotizacion_id == cot.id)
+    ).scalars().all()
+    cotizados = db.execute(
+        select(CotizacionProveedor.proveedor_id, CotItem.articulo_id, CotItem.precio_unit)
+        .join(CotItem, CotItem.cotizacion_proveedor_id == CotizacionProveedor.id)
+        .where(CotizacionProveedor.cotizacion_id == cot.id)
+    ).all()
+
+    matriz = MatrizPrecios.desde_filas(req_items, proveedores, cotizados)
+    return {"cotizacion_id": cot.id, **matriz.analizar(max_proveedores, settings.ADJUDICACION_MAX_COMBINACIONES)}
+
 # ---------------------------------------------------------
 # 🔄 APROBAR COTIZACIÓN
 # ---------------------------------------------------------
@@ -118,16 +253,9 @@ def aprobar_cotizacion(cot_id: int, db: Session = Depends(get_db)):
     """
     Cambia el estatus de una cotización de ABIERTA a APROBADA.
     """
-    cot = db.get(Cotizacion, cot_id)
-    if not cot:
-        raise HTTPException(404, "Cotización no encontrada")
-    if cot.estatus != "ABIERTA":
-        raise HTTPException(400, "Solo se pueden aprobar cotizaciones abiertas")
-
-    cot.estatus = "APROBADA"
+    FLUJO_COT.aplicar(db, cot_id, "aprobar")
     db.commit()
-    db.refresh(cot)
-    return cot
+    return db.get(Cotizacion, cot_id)
 
 
 # ---------------------------------------------------------
@@ -138,13 +266,17 @@ def rechazar_cotizacion(cot_id: int, db: Session = Depends(get_db)):
     """
     Cambia el estatus de una cotización de ABIERTA a RECHAZADA.
     """
-    cot = db.get(Cotizacion, cot_id)
-    if not cot:
-        raise HTTPException(404, "Cotización no encontrada")
-    if cot.estatus != "ABIERTA":
-        raise HTTPException(400, "Solo se pueden rechazar cotizaciones abiertas")
+    FLUJO_COT.aplicar(db, cot_id, "rechazar")
+    db.commit()
+    return db.get(Cotizacion, cot_id)
+
 
-    cot.estatus = "RECHAZADA"
+# ---------------------------------------------------------
+# 📦 CAMBIO DE ESTATUS EN LOTE
+# ---------------------------------------------------------
+@router.put("/cotizaciones/lote", response_model=TransicionLoteOut)
+def transicionar_cotizaciones(payload: TransicionLoteIn, db: Session = Depends(get_db)):
+    """Aprueba o rechaza varias cotizaciones a la vez; informa el resultado de cada una."""
+    resultado = FLUJO_COT.lote(db, payload.ids, payload.estatus)
     db.commit()
-    db.refresh(cot)
-    return cot
+    return resultado
@@ -0,0 +1,242 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.pagination import date_range
+from app.db.session import SessionLocal
+from app.db.models import (
+    Requerimiento, ReqItem, Articulo,
+    Departamento, Clasificador, UnidadNegocio,
+    OrdenCompra, OCItem,
+    Presupuesto,
+    ProgramacionPago, DetallePago,
+)
+
+router = APIRouter(prefix="/api/export", tags=["Exportaciones"])
+
+Formato = Literal["csv", "ndjson"]
+
+
+# ---------------------------------------------------------
+# ⚙️ MOTOR DE EXPORTACIÓN
+# ---------------------------------------------------------
+# Las filas se leen con un cursor del lado del servidor (yield_per) y se
+# envían por bloques, así la memoria no crece con el tamaño de la tabla.
+# La sesión se abre dentro del generador porque vive lo que dure el envío.
+
+def _filas(stmt) -> Iterator[list]:
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        for bloque in result.partitions():
+            yield bloque
+    finally:
+        db.close()
+
+
+def _json_default(v):
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return float(v)
+    raise TypeError(type(v).__name__)
+
+
+def _codificar(stmt, formato: Formato) -> Iterator[bytes]:
+    columnas = [c.name for c in stmt.selected_columns]
+    if formato == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columnas)
+        for bloque in _filas(stmt):
+            writer.writerows(bloque)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    else:
+        for bloque in _filas(stmt):
+            yield "".join(
+                json.dumps(dict(zip(columnas, row)), default=_json_default, ensure_ascii=False) + "\n"
+                for row in bloque
+            ).encode()
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    comp = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
+
+
+def _exportar(stmt, nombre: str, formato: Formato, gzip: bool) -> StreamingResponse:
+    media_type = "text/csv; charset=utf-8" if formato == "csv" else "application/x-ndjson"
+    archivo = f"{nombre}.{formato}"
+    cuerpo = _codificar(stmt, formato)
+    if gzip:
+        cuerpo = _gzip(cuerpo)
+        media_type = "application/gzip"
+        archivo += ".gz"
+    return StreamingResponse(
+        cuerpo,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{archivo}"'},
+    )
+
+
+# ---------------------------------------------------------
+# 📦 REQUERIMIENTOS (una fila por ítem)
+# ---------------------------------------------------------
+@router.get("/requerimientos")
+def exportar_requerimientos(
+    estatus: Optional[str] = Query(None, description="Filtrar por estatus"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha inicial (inclusive)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha final (inclusive)"),
+    formato: Formato = Query("csv"),
+    gzip: bool = Query(False, description="Comprimir la salida con gzip"),
+):
+    stmt = (
+        select(
+            Requerimiento.id.label("requerimiento_id"),
+            Requerimiento.fecha,
+            Requerimiento.estatus,
+            Departamento.nombre.label("departamento"),
+            Clasificador.nombre.label("clasificador"),
+            UnidadNegocio.nombre.label("unidad_negocio"),
+            ReqItem.articulo_id,
+            Articulo.nombre.label("articulo"),
+            ReqItem.cantidad,
+        )
+        .join(Departamento, Departamento.id == Requerimiento.departamento_id)
+        .join(Clasificador, Clasificador.id == Requerimiento.clasificador_id)
+        .join(UnidadNegocio, UnidadNegocio.id == Requerimiento.unidad_negocio_id)
+        .outerjoin(ReqItem, ReqItem.requerimiento_id == Requerimiento.id)
+        .outerjoin(Articulo, Articulo.id == ReqItem.articulo_id)
+    )
+    if estatus:
+        stmt = stmt.where(Requerimiento.estatus == estatus)
+    stmt = date_range(stmt, Requerimiento.fecha, fecha_desde, fecha_hasta)
+    stmt = stmt.order_by(Requerimiento.id, ReqItem.id)
+    return _exportar(stmt, "requerimientos", formato, gzip)
+
+
+# ---------------------------------------------------------
+# 🧾 ÓRDENES DE COMPRA (una fila por ítem, con total de la OC)
+# ---------------------------------------------------------
+@router.get("/ocs")
+def exportar_ocs(
+    estatus: Optional[str] = Query(None, description="Filtrar por estatus"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha inicial (inclusive)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha final (inclusive)"),
+    formato: Formato = Query("csv"),
+    gzip: bool = Query(False, description="Comprimir la salida con gzip"),
+):
+    totales = (
+        select(
+            OCItem.orden_compra_id,
+            func.sum(OCItem.cantidad * OCItem.precio_unit).label("total_oc"),
+        )
+        .group_by(OCItem.orden_compra_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            OrdenCompra.id.label("orden_compra_id"),
+            OrdenCompra.fecha,
+            OrdenCompra.estatus,
+            OrdenCompra.proveedor_id,
+            OrdenCompra.requerimiento_id,
+            OrdenCompra.cotizacion_id,
+            OCItem.articulo_id,
+            Articulo.nombre.label("articulo"),
+            OCItem.cantidad,
+            OCItem.precio_unit,
+            (OCItem.cantidad * OCItem.precio_unit).label("importe"),
+            totales.c.total_oc,
+        )
+        .outerjoin(OCItem, OCItem.orden_compra_id == OrdenCompra.id)
+        .outerjoin(Articulo, Articulo.id == OCItem.articulo_id)
+        .outerjoin(totales, totales.c.orden_compra_id == OrdenCompra.id)
+    )
+    if estatus:
+        stmt = stmt.where(OrdenCompra.estatus == estatus)
+    stmt = date_range(stmt, OrdenCompra.fecha, fecha_desde, fecha_hasta)
+    stmt = stmt.order_by(OrdenCompra.id, OCItem.id)
+    return _exportar(stmt, "ordenes_compra", formato, gzip)
+
+
+# ---------------------------------------------------------
+# 📊 PRESUPUESTOS
+# ---------------------------------------------------------
+@router.get("/presupuestos")
+def exportar_presupuestos(
+    periodo: Optional[str] = Query(None, description="Filtrar por período"),
+    formato: Formato = Query("csv"),
+    gzip: bool = Query(False, description="Comprimir la salida con gzip"),
+):
+    stmt = (
+        select(
+            Presupuesto.id.label("presupuesto_id"),
+            Presupuesto.periodo,
+            Departamento.nombre.label("departamento"),
+            Clasificador.nombre.label("clasificador"),
+            UnidadNegocio.nombre.label("unidad_negocio"),
+            Presupuesto.monto,
+            Presupuesto.descripcion,
+            Presupuesto.fecha_creacion,
+        )
+        .join(Departamento, Departamento.id == Presupuesto.departamento_id)
+        .join(Clasificador, Clasificador.id == Presupuesto.clasificador_id)
+        .join(UnidadNegocio, UnidadNegocio.id == Presupuesto.unidad_negocio_id)
+    )
+    if periodo:
+        stmt = stmt.where(Presupuesto.periodo == periodo)
+    stmt = stmt.order_by(Presupuesto.id)
+    return _exportar(stmt, "presupuestos", formato, gzip)
+
+
+# ---------------------------------------------------------
+# 💰 DETALLE DE PAGO
+# ---------------------------------------------------------
+@router.get("/pagos")
+def exportar_pagos(
+    estatus: Optional[str] = Query(None, description="Filtrar por estatus del pago (PENDIENTE / PAGADO)"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha de pago inicial (inclusive)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha de pago final (inclusive)"),
+    formato: Formato = Query("csv"),
+    gzip: bool = Query(False, description="Comprimir la salida con gzip"),
+):
+    stmt = (
+        select(
+            DetallePago.id.label("detalle_pago_id"),
+            DetallePago.programacion_pago_id,
+            ProgramacionPago.orden_compra_id,
+            ProgramacionPago.estatus.label("estatus_programacion"),
+            UnidadNegocio.nombre.label("unidad_negocio"),
+            DetallePago.fecha_pago,
+            DetallePago.monto,
+            DetallePago.estatus,
+            DetallePago.fecha_pago_realizado,
+            DetallePago.referencia,
+            DetallePago.observaciones,
+        )
+        .join(ProgramacionPago, ProgramacionPago.id == DetallePago.programacion_pago_id)
+        .join(UnidadNegocio, UnidadNegocio.id == DetallePago.unidad_negocio_id)
+    )
+    if estatus:
+        stmt = stmt.where(DetallePago.estatus == estatus)
+    stmt = date_range(stmt, DetallePago.fecha_pago, fecha_desde, fecha_hasta)
+    stmt = stmt.order_by(DetallePago.fecha_pago, DetallePago.id)
+    return _exportar(stmt, "detalle_pago", formato, gzip)
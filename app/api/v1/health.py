@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.health import pool_saturation, readiness
+
+router = APIRouter(tags=["Salud"])
+
+
+# ---------------------------------------------------------
+# 💓 LIVENESS (sin I/O)
+# ---------------------------------------------------------
+@router.get("/health/live")
+def liveness():
+    """El proceso responde; no toca la base de datos ni el pool."""
+    return {"status": "ok"}
+
+
+# ---------------------------------------------------------
+# ✅ READINESS (verificación de base cacheada)
+# ---------------------------------------------------------
+@router.get("/health/ready")
+def readiness_check():
+    """
+    Estado de la base (cacheado por HEALTH_CHECK_INTERVAL segundos y
+    actualizado en segundo plano) y saturación del pool. Responde 503 si la
+    última verificación de la base falló.
+    """
+    estado = readiness.estado()
+    listo = estado["database"] == "connected"
+    return JSONResponse(
+        status_code=200 if listo else 503,
+        content={"status": "ok" if listo else "unavailable", **estado, "pool": pool_saturation()},
+    )
+
+
+@router.get("/health")
+def health_check():
+    """Compatibilidad con el endpoint anterior; usa el mismo resultado cacheado."""
+    estado = readiness.estado()
+    return {
+        "status": "ok",
+        "database": estado["database"],
+        "mysql_version": estado["mysql_version"],
+    }
@@ -0,0 +1,194 @@
+import csv
+import io
+from typing import Iterator, Literal, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.catalog_cache import catalogos
+from app.core.config import settings
+from app.core.etags import versiones
+from app.db.bulk import chunks
+from app.db.session import get_db
+from app.db.models import Articulo, Clasificador, Departamento, Proveedor, UnidadNegocio
+from app.schemas.catalogos import ImportacionOut
+
+router = APIRouter(prefix="/api/import", tags=["Importaciones"])
+
+Catalogo = Literal["articulos", "proveedores", "departamentos", "clasificadores", "unidades-negocio"]
+Formato = Literal["csv", "ndjson"]
+
+MODELOS = {
+    "articulos": Articulo,
+    "proveedores": Proveedor,
+    "departamentos": Departamento,
+    "clasificadores": Clasificador,
+    "unidades-negocio": UnidadNegocio,
+}
+
+
+# ---------------------------------------------------------
+# 📥 LECTURA DEL ARCHIVO
+# ---------------------------------------------------------
+# Los registros se leen uno a uno del archivo subido (Starlette lo guarda en
+# disco si es grande), así la memoria depende del tamaño de bloque y no del
+# número de filas. Cada registro va con su número de fila para los errores;
+# None indica una línea que no se pudo leer.
+
+def _registros_csv(archivo: UploadFile) -> Iterator[tuple[int, Optional[dict]]]:
+    texto = io.TextIOWrapper(archivo.file, encoding="utf-8-sig", newline="")
+    lector = csv.DictReader(texto)
+    try:
+        if "nombre" not in (lector.fieldnames or []):
+            raise HTTPException(400, "Falta la columna nombre en el CSV")
+        for fila in lector:
+            yield lector.line_num, fila
+    except UnicodeDecodeError:
+        # p. ej. exportaciones en Latin-1 / Windows-1252; se decodifica por bloques, la fila es aproximada
+        raise HTTPException(400, f"El CSV no está en UTF-8 (cerca de la fila {lector.line_num + 1})")
+    except csv.Error as e:
+        raise HTTPException(400, f"CSV mal formado en la fila {lector.line_num}: {e}")
+
+
+def _registros_ndjson(archivo: UploadFile) -> Iterator[tuple[int, Optional[dict]]]:
+    for n, linea in enumerate(archivo.file, start=1):
+        linea = linea.strip().removeprefix(b"\xef\xbb\xbf")
+        if not linea:
+            continue
+        try:
+            registro = orjson.loads(linea)
+        except orjson.JSONDecodeError:
+            registro = None
+        yield n, registro if isinstance(registro, dict) else None
+
+
+# ---------------------------------------------------------
+# ✅ VALIDACIÓN POR FILA
+# ---------------------------------------------------------
+def _texto(valor) -> str:
+    return valor.strip() if isinstance(valor, str) else ("" if valor is None else str(valor).strip())
+
+
+class _Clasificadores:
+    """Clasificadores por id y por nombre (sin distinguir mayúsculas), desde el caché de catálogos."""
+
+    def __init__(self, db: Session):
+        por_id = catalogos.nombres(db, Clasificador)
+        self.ids = set(por_id)
+        self.por_nombre = {nombre.strip().casefold(): id_ for id_, nombre in por_id.items()}
+
+    def resolver(self, registro: dict) -> tuple[Optional[int], Optional[str]]:
+        """(clasificador_id, error). Acepta la columna clasificador_id o clasificador (nombre)."""
+        valor = _texto(registro.get("clasificador_id"))
+        if valor:
+            try:
+                id_ = int(valor)
+            except ValueError:
+                return None, f"clasificador_id no válido: {valor}"
+            if id_ not in self.ids:
+                return None, f"Clasificador {id_} no existe"
+            return id_, None
+        nombre = _texto(registro.get("clasificador"))
+        if nombre:
+            id_ = self.por_nombre.get(nombre.casefold())
+            if id_ is None:
+                return None, f"Clasificador '{nombre}' no existe"
+            return id_, None
+        return None, None
+
+
+def _fila(registro: Optional[dict], largo: int, clasificadores: Optional[_Clasificadores]):
+    """(fila a insertar, error) a partir de un registro del archivo."""
+    if registro is None:
+        return None, "Registro no válido"
+    nombre = _texto(registro.get("nombre"))
+    if not nombre:
+        return None, "Falta el nombre"
+    if len(nombre) > largo:
+        return None, f"El nombre excede {largo} caracteres"
+    fila = {"nombre": nombre}
+    if clasificadores is not None:
+        fila["clasificador_id"], error = clasificadores.resolver(registro)
+        if error:
+            return None, error
+    return fila, None
+
+
+# ---------------------------------------------------------
+# ⚙️ IMPORTACIÓN
+# ---------------------------------------------------------
+def _importar(db: Session, modelo, registros: Iterator[tuple[int, Optional[dict]]]) -> dict:
+    """
+    Inserta los registros válidos que no existan por nombre, por bloques de
+    BULK_CHUNK_SIZE: una consulta `nombre IN (...)` por bloque para descartar
+    los existentes y un INSERT executemany con los nuevos. La memoria queda
+    acotada por el bloque (más los primeros errores). No hace commit.
+    """
+    largo = modelo.nombre.type.length
+    clasificadores = _Clasificadores(db) if modelo is Articulo else None
+    conteo = {"leidas": 0, "insertadas": 0, "duplicadas": 0, "con_error": 0}
+    errores: list[dict] = []
+
+    def validas() -> Iterator[dict]:
+        for n, registro in registros:
+            conteo["leidas"] += 1
+            if conteo["leidas"] > settings.IMPORT_MAX_LINES:
+                raise HTTPException(413, f"El archivo excede el máximo de {settings.IMPORT_MAX_LINES} registros")
+            fila, error = _fila(registro, largo, clasificadores)
+            if error:
+                conteo["con_error"] += 1
+                if len(errores) < settings.IMPORT_MAX_ERRORS:
+                    errores.append({"fila": n, "error": error})
+                continue
+            yield fila
+
+    tabla = modelo.__table__
+    for bloque in chunks(validas(), settings.BULK_CHUNK_SIZE):
+        # Repetidos dentro del bloque; los de bloques anteriores ya están
+        # insertados en esta transacción y los encuentra la consulta. Mismo
+        # criterio en ambos lados: nombre sin distinguir mayúsculas
+        unicas: dict[str, dict] = {}
+        for f in bloque:
+            unicas.setdefault(f["nombre"].lower(), f)
+        existentes = set(
+            db.execute(
+                select(func.lower(modelo.nombre)).where(func.lower(modelo.nombre).in_(list(unicas)))
+            ).scalars()
+        )
+        nuevas = [f for clave, f in unicas.items() if clave not in existentes]
+        conteo["duplicadas"] += len(bloque) - len(nuevas)
+        if nuevas:
+            db.execute(insert(tabla), nuevas)
+            conteo["insertadas"] += len(nuevas)
+
+    return {**conteo, "errores": errores}
+
+
+@router.post("/{catalogo}", response_model=ImportacionOut)
+def importar_catalogo(
+    catalogo: Catalogo,
+    archivo: UploadFile = File(..., description="CSV con encabezados o NDJSON (un objeto por línea)"),
+    formato: Formato = Query("csv"),
+    simular: bool = Query(False, description="Valida y cuenta sin guardar nada"),
+    db: Session = Depends(get_db),
+):
+    """
+    Importación masiva de un catálogo. Columna obligatoria `nombre`; los
+    artículos aceptan además `clasificador` (nombre) o `clasificador_id`.
+
+    Los nombres que ya existen se omiten (la carga se puede repetir), las
+    filas con error se reportan y el resto se guarda en una sola transacción.
+    """
+    modelo = MODELOS[catalogo]
+    registros = _registros_csv(archivo) if formato == "csv" else _registros_ndjson(archivo)
+    resultado = _importar(db, modelo, registros)
+
+    if simular:
+        db.rollback()
+    elif resultado["insertadas"]:
+        versiones.incrementar(db, modelo)
+        db.commit()
+        catalogos.invalidar(modelo)
+    return {"catalogo": catalogo, "simulada": simular, **resultado}
@@ -0,0 +1,65 @@
+from fastapi import APIRouter
+
+from app.core.busqueda import indice_articulos
+from app.core.instrumentacion import instrumentacion
+from app.core.security import tokens
+from app.db.session import pool_status, sql_cache_status
+
+router = APIRouter(prefix="/internal", tags=["Interno"])
+
+
+# ---------------------------------------------------------
+# 🔌 ESTADO DEL POOL DE CONEXIONES
+# ---------------------------------------------------------
+@router.get("/pool")
+def estado_pool():
+    """
+    Métricas del pool: conexiones en uso, overflow, espera en checkout,
+    timeouts e invalidaciones. Sirve para distinguir saturación del pool
+    de consultas lentas.
+    """
+    return pool_status()
+
+
+# ---------------------------------------------------------
+# 🧠 CACHÉ DE SQL COMPILADO
+# ---------------------------------------------------------
+@router.get("/sql-cache")
+def estado_sql_cache():
+    """
+    Aciertos y fallos del caché de SQL compilado de cada engine. Con tráfico
+    estable el hit_ratio debe acercarse a 1; si baja, hay statements que se
+    arman distinto en cada llamada o el caché es chico (DB_QUERY_CACHE_SIZE).
+    """
+    return sql_cache_status()
+
+
+# ---------------------------------------------------------
+# 🔎 ÍNDICE DE BÚSQUEDA DE ARTÍCULOS
+# ---------------------------------------------------------
+@router.get("/busqueda")
+def estado_busqueda():
+    """Artículos y trigramas en el índice de este proceso, y versión de la tabla que refleja."""
+    return indice_articulos.stats()
+
+
+# ---------------------------------------------------------
+# 🔐 CACHÉ DE TOKENS JWT
+# ---------------------------------------------------------
+@router.get("/jwt-cache")
+def estado_jwt_cache():
+    """Tokens verificados en caché en este proceso y su tasa de aciertos."""
+    return tokens.stats()
+
+
+# ---------------------------------------------------------
+# ⏱️ LATENCIA Y CONSULTAS POR RUTA
+# ---------------------------------------------------------
+@router.get("/instrumentacion")
+def estado_instrumentacion():
+    """
+    Por ruta: peticiones, latencia (percentiles aproximados por bucket),
+    consultas y tiempo en base por petición, y cuántas tuvieron un patrón
+    N+1. Además las últimas consultas lentas y N+1 detectadas.
+    """
+    return instrumentacion.snapshot()
@@ -0,0 +1,82 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.busqueda import indice_articulos
+from app.core.catalog_cache import catalogos
+from app.core.etags import versiones
+from app.core.metricas import metricas
+from app.core.permissions import motor_permisos
+from app.core.security import tokens
+from app.db.session import pool_status, sql_cache_status
+
+router = APIRouter(tags=["Métricas"])
+
+
+# ---------------------------------------------------------
+# 🔌 POOL DE CONEXIONES (gauges al momento del scrape)
+# ---------------------------------------------------------
+_POOL_GAUGES = {
+    "size": "Conexiones permanentes del pool",
+    "checked_out": "Conexiones en uso",
+    "checked_in": "Conexiones libres en el pool",
+    "overflow": "Conexiones de overflow abiertas",
+}
+_POOL_CONTADORES = {
+    "checkouts": "Conexiones entregadas por el pool",
+    "timeouts": "Checkouts que agotaron DB_POOL_TIMEOUT",
+    "connects": "Conexiones nuevas a la base",
+    "invalidations": "Conexiones invalidadas",
+}
+
+
+@metricas.colector
+def _pool():
+    estado = pool_status()
+    for campo, ayuda in _POOL_GAUGES.items():
+        yield f"db_pool_{campo}", "gauge", ayuda, [({"engine": e}, d[campo]) for e, d in estado.items() if campo in d]
+    for campo, ayuda in _POOL_CONTADORES.items():
+        yield f"db_pool_{campo}_total", "counter", ayuda, [({"engine": e}, d[campo]) for e, d in estado.items()]
+    yield (
+        "db_pool_wait_max_seconds", "gauge", "Espera máxima por una conexión desde el arranque",
+        [({"engine": e}, d["wait_max_ms"] / 1000) for e, d in estado.items()],
+    )
+
+
+# ---------------------------------------------------------
+# 🧠 CACHÉS EN PROCESO
+# ---------------------------------------------------------
+def _caches() -> dict[str, dict]:
+    """Estadísticas de cada caché: hits, misses y tamaño."""
+    catalogo = catalogos.stats()
+    caches = {
+        "catalogos_tablas": catalogo["tablas"],
+        "catalogos_articulos": catalogo["articulos"],
+        "permisos": motor_permisos.stats(),
+        "jwt": tokens.stats(),
+        "versiones_tabla": versiones.stats(),
+    }
+    for engine, datos in sql_cache_status().items():
+        caches[f"sql_compilado_{engine}"] = {**datos, "size": datos["entradas"]}
+    return caches
+
+
+@metricas.colector
+def _cache():
+    caches = _caches()
+    yield "cache_hits_total", "counter", "Aciertos de caché", [({"cache": n}, c["hits"]) for n, c in caches.items()]
+    yield "cache_misses_total", "counter", "Fallos de caché", [({"cache": n}, c["misses"]) for n, c in caches.items()]
+    yield (
+        "cache_hit_ratio", "gauge", "Aciertos / consultas desde el arranque",
+        [({"cache": n}, c["hit_ratio"] or 0.0) for n, c in caches.items()],
+    )
+    yield "cache_entries", "gauge", "Entradas en caché", [({"cache": n}, c["size"]) for n, c in caches.items()]
+    yield "search_index_articulos", "gauge", "Artículos en el índice de búsqueda", [({}, indice_articulos.stats()["articulos"])]
+
+
+# ---------------------------------------------------------
+# 📈 /metrics
+# ---------------------------------------------------------
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def exponer_metricas():
+    """Métricas de este proceso en el formato de texto de Prometheus."""
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,9 +1,13 @@
 from collections import defaultdict
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.db.models import (
     OrdenCompra,
     OCItem,
@@ -13,30 +17,137 @@ from app.db.models import (
     Requerimiento,
     ReqItem,
 )
-from app.schemas.ocs import OCOut, OCDetail, GenerarOCsResponse, SeleccionLinea
+from app.schemas.ocs import (
+    OCOut, OCDetail, GenerarOCsResponse, SeleccionLinea,
+    GenerarOCsLote, GenerarOCsLoteResponse,
+)
+from app.schemas.paginacion import Pagina
+from app.core.pagination import PageParams, page_params, keyset, page, date_range
+from app.core.respuestas import select_schema, pagina_json, formato_lista, FormatoLista
+from app.core.ledger import registrar_compromiso, comprometer_lote
+from app.core.workflow import FLUJO_OC
+from app.core.etags import condicional, etag_fila
+from app.core.metricas import ocs_generadas
+from app.schemas.lotes import TransicionLoteIn, TransicionLoteOut, ItemCola
 
 router = APIRouter(prefix="/api", tags=["Órdenes de Compra"])
+# Variantes async de las lecturas frecuentes (se registran solo con DB_ASYNC)
+async_router = APIRouter(prefix="/api", tags=["Órdenes de Compra"])
 
 
 # ---------------------------------------------------------
 # 📋 LISTAR ÓRDENES DE COMPRA
 # ---------------------------------------------------------
-@router.get("/ocs", response_model=list[OCOut])
-def listar_ocs(db: Session = Depends(get_db)):
+@dataclass
+class FiltrosOC:
+    estatus: Optional[str]
+    proveedor_id: Optional[int]
+    departamento_id: Optional[int]
+    clasificador_id: Optional[int]
+    unidad_negocio_id: Optional[int]
+    fecha_desde: Optional[date]
+    fecha_hasta: Optional[date]
+
+
+def filtros_oc(
+    estatus: Optional[str] = Query(None, description="Filtrar por estatus"),
+    proveedor_id: Optional[int] = Query(None, description="Filtrar por proveedor"),
+    departamento_id: Optional[int] = Query(None, description="Filtrar por departamento del requerimiento"),
+    clasificador_id: Optional[int] = Query(None, description="Filtrar por clasificador del requerimiento"),
+    unidad_negocio_id: Optional[int] = Query(None, description="Filtrar por unidad de negocio del requerimiento"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha inicial (inclusive)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha final (inclusive)"),
+) -> FiltrosOC:
+    return FiltrosOC(
+        estatus, proveedor_id, departamento_id, clasificador_id, unidad_negocio_id, fecha_desde, fecha_hasta
+    )
+
+
+ORDEN_OC = [OrdenCompra.fecha, OrdenCompra.id]
+
+
+def _stmt_listado(f: FiltrosOC, params: PageParams):
+    stmt = select_schema(OCOut, OrdenCompra, ORDEN_OC)
+
+    if f.estatus:
+        stmt = stmt.where(OrdenCompra.estatus == f.estatus)
+    if f.proveedor_id:
+        stmt = stmt.where(OrdenCompra.proveedor_id == f.proveedor_id)
+    # Departamento, clasificador y unidad de negocio viven en el requerimiento
+    if f.departamento_id or f.clasificador_id or f.unidad_negocio_id:
+        stmt = stmt.join(Requerimiento, Requerimiento.id == OrdenCompra.requerimiento_id)
+        if f.departamento_id:
+            stmt = stmt.where(Requerimiento.departamento_id == f.departamento_id)
+        if f.clasificador_id:
+            stmt = stmt.where(Requerimiento.clasificador_id == f.clasificador_id)
+        if f.unidad_negocio_id:
+            stmt = stmt.where(Requerimiento.unidad_negocio_id == f.unidad_negocio_id)
+    stmt = date_range(stmt, OrdenCompra.fecha, f.fecha_desde, f.fecha_hasta)
+
+    return keyset(stmt, ORDEN_OC, params)
+
+
+@router.get("/ocs", response_model=Pagina[OCOut])
+def listar_ocs(
+    filtros: FiltrosOC = Depends(filtros_oc),
+    params: PageParams = Depends(page_params),
+    formato: FormatoLista = Depends(formato_lista),
+    db: Session = Depends(get_db),
+):
     """
-    Devuelve el listado de Órdenes de Compra ordenadas por ID descendente.
+    Devuelve el listado paginado de Órdenes de Compra, de la más reciente a la más antigua.
     """
-    return db.query(OrdenCompra).order_by(OrdenCompra.id.desc()).all()
+    return pagina_json(db.execute(_stmt_listado(filtros, params)), OCOut, ORDEN_OC, params, formato)
+
+
+@async_router.get("/ocs", response_model=Pagina[OCOut])
+async def listar_ocs_async(
+    filtros: FiltrosOC = Depends(filtros_oc),
+    params: PageParams = Depends(page_params),
+    formato: FormatoLista = Depends(formato_lista),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return pagina_json(await db.execute(_stmt_listado(filtros, params)), OCOut, ORDEN_OC, params, formato)
+
+
+# ---------------------------------------------------------
+# 📥 COLA DE TRABAJO POR ESTATUS
+# ---------------------------------------------------------
+@router.get("/ocs/cola", response_model=Pagina[ItemCola])
+def cola_ocs(
+    estatus: str = Query("EN_REVISION", description="Estatus de la cola (BORRADOR, EN_REVISION)"),
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    """OCs en un estatus, de la más antigua a la más reciente."""
+    rows = db.execute(FLUJO_OC.cola(estatus, params)).all()
+    return page(rows, FLUJO_OC.orden_cola, params)
+
+
+@async_router.get("/ocs/cola", response_model=Pagina[ItemCola])
+async def cola_ocs_async(
+    estatus: str = Query("EN_REVISION", description="Estatus de la cola (BORRADOR, EN_REVISION)"),
+    params: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
+):
+    rows = (await db.execute(FLUJO_OC.cola(estatus, params))).all()
+    return page(rows, FLUJO_OC.orden_cola, params)
 
 
 # ---------------------------------------------------------
 # 📄 DETALLE DE ORDEN DE COMPRA
 # ---------------------------------------------------------
 @router.get("/ocs/{oc_id}", response_model=OCDetail)
-def detalle_oc(oc_id: int, db: Session = Depends(get_db)):
+def detalle_oc(oc_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Devuelve una Orden de Compra con sus ítems asociados.
+    Responde 304 si el cliente ya tiene la versión actual (If-None-Match).
     """
+    version = db.execute(select(OrdenCompra.version).where(OrdenCompra.id == oc_id)).scalar()
+    if version is None:
+        raise HTTPException(404, "OC no encontrada")
+    condicional(request, response, etag_fila(OrdenCompra, oc_id, version))
+
     oc = (
         db.query(OrdenCompra)
         .options(joinedload(OrdenCompra.items))
@@ -48,9 +159,122 @@ def detalle_oc(oc_id: int, db: Session = Depends(get_db)):
     return oc
 
 
+@async_router.get("/ocs/{oc_id}", response_model=OCDetail)
+async def detalle_oc_async(oc_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    version = (await db.execute(select(OrdenCompra.version).where(OrdenCompra.id == oc_id))).scalar()
+    if version is None:
+        raise HTTPException(404, "OC no encontrada")
+    condicional(request, response, etag_fila(OrdenCompra, oc_id, version))
+
+    stmt = select(OrdenCompra).options(selectinload(OrdenCompra.items)).where(OrdenCompra.id == oc_id)
+    oc = (await db.execute(stmt)).scalar_one_or_none()
+    if not oc:
+        raise HTTPException(404, "OC no encontrada")
+    return oc
+
+
 # ---------------------------------------------------------
 # 🧾 GENERAR ÓRDENES DE COMPRA DESDE UNA COTIZACIÓN
 # ---------------------------------------------------------
+def _generar_ocs(db: Session, solicitudes: list[tuple[int, list[SeleccionLinea]]]) -> dict[int, list[int]]:
+    """
+    Genera las OCs de una o varias cotizaciones aprobadas dentro de la
+    transacción actual (sin commit). Las validaciones, cantidades y precios
+    se resuelven con una consulta por tipo para todo el lote, y los ítems se
+    insertan con un solo executemany. Devuelve {cotizacion_id: [oc_ids]}.
+    """
+    cot_ids = [cot_id for cot_id, _ in solicitudes]
+    if len(set(cot_ids)) != len(cot_ids):
+        raise HTTPException(400, "Una cotización aparece más de una vez en el lote")
+
+    cots = {c.id: c for c in db.execute(select(Cotizacion).where(Cotizacion.id.in_(cot_ids))).scalars()}
+    for cot_id in cot_ids:
+        cot = cots.get(cot_id)
+        if not cot:
+            raise HTTPException(404, f"Cotización {cot_id} no encontrada")
+        if cot.estatus != "APROBADA":
+            raise HTTPException(400, f"La cotización {cot_id} debe estar APROBADA para generar OCs")
+
+    # Evitar generar dos veces
+    ya_generadas = db.execute(
+        select(OrdenCompra.cotizacion_id).where(OrdenCompra.cotizacion_id.in_(cot_ids)).distinct()
+    ).scalars().all()
+    if ya_generadas:
+        raise HTTPException(400, f"Ya existen OCs para la cotización {ya_generadas[0]}")
+
+    # Cantidades de los requerimientos asociados: (requerimiento, articulo) → cantidad
+    req_ids = {c.requerimiento_id for c in cots.values()}
+    req_qty = {
+        (rid, aid): qty
+        for rid, aid, qty in db.execute(
+            select(ReqItem.requerimiento_id, ReqItem.articulo_id, ReqItem.cantidad)
+            .where(ReqItem.requerimiento_id.in_(req_ids))
+        )
+    }
+
+    # Precios cotizados en una sola consulta: (cotizacion, proveedor, articulo) → precio_unit
+    precios = {
+        (cot_id, pid, aid): pu
+        for cot_id, pid, aid, pu in db.execute(
+            select(
+                CotizacionProveedor.cotizacion_id,
+                CotizacionProveedor.proveedor_id,
+                CotItem.articulo_id,
+                CotItem.precio_unit,
+            )
+            .join(CotItem, CotItem.cotizacion_proveedor_id == CotizacionProveedor.id)
+            .where(CotizacionProveedor.cotizacion_id.in_(cot_ids))
+        )
+    }
+
+    # Agrupación por (cotización, proveedor)
+    reqs_con_items = {rid for rid, _ in req_qty}
+    por_proveedor: dict[tuple[int, int], list[tuple[int, int, float]]] = defaultdict(list)
+    for cot_id, seleccion in solicitudes:
+        cot = cots[cot_id]
+        if cot.requerimiento_id not in reqs_con_items:
+            raise HTTPException(400, f"El requerimiento de la cotización {cot_id} no tiene items")
+        for linea in seleccion:
+            aid = linea.articulo_id
+            pid = linea.proveedor_id
+            qty = req_qty.get((cot.requerimiento_id, aid))
+            if qty is None:
+                raise HTTPException(400, f"Artículo {aid} no está en el requerimiento")
+            pu = precios.get((cot_id, pid, aid))
+            if pu is None:
+                raise HTTPException(400, f"El proveedor {pid} no cotizó el artículo {aid}")
+            por_proveedor[(cot_id, pid)].append((aid, qty, pu))
+
+    # Cabeceras de OC (una por proveedor); el flush asigna los IDs
+    ahora = datetime.utcnow()
+    ocs = {
+        key: OrdenCompra(
+            proveedor_id=key[1],
+            requerimiento_id=cots[key[0]].requerimiento_id,
+            cotizacion_id=key[0],
+            estatus="BORRADOR",
+            fecha=ahora,
+        )
+        for key in por_proveedor
+    }
+    db.add_all(ocs.values())
+    db.flush()
+
+    # Ítems de todas las OCs en un executemany
+    items = [
+        {"orden_compra_id": ocs[key].id, "articulo_id": aid, "cantidad": qty, "precio_unit": pu}
+        for key, rows in por_proveedor.items()
+        for aid, qty, pu in rows
+    ]
+    if items:
+        db.execute(insert(OCItem), items)
+
+    resultado: dict[int, list[int]] = {cot_id: [] for cot_id in cot_ids}
+    for (cot_id, _), oc in ocs.items():
+        resultado[cot_id].append(oc.id)
+    return resultado
+
+
 @router.post("/ocs/generar-ocs/{cot_id}", response_model=GenerarOCsResponse)
 def generar_ocs_desde_cotizacion(
     cot_id: int,
@@ -60,109 +284,65 @@ def generar_ocs_desde_cotizacion(
     """
     Genera una o varias Órdenes de Compra a partir de una cotización aprobada.
     Recibe una lista de líneas seleccionadas (artículo, proveedor) y agrupa por proveedor.
+    Todas las OCs se crean en una sola transacción.
     """
-    cot = db.get(Cotizacion, cot_id)
-    if not cot:
-        raise HTTPException(404, "Cotización no encontrada")
-    if cot.estatus != "APROBADA":
-        raise HTTPException(400, "La cotización debe estar APROBADA para generar OCs")
+    resultado = _generar_ocs(db, [(cot_id, seleccion)])
+    db.commit()
+    ocs_generadas.inc(n=len(resultado[cot_id]))
+    return {"oc_ids": resultado[cot_id]}
 
-    # Evitar generar dos veces
-    if db.query(OrdenCompra).filter_by(cotizacion_id=cot.id).first():
-        raise HTTPException(400, "Ya existen OCs para esta cotización")
 
-    # Cantidades del requerimiento asociado
-    req_qty = {
-        ri.articulo_id: ri.cantidad
-        for ri in db.query(ReqItem).filter_by(requerimiento_id=cot.requerimiento_id).all()
+@router.post("/ocs/generar-ocs", response_model=GenerarOCsLoteResponse)
+def generar_ocs_lote(
+    payload: list[GenerarOCsLote],
+    db: Session = Depends(get_db),
+):
+    """
+    Genera las OCs de varias cotizaciones aprobadas en una sola transacción.
+    Si alguna cotización o línea no es válida no se crea ninguna OC.
+    """
+    resultado = _generar_ocs(db, [(p.cotizacion_id, p.seleccion) for p in payload])
+    db.commit()
+    ocs_generadas.inc(n=sum(len(ids) for ids in resultado.values()))
+    return {
+        "resultados": [{"cotizacion_id": cid, "oc_ids": ids} for cid, ids in resultado.items()],
+        "oc_ids": [oc_id for ids in resultado.values() for oc_id in ids],
     }
-    if not req_qty:
-        raise HTTPException(400, "El requerimiento no tiene items")
-
-    # Precios cotizados: (proveedor, articulo) → precio_unit
-    precios = {}
-    cps = db.query(CotizacionProveedor).filter_by(cotizacion_id=cot.id).all()
-    for cp in cps:
-        for ci in db.query(CotItem).filter_by(cotizacion_proveedor_id=cp.id).all():
-            precios[(cp.proveedor_id, ci.articulo_id)] = ci.precio_unit
-
-    # Agrupación por proveedor
-    por_proveedor: dict[int, list[tuple[int, int, float]]] = defaultdict(list)
-    for linea in seleccion:
-        aid = linea.articulo_id
-        pid = linea.proveedor_id
-        if aid not in req_qty:
-            raise HTTPException(400, f"Artículo {aid} no está en el requerimiento")
-        key = (pid, aid)
-        if key not in precios:
-            raise HTTPException(400, f"El proveedor {pid} no cotizó el artículo {aid}")
-        por_proveedor[pid].append((aid, req_qty[aid], precios[key]))
-
-    # Crear OCs agrupadas por proveedor
-    oc_ids: list[int] = []
-    for pid, rows in por_proveedor.items():
-        oc = OrdenCompra(
-            proveedor_id=pid,
-            requerimiento_id=cot.requerimiento_id,
-            cotizacion_id=cot.id,
-            estatus="BORRADOR",
-            fecha=datetime.utcnow(),
-        )
-        db.add(oc)
-        db.flush()  # obtiene ID de la OC
-
-        for aid, qty, pu in rows:
-            db.add(
-                OCItem(
-                    orden_compra_id=oc.id,
-                    articulo_id=aid,
-                    cantidad=qty,
-                    precio_unit=pu,
-                )
-            )
-
-        db.commit()
-        db.refresh(oc)
-        oc_ids.append(oc.id)
-
-    return {"oc_ids": oc_ids}
 
 # ----------------------------
 # FLUJO DE ESTATUS
 # ----------------------------
 
+@router.put("/ocs/lote", response_model=TransicionLoteOut)
+def transicionar_ocs(payload: TransicionLoteIn, db: Session = Depends(get_db)):
+    """
+    Cambia de estatus varias OCs a la vez; informa el resultado de cada una.
+    Al aprobar, cada OC reserva su presupuesto y las que no alcanzan quedan en revisión.
+    """
+    validar = (lambda ids: comprometer_lote(db, ids)) if payload.estatus == "APROBADA" else None
+    resultado = FLUJO_OC.lote(db, payload.ids, payload.estatus, validar=validar)
+    db.commit()
+    return resultado
+
+
 @router.put("/{oc_id}/revisar", response_model=OCOut)
 def enviar_a_revision(oc_id: int, db: Session = Depends(get_db)):
-    oc = db.get(OrdenCompra, oc_id)
-    if not oc:
-        raise HTTPException(404, "OC no encontrada")
-    if oc.estatus != "BORRADOR":
-        raise HTTPException(400, "Solo se pueden enviar a revisión los borradores")
-    oc.estatus = "EN_REVISION"
+    FLUJO_OC.aplicar(db, oc_id, "revisar")
     db.commit()
-    db.refresh(oc)
-    return oc
+    return db.get(OrdenCompra, oc_id)
 
 @router.put("/{oc_id}/aprobar", response_model=OCOut)
 def aprobar_oc(oc_id: int, db: Session = Depends(get_db)):
+    FLUJO_OC.aplicar(db, oc_id, "aprobar")
     oc = db.get(OrdenCompra, oc_id)
-    if not oc:
-        raise HTTPException(404, "OC no encontrada")
-    if oc.estatus != "EN_REVISION":
-        raise HTTPException(400, "Solo se pueden aprobar las OCs en revisión")
-    oc.estatus = "APROBADA"
+    # Reserva el total de la OC en el presupuesto (misma transacción); si no
+    # alcanza, el UPDATE condicional no aplica y se responde 400 sin aprobar
+    registrar_compromiso(db, oc)
     db.commit()
-    db.refresh(oc)
     return oc
 
 @router.put("/{oc_id}/rechazar", response_model=OCOut)
 def rechazar_oc(oc_id: int, db: Session = Depends(get_db)):
-    oc = db.get(OrdenCompra, oc_id)
-    if not oc:
-        raise HTTPException(404, "OC no encontrada")
-    if oc.estatus != "EN_REVISION":
-        raise HTTPException(400, "Solo se pueden rechazar las OCs en revisión")
-    oc.estatus = "RECHAZADA"
+    FLUJO_OC.aplicar(db, oc_id, "rechazar")
     db.commit()
-    db.refresh(oc)
-    return oc
\ No newline at end of file
+    return db.get(OrdenCompra, oc_id)
\ No newline at end of file
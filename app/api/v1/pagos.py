@@ -1,18 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from datetime import datetime, timezone
-
-from app.db.session import get_db
+from dataclasses import dataclass
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from app.db.session import get_db, get_async_db
 from app.db.models import ProgramacionPago, DetallePago, OrdenCompra, UnidadNegocio
 from app.schemas.pagos import (
     ProgramacionPagoCreate,
     ProgramacionPagoOut,
     ProgramacionPagoDetalle,
     DetallePagoOut,
-    MarcarPagadoIn
+    MarcarPagadoIn,
+    FlujoCajaOut,
 )
+from app.schemas.paginacion import Pagina
+from app.schemas.lotes import TransicionPagosLoteIn, TransicionLoteOut, ItemCola
+from app.core.pagination import PageParams, page_params, keyset, page, date_range
+from app.core.catalog_cache import catalogos
+from app.core.respuestas import select_schema, pagina_json, formato_lista, FormatoLista
+from app.core.ledger import registrar_pago
+from app.core.workflow import FLUJO_PROGRAMACION, FLUJO_DETALLE_PAGO
+from app.core.etags import condicional, etag_fila
+from app.core.metricas import pagos_pagados
 
 router = APIRouter(prefix="/api/pagos", tags=["Pagos"])
+# Variantes async de las lecturas frecuentes (se registran solo con DB_ASYNC)
+async_router = APIRouter(prefix="/api/pagos", tags=["Pagos"])
 
 
 # ---------------------------------------------------------
@@ -44,6 +60,11 @@ def crear_programacion_pago(payload: ProgramacionPagoCreate, db: Session = Depen
     if existente:
         raise HTTPException(400, "Ya existe una programación de pago para esta orden de compra")
 
+    # Validar las unidades de negocio (caché de catálogos) antes de escribir
+    for unidad_id in dict.fromkeys(d.unidad_negocio_id for d in payload.detalles):
+        if not catalogos.existe(db, UnidadNegocio, unidad_id):
+            raise HTTPException(400, f"Unidad de negocio {unidad_id} no existe")
+
     # Crear la programación de pago
     programacion = ProgramacionPago(
         orden_compra_id=payload.orden_compra_id,
@@ -52,47 +73,271 @@ def crear_programacion_pago(payload: ProgramacionPagoCreate, db: Session = Depen
     db.add(programacion)
     db.flush()
 
-    # Crear los detalles de pago
-    for detalle_in in payload.detalles:
-        # Validar que la unidad de negocio exista
-        if not db.get(UnidadNegocio, detalle_in.unidad_negocio_id):
-            raise HTTPException(400, f"Unidad de negocio {detalle_in.unidad_negocio_id} no existe")
-
-        detalle = DetallePago(
-            programacion_pago_id=programacion.id,
-            unidad_negocio_id=detalle_in.unidad_negocio_id,
-            fecha_pago=detalle_in.fecha_pago,
-            monto=detalle_in.monto,
-            estatus="PENDIENTE"
-        )
-        db.add(detalle)
-
+    # Detalles en un solo INSERT executemany (no se necesitan sus ids de vuelta)
+    db.execute(insert(DetallePago), [
+        {
+            "programacion_pago_id": programacion.id,
+            "unidad_negocio_id": d.unidad_negocio_id,
+            "fecha_pago": d.fecha_pago,
+            "monto": d.monto,
+            "estatus": "PENDIENTE",
+        }
+        for d in payload.detalles
+    ])
     db.commit()
-    db.refresh(programacion)
-
-    # Cargar los detalles para la respuesta
-    programacion_completa = (
-        db.query(ProgramacionPago)
-        .options(joinedload(ProgramacionPago.detalles))
-        .filter_by(id=programacion.id)
-        .first()
-    )
 
-    return programacion_completa
+    # Programación con sus detalles para la respuesta
+    return db.execute(
+        select(ProgramacionPago)
+        .options(selectinload(ProgramacionPago.detalles))
+        .where(ProgramacionPago.id == programacion.id)
+    ).scalar_one()
 
 
 # ---------------------------------------------------------
 # 📋 LISTAR PROGRAMACIONES DE PAGO
 # ---------------------------------------------------------
+@dataclass
+class FiltrosProgramacion:
+    estatus: Optional[str]
+    orden_compra_id: Optional[int]
+    fecha_desde: Optional[date]
+    fecha_hasta: Optional[date]
+
+
+def filtros_programacion(
+    estatus: Optional[str] = Query(None, description="Filtrar por estatus"),
+    orden_compra_id: Optional[int] = Query(None, description="Filtrar por orden de compra"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha de creación inicial (inclusive)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha de creación final (inclusive)"),
+) -> FiltrosProgramacion:
+    return FiltrosProgramacion(estatus, orden_compra_id, fecha_desde, fecha_hasta)
+
+
+ORDEN_PROGRAMACION = [ProgramacionPago.fecha_creacion, ProgramacionPago.id]
+
+
+def _stmt_listado(f: FiltrosProgramacion, params: PageParams):
+    stmt = select_schema(ProgramacionPagoOut, ProgramacionPago, ORDEN_PROGRAMACION)
+
+    if f.estatus:
+        stmt = stmt.where(ProgramacionPago.estatus == f.estatus)
+    if f.orden_compra_id:
+        stmt = stmt.where(ProgramacionPago.orden_compra_id == f.orden_compra_id)
+    stmt = date_range(stmt, ProgramacionPago.fecha_creacion, f.fecha_desde, f.fecha_hasta)
+
+    return keyset(stmt, ORDEN_PROGRAMACION, params)
+
+
 @router.get(
     "/",
-    response_model=list[ProgramacionPagoOut],
+    response_model=Pagina[ProgramacionPagoOut],
     summary="Listar programaciones de pago",
-    description="Lista todas las programaciones de pago."
+    description="Lista las programaciones de pago de forma paginada, con filtros opcionales."
+)
+def listar_programaciones(
+    filtros: FiltrosProgramacion = Depends(filtros_programacion),
+    params: PageParams = Depends(page_params),
+    formato: FormatoLista = Depends(formato_lista),
+    db: Session = Depends(get_db)
+):
+    """Lista las programaciones de pago ordenadas por fecha de creación descendente."""
+    return pagina_json(
+        db.execute(_stmt_listado(filtros, params)), ProgramacionPagoOut, ORDEN_PROGRAMACION, params, formato
+    )
+
+
+@async_router.get(
+    "/",
+    response_model=Pagina[ProgramacionPagoOut],
+    summary="Listar programaciones de pago",
+    description="Lista las programaciones de pago de forma paginada, con filtros opcionales."
+)
+async def listar_programaciones_async(
+    filtros: FiltrosProgramacion = Depends(filtros_programacion),
+    params: PageParams = Depends(page_params),
+    formato: FormatoLista = Depends(formato_lista),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return pagina_json(
+        await db.execute(_stmt_listado(filtros, params)), ProgramacionPagoOut, ORDEN_PROGRAMACION, params, formato
+    )
+
+
+# ---------------------------------------------------------
+# 💵 FLUJO DE EFECTIVO (PROYECCIÓN)
+# ---------------------------------------------------------
+def _inicio_periodo(dia: date, granularidad: str) -> date:
+    if granularidad == "semana":
+        return dia - timedelta(days=dia.weekday())
+    if granularidad == "mes":
+        return dia.replace(day=1)
+    return dia
+
+
+# Máximo de períodos por consulta según la granularidad (≈ 1 año, 5 años y 10 años)
+MAX_PERIODOS = {"dia": 366, "semana": 260, "mes": 120}
+
+
+def _num_periodos(desde: date, hasta: date, granularidad: str) -> int:
+    inicio, fin = _inicio_periodo(desde, granularidad), _inicio_periodo(hasta, granularidad)
+    if granularidad == "mes":
+        return (fin.year - inicio.year) * 12 + fin.month - inicio.month + 1
+    return (fin - inicio).days // (7 if granularidad == "semana" else 1) + 1
+
+
+def _periodos(desde: date, hasta: date, granularidad: str) -> list[date]:
+    """Todos los períodos del rango, también los que no tienen pagos."""
+    inicio = _inicio_periodo(desde, granularidad)
+    n = _num_periodos(desde, hasta, granularidad)
+    # Se calcula cada período desde el inicio: nunca se avanza más allá de `hasta`
+    # (sumar un paso al último período desbordaría cerca de date.max)
+    if granularidad == "mes":
+        return [
+            date(inicio.year + (inicio.month - 1 + i) // 12, (inicio.month - 1 + i) % 12 + 1, 1)
+            for i in range(n)
+        ]
+    paso = timedelta(days=7 if granularidad == "semana" else 1)
+    return [inicio + paso * i for i in range(n)]
+
+
+def _stmt_flujo(desde: date, hasta: date, unidad_negocio_id: Optional[int]):
+    # Se agrega por día en SQL; semana y mes se acumulan en Python sobre esas filas
+    dia = func.date(DetallePago.fecha_pago)
+    stmt = (
+        select(
+            dia.label("dia"),
+            DetallePago.unidad_negocio_id,
+            UnidadNegocio.nombre.label("unidad_negocio_nombre"),
+            DetallePago.estatus,
+            func.sum(DetallePago.monto).label("monto"),
+        )
+        .join(UnidadNegocio, UnidadNegocio.id == DetallePago.unidad_negocio_id)
+        .group_by(dia, DetallePago.unidad_negocio_id, UnidadNegocio.nombre, DetallePago.estatus)
+    )
+    if unidad_negocio_id:
+        stmt = stmt.where(DetallePago.unidad_negocio_id == unidad_negocio_id)
+    return date_range(stmt, DetallePago.fecha_pago, desde, hasta)
+
+
+def _armar_flujo(rows, desde: date, hasta: date, granularidad: str) -> dict:
+    periodos = _periodos(desde, hasta, granularidad)
+    posicion = {p: i for i, p in enumerate(periodos)}
+
+    def vacio():
+        return [0.0] * len(periodos)
+
+    totales = {"PENDIENTE": vacio(), "PAGADO": vacio()}
+    series: dict[int, dict] = {}
+
+    for r in rows:
+        # SQLite devuelve la fecha como texto
+        dia = date.fromisoformat(r.dia) if isinstance(r.dia, str) else r.dia
+        i = posicion[_inicio_periodo(dia, granularidad)]
+        serie = series.setdefault(r.unidad_negocio_id, {
+            "unidad_negocio_id": r.unidad_negocio_id,
+            "unidad_negocio_nombre": r.unidad_negocio_nombre,
+            "PENDIENTE": vacio(),
+            "PAGADO": vacio(),
+        })
+        estatus = "PAGADO" if r.estatus == "PAGADO" else "PENDIENTE"
+        serie[estatus][i] += r.monto
+        totales[estatus][i] += r.monto
+
+    return {
+        "granularidad": granularidad,
+        "fecha_desde": desde,
+        "fecha_hasta": hasta,
+        "periodos": periodos,
+        "pendiente": totales["PENDIENTE"],
+        "pagado": totales["PAGADO"],
+        "series": [
+            {**s, "pendiente": s.pop("PENDIENTE"), "pagado": s.pop("PAGADO")}
+            for _, s in sorted(series.items())
+        ],
+    }
+
+
+@dataclass
+class FiltrosFlujo:
+    fecha_desde: date
+    fecha_hasta: date
+    granularidad: str
+    unidad_negocio_id: Optional[int]
+
+
+def filtros_flujo(
+    fecha_desde: date = Query(..., description="Fecha de pago inicial (inclusive)"),
+    fecha_hasta: date = Query(..., description="Fecha de pago final (inclusive)"),
+    granularidad: Literal["dia", "semana", "mes"] = Query("dia", description="Agrupar por día, semana o mes"),
+    unidad_negocio_id: Optional[int] = Query(None, description="Filtrar por unidad de negocio"),
+) -> FiltrosFlujo:
+    if fecha_hasta < fecha_desde:
+        raise HTTPException(400, "fecha_hasta debe ser posterior a fecha_desde")
+    if _num_periodos(fecha_desde, fecha_hasta, granularidad) > MAX_PERIODOS[granularidad]:
+        raise HTTPException(
+            400, f"El rango excede {MAX_PERIODOS[granularidad]} períodos para la granularidad '{granularidad}'"
+        )
+    return FiltrosFlujo(fecha_desde, fecha_hasta, granularidad, unidad_negocio_id)
+
+
+@router.get(
+    "/flujo",
+    response_model=FlujoCajaOut,
+    summary="Proyección de flujo de efectivo",
+    description="Montos pendientes y pagados por período y unidad de negocio, en formato columnar."
+)
+def flujo_efectivo(f: FiltrosFlujo = Depends(filtros_flujo), db: Session = Depends(get_db)):
+    """
+    Suma los detalles de pago por fecha de pago, estatus y unidad de negocio.
+    Cada lista trae un valor por período del rango (los períodos sin pagos van en 0).
+    """
+    rows = db.execute(_stmt_flujo(f.fecha_desde, f.fecha_hasta, f.unidad_negocio_id)).all()
+    return _armar_flujo(rows, f.fecha_desde, f.fecha_hasta, f.granularidad)
+
+
+@async_router.get(
+    "/flujo",
+    response_model=FlujoCajaOut,
+    summary="Proyección de flujo de efectivo",
+    description="Montos pendientes y pagados por período y unidad de negocio, en formato columnar."
+)
+async def flujo_efectivo_async(f: FiltrosFlujo = Depends(filtros_flujo), db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(_stmt_flujo(f.fecha_desde, f.fecha_hasta, f.unidad_negocio_id))).all()
+    return _armar_flujo(rows, f.fecha_desde, f.fecha_hasta, f.granularidad)
+
+
+# ---------------------------------------------------------
+# 📥 COLA DE TRABAJO POR ESTATUS
+# ---------------------------------------------------------
+@router.get(
+    "/cola",
+    response_model=Pagina[ItemCola],
+    summary="Cola de aprobación",
+    description="Programaciones en un estatus pendiente, de la más antigua a la más reciente."
+)
+def cola_programaciones(
+    estatus: str = Query("BORRADOR", description="Estatus de la cola (BORRADOR, PRIMERA_APROBACION)"),
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_db)
+):
+    rows = db.execute(FLUJO_PROGRAMACION.cola(estatus, params)).all()
+    return page(rows, FLUJO_PROGRAMACION.orden_cola, params)
+
+
+@async_router.get(
+    "/cola",
+    response_model=Pagina[ItemCola],
+    summary="Cola de aprobación",
+    description="Programaciones en un estatus pendiente, de la más antigua a la más reciente."
 )
-def listar_programaciones(db: Session = Depends(get_db)):
-    """Lista todas las programaciones de pago ordenadas por fecha de creación descendente."""
-    return db.query(ProgramacionPago).order_by(ProgramacionPago.fecha_creacion.desc()).all()
+async def cola_programaciones_async(
+    estatus: str = Query("BORRADOR", description="Estatus de la cola (BORRADOR, PRIMERA_APROBACION)"),
+    params: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db)
+):
+    rows = (await db.execute(FLUJO_PROGRAMACION.cola(estatus, params))).all()
+    return page(rows, FLUJO_PROGRAMACION.orden_cola, params)
 
 
 # ---------------------------------------------------------
@@ -104,8 +349,13 @@ def listar_programaciones(db: Session = Depends(get_db)):
     summary="Obtener programación de pago",
     description="Obtiene una programación de pago con todos sus detalles."
 )
-def obtener_programacion(prog_id: int, db: Session = Depends(get_db)):
-    """Obtiene una programación de pago específica con sus detalles."""
+def obtener_programacion(prog_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Obtiene una programación de pago específica con sus detalles (304 si no cambió)."""
+    version = db.execute(select(ProgramacionPago.version).where(ProgramacionPago.id == prog_id)).scalar()
+    if version is None:
+        raise HTTPException(404, "Programación de pago no encontrada")
+    condicional(request, response, etag_fila(ProgramacionPago, prog_id, version))
+
     prog = (
         db.query(ProgramacionPago)
         .options(joinedload(ProgramacionPago.detalles))
@@ -117,6 +367,33 @@ def obtener_programacion(prog_id: int, db: Session = Depends(get_db)):
     return prog
 
 
+@async_router.get(
+    "/{prog_id}",
+    response_model=ProgramacionPagoDetalle,
+    summary="Obtener programación de pago",
+    description="Obtiene una programación de pago con todos sus detalles."
+)
+async def obtener_programacion_async(
+    prog_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    version = (
+        await db.execute(select(ProgramacionPago.version).where(ProgramacionPago.id == prog_id))
+    ).scalar()
+    if version is None:
+        raise HTTPException(404, "Programación de pago no encontrada")
+    condicional(request, response, etag_fila(ProgramacionPago, prog_id, version))
+
+    stmt = (
+        select(ProgramacionPago)
+        .options(selectinload(ProgramacionPago.detalles))
+        .where(ProgramacionPago.id == prog_id)
+    )
+    prog = (await db.execute(stmt)).scalar_one_or_none()
+    if not prog:
+        raise HTTPException(404, "Programación de pago no encontrada")
+    return prog
+
+
 # ---------------------------------------------------------
 # ✅ PRIMERA APROBACIÓN
 # ---------------------------------------------------------
@@ -135,19 +412,13 @@ def primera_aprobacion(
     Primera aprobación de la programación de pago.
     Cambia el estado de BORRADOR a PRIMERA_APROBACION.
     """
-    prog = db.get(ProgramacionPago, prog_id)
-    if not prog:
-        raise HTTPException(404, "Programación de pago no encontrada")
-    if prog.estatus != "BORRADOR":
-        raise HTTPException(400, "Solo se puede aprobar programaciones en estado BORRADOR")
-
-    prog.estatus = "PRIMERA_APROBACION"
-    prog.aprobador_1 = aprobador_id
-    prog.fecha_aprobacion_1 = datetime.now(timezone.utc)
-
+    FLUJO_PROGRAMACION.aplicar(
+        db, prog_id, "primera-aprobacion",
+        aprobador_1=aprobador_id,
+        fecha_aprobacion_1=datetime.now(timezone.utc),
+    )
     db.commit()
-    db.refresh(prog)
-    return prog
+    return db.get(ProgramacionPago, prog_id)
 
 
 # ---------------------------------------------------------
@@ -168,19 +439,38 @@ def segunda_aprobacion(
     Segunda aprobación de la programación de pago.
     Cambia el estado de PRIMERA_APROBACION a APROBADA.
     """
-    prog = db.get(ProgramacionPago, prog_id)
-    if not prog:
-        raise HTTPException(404, "Programación de pago no encontrada")
-    if prog.estatus != "PRIMERA_APROBACION":
-        raise HTTPException(400, "Solo se puede realizar la segunda aprobación después de la primera")
+    FLUJO_PROGRAMACION.aplicar(
+        db, prog_id, "segunda-aprobacion",
+        aprobador_2=aprobador_id,
+        fecha_aprobacion_2=datetime.now(timezone.utc),
+    )
+    db.commit()
+    return db.get(ProgramacionPago, prog_id)
 
-    prog.estatus = "APROBADA"
-    prog.aprobador_2 = aprobador_id
-    prog.fecha_aprobacion_2 = datetime.now(timezone.utc)
 
+# ---------------------------------------------------------
+# 📦 APROBACIONES EN LOTE
+# ---------------------------------------------------------
+@router.put(
+    "/lote",
+    response_model=TransicionLoteOut,
+    summary="Aprobar programaciones en lote",
+    description="Aplica la primera (PRIMERA_APROBACION) o segunda (APROBADA) aprobación a varias programaciones."
+)
+def aprobar_programaciones_lote(payload: TransicionPagosLoteIn, db: Session = Depends(get_db)):
+    """
+    Aprueba varias programaciones de pago con un solo UPDATE.
+    Registra el aprobador y la fecha de la aprobación correspondiente.
+    """
+    ahora = datetime.now(timezone.utc)
+    if payload.estatus == "PRIMERA_APROBACION":
+        valores = {"aprobador_1": payload.aprobador_id, "fecha_aprobacion_1": ahora}
+    else:
+        valores = {"aprobador_2": payload.aprobador_id, "fecha_aprobacion_2": ahora}
+
+    resultado = FLUJO_PROGRAMACION.lote(db, payload.ids, payload.estatus, valores=valores)
     db.commit()
-    db.refresh(prog)
-    return prog
+    return resultado
 
 
 # ---------------------------------------------------------
@@ -213,17 +503,26 @@ def marcar_pago_como_pagado(
     if prog.estatus != "APROBADA":
         raise HTTPException(400, "Solo se pueden marcar pagos de programaciones APROBADAS")
 
-    # Verificar que no esté ya pagado
-    if detalle.estatus == "PAGADO":
-        raise HTTPException(400, "Este pago ya está marcado como PAGADO")
+    # Marcar como pagado; si otra petición ya lo pagó no aplica y responde 400
+    FLUJO_DETALLE_PAGO.aplicar(
+        db, detalle_id, "pagar",
+        fecha_pago_realizado=datetime.now(timezone.utc),
+        referencia=payload.referencia,
+        observaciones=payload.observaciones,
+    )
+
+    # El detalle forma parte de la programación: cambia su ETag
+    db.execute(
+        update(ProgramacionPago)
+        .where(ProgramacionPago.id == detalle.programacion_pago_id)
+        .values(version=ProgramacionPago.version + 1)
+    )
 
-    # Marcar como pagado
-    detalle.estatus = "PAGADO"
-    detalle.fecha_pago_realizado = datetime.now(timezone.utc)
-    detalle.referencia = payload.referencia
-    detalle.observaciones = payload.observaciones
+    # Suma el pago al saldo del presupuesto (misma transacción)
+    registrar_pago(db, detalle)
 
     db.commit()
+    pagos_pagados.inc()
     db.refresh(detalle)
     return detalle
 
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, contains_eager
+from typing import Optional
 from app.db.session import get_db
 from app.db.models import Permiso, UsuarioRol, Clasificador, Departamento, Perfil
 from app.schemas.permisos import (
@@ -7,6 +8,11 @@ from app.schemas.permisos import (
     UsuarioRolCreate, UsuarioRolOut,
     PerfilCreate, PerfilOut
 )
+from app.schemas.paginacion import Pagina
+from app.core.pagination import PageParams, page_params, keyset, page
+from app.core.catalog_cache import catalogos
+from app.core.permissions import motor_permisos
+from app.core.etags import cache_catalogo, versiones
 
 router = APIRouter(prefix="/api/permisos", tags=["Permisos"])
 
@@ -17,11 +23,12 @@ def crear_perfil(data: PerfilCreate, db: Session = Depends(get_db)):
         raise HTTPException(400, "El perfil ya existe")
     perfil = Perfil(**data.model_dump())
     db.add(perfil)
+    versiones.incrementar(db, Perfil)
     db.commit()
     db.refresh(perfil)
     return perfil
 
-@router.get("/perfil", response_model=list[PerfilOut])
+@router.get("/perfil", response_model=list[PerfilOut], dependencies=[cache_catalogo(Perfil)])
 def listar_perfiles(db: Session = Depends(get_db)):
     return db.query(Perfil).order_by(Perfil.nombre).all()
 
@@ -33,6 +40,7 @@ def asignar_rol(data: UsuarioRolCreate, db: Session = Depends(get_db)):
     db.add(nuevo)
     db.commit()
     db.refresh(nuevo)
+    motor_permisos.invalidar(nuevo.usuario_id)
     return nuevo
 
 @router.get("/usuario-rol", response_model=list[UsuarioRolOut])
@@ -43,9 +51,9 @@ def listar_roles_usuario(db: Session = Depends(get_db)):
 # ---------- PERMISOS ----------
 @router.post("/", response_model=PermisoOut)
 def crear_permiso(data: PermisoCreate, db: Session = Depends(get_db)):
-    if not db.get(Clasificador, data.clasificador_id):
+    if not catalogos.existe(db, Clasificador, data.clasificador_id):
         raise HTTPException(400, "Clasificador no válido")
-    if not db.get(Departamento, data.departamento_id):
+    if not catalogos.existe(db, Departamento, data.departamento_id):
         raise HTTPException(400, "Departamento no válido")
     if not db.get(Perfil, data.perfil_id):
         raise HTTPException(400, "Perfil no válido")
@@ -54,13 +62,43 @@ def crear_permiso(data: PermisoCreate, db: Session = Depends(get_db)):
     db.add(permiso)
     db.commit()
     db.refresh(permiso)
+    # Un permiso nuevo aplica a todos los usuarios con ese rol
+    motor_permisos.invalidar()
     return permiso
 
 
-@router.get("/", response_model=list[PermisoOut])
-def listar_permisos(db: Session = Depends(get_db)):
-    permisos = db.query(Permiso).join(Clasificador).join(Departamento).join(Perfil).all()
-    return [
+@router.get("/", response_model=Pagina[PermisoOut])
+def listar_permisos(
+    rol: Optional[str] = Query(None, description="Filtrar por rol"),
+    perfil_id: Optional[int] = Query(None, description="Filtrar por perfil"),
+    departamento_id: Optional[int] = Query(None, description="Filtrar por departamento"),
+    clasificador_id: Optional[int] = Query(None, description="Filtrar por clasificador"),
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    query = (
+        db.query(Permiso)
+        .join(Permiso.clasificador)
+        .join(Permiso.departamento)
+        .join(Permiso.perfil)
+        .options(
+            contains_eager(Permiso.clasificador),
+            contains_eager(Permiso.departamento),
+            contains_eager(Permiso.perfil),
+        )
+    )
+    if rol:
+        query = query.filter(Permiso.rol == rol)
+    if perfil_id:
+        query = query.filter(Permiso.perfil_id == perfil_id)
+    if departamento_id:
+        query = query.filter(Permiso.departamento_id == departamento_id)
+    if clasificador_id:
+        query = query.filter(Permiso.clasificador_id == clasificador_id)
+
+    orden = [Permiso.id]
+    resultado = page(keyset(query, orden, params, descending=False).all(), orden, params)
+    resultado["items"] = [
         PermisoOut(
             id=p.id,
             rol=p.rol,
@@ -71,5 +109,6 @@ def listar_permisos(db: Session = Depends(get_db)):
             departamento_nombre=p.departamento.nombre if p.departamento else None,
             perfil_nombre=p.perfil.nombre if p.perfil else None,
         )
-        for p in permisos
+        for p in resultado["items"]
     ]
+    return resultado
@@ -1,12 +1,36 @@
+from dataclasses import dataclass
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.db.session import get_db
-from app.db.models import Presupuesto, Departamento, Clasificador, UnidadNegocio
-from app.schemas.presupuestos import PresupuestoCreate, PresupuestoOut, PresupuestoUpdate
+from app.db.session import get_db, get_async_db
+from app.db.queries import SELECT_PRESUPUESTO, presupuesto_con_nombres
+from app.db.models import (
+    Presupuesto,
+    PresupuestoSaldo,
+    MovimientoPresupuesto,
+    Departamento,
+    Clasificador,
+    UnidadNegocio,
+)
+from app.schemas.presupuestos import (
+    PresupuestoCreate,
+    PresupuestoOut,
+    PresupuestoUpdate,
+    ConsumoPresupuestoOut,
+    RecalculoConsumoOut,
+)
+from app.schemas.paginacion import Pagina
+from app.core.pagination import PageParams, page_params, keyset, page
+from app.core.catalog_cache import catalogos
+from app.core.ledger import consumo, recalcular_saldos
+from app.core.respuestas import pagina_json, formato_lista, FormatoLista
 
 router = APIRouter(prefix="/api/presupuestos", tags=["Presupuestos"])
+# Variantes async de las lecturas frecuentes (se registran solo con DB_ASYNC)
+async_router = APIRouter(prefix="/api/presupuestos", tags=["Presupuestos"])
 
 
 # ---------------------------------------------------------
@@ -31,11 +55,14 @@ def crear_presupuesto(payload: PresupuestoCreate, db: Session = Depends(get_db))
     - **descripcion**: Descripción opcional
     """
     # Validar que existan las entidades relacionadas
-    if not db.get(Departamento, payload.departamento_id):
+    dep_nombre = catalogos.nombre(db, Departamento, payload.departamento_id)
+    if dep_nombre is None:
         raise HTTPException(400, "Departamento no existe")
-    if not db.get(Clasificador, payload.clasificador_id):
+    clas_nombre = catalogos.nombre(db, Clasificador, payload.clasificador_id)
+    if clas_nombre is None:
         raise HTTPException(400, "Clasificador no existe")
-    if not db.get(UnidadNegocio, payload.unidad_negocio_id):
+    uen_nombre = catalogos.nombre(db, UnidadNegocio, payload.unidad_negocio_id)
+    if uen_nombre is None:
         raise HTTPException(400, "Unidad de negocio no existe")
 
     # Validar que no exista un presupuesto duplicado para la misma combinación y período
@@ -54,74 +81,168 @@ def crear_presupuesto(payload: PresupuestoCreate, db: Session = Depends(get_db))
 
     # Crear presupuesto
     presupuesto = Presupuesto(**payload.model_dump())
+    # Saldo en cero desde el alta (la bitácora solo suma sobre él)
+    presupuesto.saldo = PresupuestoSaldo(comprometido=0, pagado=0, version=0)
     db.add(presupuesto)
     db.commit()
     db.refresh(presupuesto)
 
-    # Obtener nombres para la respuesta
-    dep = db.get(Departamento, presupuesto.departamento_id)
-    clas = db.get(Clasificador, presupuesto.clasificador_id)
-    uen = db.get(UnidadNegocio, presupuesto.unidad_negocio_id)
-
     return PresupuestoOut(
         **presupuesto.__dict__,
-        departamento_nombre=dep.nombre if dep else None,
-        clasificador_nombre=clas.nombre if clas else None,
-        unidad_negocio_nombre=uen.nombre if uen else None
+        departamento_nombre=dep_nombre,
+        clasificador_nombre=clas_nombre,
+        unidad_negocio_nombre=uen_nombre
     )
 
 
 # ---------------------------------------------------------
 # 📋 LISTAR PRESUPUESTOS
 # ---------------------------------------------------------
+@dataclass
+class FiltrosPresupuesto:
+    departamento_id: Optional[int]
+    clasificador_id: Optional[int]
+    unidad_negocio_id: Optional[int]
+    periodo: Optional[str]
+
+
+def filtros_presupuesto(
+    departamento_id: Optional[int] = Query(None, description="Filtrar por departamento"),
+    clasificador_id: Optional[int] = Query(None, description="Filtrar por clasificador"),
+    unidad_negocio_id: Optional[int] = Query(None, description="Filtrar por unidad de negocio"),
+    periodo: Optional[str] = Query(None, description="Filtrar por período"),
+) -> FiltrosPresupuesto:
+    return FiltrosPresupuesto(departamento_id, clasificador_id, unidad_negocio_id, periodo)
+
+
+ORDEN_PRESUPUESTO = [Presupuesto.fecha_creacion, Presupuesto.id]
+
+
+def _stmt_listado(f: FiltrosPresupuesto, params: PageParams):
+    stmt = SELECT_PRESUPUESTO
+
+    # Aplicar filtros opcionales
+    if f.departamento_id:
+        stmt = stmt.where(Presupuesto.departamento_id == f.departamento_id)
+    if f.clasificador_id:
+        stmt = stmt.where(Presupuesto.clasificador_id == f.clasificador_id)
+    if f.unidad_negocio_id:
+        stmt = stmt.where(Presupuesto.unidad_negocio_id == f.unidad_negocio_id)
+    if f.periodo:
+        stmt = stmt.where(Presupuesto.periodo == f.periodo)
+
+    return keyset(stmt, ORDEN_PRESUPUESTO, params)
+
+
 @router.get(
     "/",
-    response_model=list[PresupuestoOut],
+    response_model=Pagina[PresupuestoOut],
     summary="Listar presupuestos",
-    description="Lista todos los presupuestos con filtros opcionales."
+    description="Lista los presupuestos de forma paginada, con filtros opcionales."
 )
 def listar_presupuestos(
-    departamento_id: Optional[int] = Query(None, description="Filtrar por departamento"),
-    clasificador_id: Optional[int] = Query(None, description="Filtrar por clasificador"),
-    unidad_negocio_id: Optional[int] = Query(None, description="Filtrar por unidad de negocio"),
-    periodo: Optional[str] = Query(None, description="Filtrar por período"),
+    filtros: FiltrosPresupuesto = Depends(filtros_presupuesto),
+    params: PageParams = Depends(page_params),
+    formato: FormatoLista = Depends(formato_lista),
     db: Session = Depends(get_db)
 ):
     """
-    Lista todos los presupuestos con filtros opcionales.
+    Lista los presupuestos con filtros opcionales, del más reciente al más antiguo.
     """
-    query = (
-        db.query(
-            Presupuesto.id,
-            Presupuesto.departamento_id,
-            Presupuesto.clasificador_id,
-            Presupuesto.unidad_negocio_id,
-            Presupuesto.monto,
-            Presupuesto.periodo,
-            Presupuesto.descripcion,
-            Presupuesto.fecha_creacion,
-            Departamento.nombre.label("departamento_nombre"),
-            Clasificador.nombre.label("clasificador_nombre"),
-            UnidadNegocio.nombre.label("unidad_negocio_nombre"),
-        )
-        .join(Departamento, Departamento.id == Presupuesto.departamento_id)
-        .join(Clasificador, Clasificador.id == Presupuesto.clasificador_id)
-        .join(UnidadNegocio, UnidadNegocio.id == Presupuesto.unidad_negocio_id)
+    return pagina_json(db.execute(_stmt_listado(filtros, params)), PresupuestoOut, ORDEN_PRESUPUESTO, params, formato)
+
+
+@async_router.get(
+    "/",
+    response_model=Pagina[PresupuestoOut],
+    summary="Listar presupuestos",
+    description="Lista los presupuestos de forma paginada, con filtros opcionales."
+)
+async def listar_presupuestos_async(
+    filtros: FiltrosPresupuesto = Depends(filtros_presupuesto),
+    params: PageParams = Depends(page_params),
+    formato: FormatoLista = Depends(formato_lista),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return pagina_json(
+        await db.execute(_stmt_listado(filtros, params)), PresupuestoOut, ORDEN_PRESUPUESTO, params, formato
     )
 
-    # Aplicar filtros opcionales
-    if departamento_id:
-        query = query.filter(Presupuesto.departamento_id == departamento_id)
-    if clasificador_id:
-        query = query.filter(Presupuesto.clasificador_id == clasificador_id)
-    if unidad_negocio_id:
-        query = query.filter(Presupuesto.unidad_negocio_id == unidad_negocio_id)
-    if periodo:
-        query = query.filter(Presupuesto.periodo == periodo)
 
-    query = query.order_by(Presupuesto.fecha_creacion.desc())
+# ---------------------------------------------------------
+# 💰 CONSUMO DE PRESUPUESTO
+# ---------------------------------------------------------
+def _stmt_consumo(f: FiltrosPresupuesto, params: PageParams):
+    comprometido = func.coalesce(PresupuestoSaldo.comprometido, 0.0)
+    pagado = func.coalesce(PresupuestoSaldo.pagado, 0.0)
+    stmt = select(
+        Presupuesto.id.label("presupuesto_id"),
+        Presupuesto.departamento_id,
+        Presupuesto.clasificador_id,
+        Presupuesto.unidad_negocio_id,
+        Presupuesto.periodo,
+        Presupuesto.monto,
+        comprometido.label("comprometido"),
+        pagado.label("pagado"),
+        (comprometido - pagado).label("por_pagar"),
+        (Presupuesto.monto - comprometido).label("disponible"),
+        func.coalesce(PresupuestoSaldo.version, 0).label("version"),
+        # Columnas del orden, necesarias para el cursor
+        Presupuesto.fecha_creacion,
+        Presupuesto.id,
+    ).outerjoin(PresupuestoSaldo, PresupuestoSaldo.presupuesto_id == Presupuesto.id)
+
+    if f.departamento_id:
+        stmt = stmt.where(Presupuesto.departamento_id == f.departamento_id)
+    if f.clasificador_id:
+        stmt = stmt.where(Presupuesto.clasificador_id == f.clasificador_id)
+    if f.unidad_negocio_id:
+        stmt = stmt.where(Presupuesto.unidad_negocio_id == f.unidad_negocio_id)
+    if f.periodo:
+        stmt = stmt.where(Presupuesto.periodo == f.periodo)
+
+    return keyset(stmt, ORDEN_PRESUPUESTO, params)
+
+
+@router.get(
+    "/consumo/resumen",
+    response_model=Pagina[ConsumoPresupuestoOut],
+    summary="Resumen de consumo",
+    description="Comprometido, pagado y disponible de varios presupuestos, paginado y con los mismos filtros del listado."
+)
+def resumen_consumo(
+    filtros: FiltrosPresupuesto = Depends(filtros_presupuesto),
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_db)
+):
+    rows = db.execute(_stmt_consumo(filtros, params)).all()
+    return page(rows, ORDEN_PRESUPUESTO, params)
+
+
+@router.post(
+    "/consumo/recalcular",
+    response_model=RecalculoConsumoOut,
+    summary="Recalcular consumo",
+    description="Registra los consumos faltantes (OCs aprobadas y pagos realizados) y reconstruye los saldos desde la bitácora."
+)
+def recalcular_consumo(db: Session = Depends(get_db)):
+    resultado = recalcular_saldos(db)
+    db.commit()
+    return resultado
+
+
+@router.get(
+    "/{presupuesto_id}/consumo",
+    response_model=ConsumoPresupuestoOut,
+    summary="Consumo de un presupuesto",
+    description="Monto, comprometido (OCs aprobadas), pagado y disponible de un presupuesto."
+)
+def obtener_consumo(presupuesto_id: int, db: Session = Depends(get_db)):
+    presupuesto = db.get(Presupuesto, presupuesto_id)
+    if not presupuesto:
+        raise HTTPException(404, "Presupuesto no encontrado")
 
-    return query.all()
+    return consumo(presupuesto, db.get(PresupuestoSaldo, presupuesto_id))
 
 
 # ---------------------------------------------------------
@@ -137,26 +258,7 @@ def obtener_presupuesto(presupuesto_id: int, db: Session = Depends(get_db)):
     """
     Obtiene un presupuesto específico por su ID.
     """
-    result = (
-        db.query(
-            Presupuesto.id,
-            Presupuesto.departamento_id,
-            Presupuesto.clasificador_id,
-            Presupuesto.unidad_negocio_id,
-            Presupuesto.monto,
-            Presupuesto.periodo,
-            Presupuesto.descripcion,
-            Presupuesto.fecha_creacion,
-            Departamento.nombre.label("departamento_nombre"),
-            Clasificador.nombre.label("clasificador_nombre"),
-            UnidadNegocio.nombre.label("unidad_negocio_nombre"),
-        )
-        .join(Departamento, Departamento.id == Presupuesto.departamento_id)
-        .join(Clasificador, Clasificador.id == Presupuesto.clasificador_id)
-        .join(UnidadNegocio, UnidadNegocio.id == Presupuesto.unidad_negocio_id)
-        .filter(Presupuesto.id == presupuesto_id)
-        .first()
-    )
+    result = db.execute(presupuesto_con_nombres(presupuesto_id)).first()
 
     if not result:
         raise HTTPException(404, "Presupuesto no encontrado")
@@ -195,16 +297,12 @@ def actualizar_presupuesto(
     db.commit()
     db.refresh(presupuesto)
 
-    # Obtener nombres para la respuesta
-    dep = db.get(Departamento, presupuesto.departamento_id)
-    clas = db.get(Clasificador, presupuesto.clasificador_id)
-    uen = db.get(UnidadNegocio, presupuesto.unidad_negocio_id)
-
+    # Nombres para la respuesta desde la caché de catálogos
     return PresupuestoOut(
         **presupuesto.__dict__,
-        departamento_nombre=dep.nombre if dep else None,
-        clasificador_nombre=clas.nombre if clas else None,
-        unidad_negocio_nombre=uen.nombre if uen else None
+        departamento_nombre=catalogos.nombre(db, Departamento, presupuesto.departamento_id),
+        clasificador_nombre=catalogos.nombre(db, Clasificador, presupuesto.clasificador_id),
+        unidad_negocio_nombre=catalogos.nombre(db, UnidadNegocio, presupuesto.unidad_negocio_id)
     )
 
 
@@ -225,6 +323,13 @@ def eliminar_presupuesto(presupuesto_id: int, db: Session = Depends(get_db)):
     if not presupuesto:
         raise HTTPException(404, "Presupuesto no encontrado")
 
+    # Con movimientos registrados se perdería el rastro de OCs y pagos
+    con_movimientos = db.execute(
+        select(MovimientoPresupuesto.id).where(MovimientoPresupuesto.presupuesto_id == presupuesto_id).limit(1)
+    ).first()
+    if con_movimientos:
+        raise HTTPException(400, "El presupuesto tiene consumos registrados y no se puede eliminar")
+
     db.delete(presupuesto)
     db.commit()
 
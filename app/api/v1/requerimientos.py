@@ -1,20 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from dataclasses import dataclass
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
+from app.db.queries import SELECT_REQ, req_con_nombres, req_items
 from app.db.models import (
     Requerimiento,
     ReqItem,
-    Articulo,
     Departamento,
     Clasificador,
     UnidadNegocio,
 )
-from app.schemas.requerimientos import ReqCreate, ReqOut, ReqDetail, ReqItemOut
+from app.schemas.requerimientos import ReqCreate, ReqOut, ReqDetail
+from app.schemas.paginacion import Pagina
+from app.schemas.lotes import TransicionLoteIn, TransicionLoteOut, ItemCola
 from app.core.security import get_current_user
+from app.core.pagination import PageParams, page_params, keyset, page, date_range
+from app.core.catalog_cache import catalogos
+from app.core.respuestas import pagina_json, formato_lista, FormatoLista
+from app.core.config import settings
+from app.core.ledger import verificar_disponible
+from app.core.workflow import FLUJO_REQ
 
 router = APIRouter(prefix="/api", tags=["Requerimientos"])
+# Variantes async de las lecturas frecuentes (se registran solo con DB_ASYNC)
+async_router = APIRouter(prefix="/api", tags=["Requerimientos"])
 
 
 # ---------------------------------------------------------
@@ -22,16 +36,18 @@ router = APIRouter(prefix="/api", tags=["Requerimientos"])
 # ---------------------------------------------------------
 @router.post("/requerimientos", response_model=ReqOut)
 def crear_requerimiento(payload: ReqCreate, db: Session = Depends(get_db)):
-    if not db.get(Departamento, payload.departamento_id):
+    dep_nombre = catalogos.nombre(db, Departamento, payload.departamento_id)
+    if dep_nombre is None:
         raise HTTPException(400, "Departamento no existe")
-    if not db.get(Clasificador, payload.clasificador_id):
+    clas_nombre = catalogos.nombre(db, Clasificador, payload.clasificador_id)
+    if clas_nombre is None:
         raise HTTPException(400, "Clasificador no existe")
-    if not db.get(UnidadNegocio, payload.unidad_negocio_id):
+    uen_nombre = catalogos.nombre(db, UnidadNegocio, payload.unidad_negocio_id)
+    if uen_nombre is None:
         raise HTTPException(400, "Unidad de negocio no existe")
 
-    articulo_map = {
-        a.id: a.clasificador_id for a in db.query(Articulo.id, Articulo.clasificador_id).all()
-    }
+    # Solo los artículos del payload (desde caché; los faltantes en una consulta)
+    articulo_map = catalogos.articulos_clasificador(db, [it.articulo_id for it in payload.items])
     for it in payload.items:
         if it.articulo_id not in articulo_map:
             raise HTTPException(400, f"Artículo {it.articulo_id} no existe")
@@ -56,10 +72,6 @@ def crear_requerimiento(payload: ReqCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(req)
 
-    dep = db.get(Departamento, req.departamento_id)
-    clas = db.get(Clasificador, req.clasificador_id)
-    uen = db.get(UnidadNegocio, req.unidad_negocio_id)
-
     return {
         "id": req.id,
         "estatus": req.estatus,
@@ -67,36 +79,98 @@ def crear_requerimiento(payload: ReqCreate, db: Session = Depends(get_db)):
         "departamento_id": req.departamento_id,
         "clasificador_id": req.clasificador_id,
         "unidad_negocio_id": req.unidad_negocio_id,
-        "departamento_nombre": dep.nombre if dep else None,
-        "clasificador_nombre": clas.nombre if clas else None,
-        "unidad_negocio_nombre": uen.nombre if uen else None,
+        "departamento_nombre": dep_nombre,
+        "clasificador_nombre": clas_nombre,
+        "unidad_negocio_nombre": uen_nombre,
     }
 
 
 # ---------------------------------------------------------
 # 📋 LISTAR REQUERIMIENTOS
 # ---------------------------------------------------------
-@router.get("/requerimientos", response_model=list[ReqOut])
-def listar_requerimientos(db: Session = Depends(get_db)):
-    query = (
-        db.query(
-            Requerimiento.id,
-            Requerimiento.estatus,
-            Requerimiento.fecha,
-            Requerimiento.departamento_id,
-            Departamento.nombre.label("departamento_nombre"),
-            Requerimiento.clasificador_id,
-            Clasificador.nombre.label("clasificador_nombre"),
-            Requerimiento.unidad_negocio_id,
-            UnidadNegocio.nombre.label("unidad_negocio_nombre"),
-        )
-        .join(Departamento, Departamento.id == Requerimiento.departamento_id)
-        .join(Clasificador, Clasificador.id == Requerimiento.clasificador_id)
-        .join(UnidadNegocio, UnidadNegocio.id == Requerimiento.unidad_negocio_id)
-        .order_by(Requerimiento.id.desc())
-    )
+@dataclass
+class FiltrosReq:
+    estatus: Optional[str]
+    departamento_id: Optional[int]
+    clasificador_id: Optional[int]
+    unidad_negocio_id: Optional[int]
+    fecha_desde: Optional[date]
+    fecha_hasta: Optional[date]
+
+
+def filtros_req(
+    estatus: Optional[str] = Query(None, description="Filtrar por estatus"),
+    departamento_id: Optional[int] = Query(None, description="Filtrar por departamento"),
+    clasificador_id: Optional[int] = Query(None, description="Filtrar por clasificador"),
+    unidad_negocio_id: Optional[int] = Query(None, description="Filtrar por unidad de negocio"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha inicial (inclusive)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha final (inclusive)"),
+) -> FiltrosReq:
+    return FiltrosReq(estatus, departamento_id, clasificador_id, unidad_negocio_id, fecha_desde, fecha_hasta)
+
+
+ORDEN_REQ = [Requerimiento.fecha, Requerimiento.id]
+
+
+def _stmt_listado(f: FiltrosReq, params: PageParams):
+    stmt = SELECT_REQ
+
+    # Filtros opcionales (se resuelven en SQL)
+    if f.estatus:
+        stmt = stmt.where(Requerimiento.estatus == f.estatus)
+    if f.departamento_id:
+        stmt = stmt.where(Requerimiento.departamento_id == f.departamento_id)
+    if f.clasificador_id:
+        stmt = stmt.where(Requerimiento.clasificador_id == f.clasificador_id)
+    if f.unidad_negocio_id:
+        stmt = stmt.where(Requerimiento.unidad_negocio_id == f.unidad_negocio_id)
+    stmt = date_range(stmt, Requerimiento.fecha, f.fecha_desde, f.fecha_hasta)
+
+    return keyset(stmt, ORDEN_REQ, params)
+
+
+@router.get("/requerimientos", response_model=Pagina[ReqOut])
+def listar_requerimientos(
+    filtros: FiltrosReq = Depends(filtros_req),
+    params: PageParams = Depends(page_params),
+    formato: FormatoLista = Depends(formato_lista),
+    db: Session = Depends(get_db),
+):
+    return pagina_json(db.execute(_stmt_listado(filtros, params)), ReqOut, ORDEN_REQ, params, formato)
+
+
+@async_router.get("/requerimientos", response_model=Pagina[ReqOut])
+async def listar_requerimientos_async(
+    filtros: FiltrosReq = Depends(filtros_req),
+    params: PageParams = Depends(page_params),
+    formato: FormatoLista = Depends(formato_lista),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return pagina_json(await db.execute(_stmt_listado(filtros, params)), ReqOut, ORDEN_REQ, params, formato)
 
-    return query.all()
+
+# ---------------------------------------------------------
+# 📥 COLA DE TRABAJO POR ESTATUS
+# ---------------------------------------------------------
+@router.get("/requerimientos/cola", response_model=Pagina[ItemCola])
+def cola_requerimientos(
+    estatus: str = Query("EN_REVISION", description="Estatus de la cola (BORRADOR, EN_REVISION)"),
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    """Requerimientos en un estatus, del más antiguo al más reciente."""
+    rows = db.execute(FLUJO_REQ.cola(estatus, params)).all()
+    return page(rows, FLUJO_REQ.orden_cola, params)
+
+
+@async_router.get("/requerimientos/cola", response_model=Pagina[ItemCola])
+async def cola_requerimientos_async(
+    estatus: str = Query("EN_REVISION", description="Estatus de la cola (BORRADOR, EN_REVISION)"),
+    params: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
+):
+    rows = (await db.execute(FLUJO_REQ.cola(estatus, params))).all()
+    return page(rows, FLUJO_REQ.orden_cola, params)
 
 
 # ---------------------------------------------------------
@@ -104,24 +178,17 @@ def listar_requerimientos(db: Session = Depends(get_db)):
 # ---------------------------------------------------------
 @router.get("/requerimientos/{req_id}", response_model=ReqOut)
 def obtener_requerimiento(req_id: int, db: Session = Depends(get_db)):
-    req = (
-        db.query(
-            Requerimiento.id,
-            Requerimiento.estatus,
-            Requerimiento.fecha,
-            Requerimiento.departamento_id,
-            Departamento.nombre.label("departamento_nombre"),
-            Requerimiento.clasificador_id,
-            Clasificador.nombre.label("clasificador_nombre"),
-            Requerimiento.unidad_negocio_id,
-            UnidadNegocio.nombre.label("unidad_negocio_nombre"),
-        )
-        .join(Departamento, Departamento.id == Requerimiento.departamento_id)
-        .join(Clasificador, Clasificador.id == Requerimiento.clasificador_id)
-        .join(UnidadNegocio, UnidadNegocio.id == Requerimiento.unidad_negocio_id)
-        .filter(Requerimiento.id == req_id)
-        .first()
-    )
+    req = db.execute(req_con_nombres(req_id)).first()
+
+    if not req:
+        raise HTTPException(404, "Requerimiento no encontrado")
+
+    return req
+
+
+@async_router.get("/requerimientos/{req_id}", response_model=ReqOut)
+async def obtener_requerimiento_async(req_id: int, db: AsyncSession = Depends(get_async_db)):
+    req = (await db.execute(req_con_nombres(req_id))).first()
 
     if not req:
         raise HTTPException(404, "Requerimiento no encontrado")
@@ -134,38 +201,12 @@ def obtener_requerimiento(req_id: int, db: Session = Depends(get_db)):
 # ---------------------------------------------------------
 @router.get("/requerimientos/{req_id}/detalle", response_model=ReqDetail)
 def obtener_requerimiento_detalle(req_id: int, db: Session = Depends(get_db)):
-    req = (
-        db.query(
-            Requerimiento.id,
-            Requerimiento.estatus,
-            Requerimiento.fecha,
-            Requerimiento.departamento_id,
-            Departamento.nombre.label("departamento_nombre"),
-            Requerimiento.clasificador_id,
-            Clasificador.nombre.label("clasificador_nombre"),
-            Requerimiento.unidad_negocio_id,
-            UnidadNegocio.nombre.label("unidad_negocio_nombre"),
-        )
-        .join(Departamento, Departamento.id == Requerimiento.departamento_id)
-        .join(Clasificador, Clasificador.id == Requerimiento.clasificador_id)
-        .join(UnidadNegocio, UnidadNegocio.id == Requerimiento.unidad_negocio_id)
-        .filter(Requerimiento.id == req_id)
-        .first()
-    )
+    req = db.execute(req_con_nombres(req_id)).first()
 
     if not req:
         raise HTTPException(404, "Requerimiento no encontrado")
 
-    items = (
-        db.query(
-            ReqItem.articulo_id,
-            ReqItem.cantidad,
-            Articulo.nombre.label("articulo_nombre"),
-        )
-        .join(Articulo, Articulo.id == ReqItem.articulo_id)
-        .filter(ReqItem.requerimiento_id == req_id)
-        .all()
-    )
+    items = db.execute(req_items(req_id)).all()
 
     return {**req._asdict(), "items": items}
 
@@ -173,75 +214,64 @@ def obtener_requerimiento_detalle(req_id: int, db: Session = Depends(get_db)):
 # ---------------------------------------------------------
 # 🔄 FLUJO DE APROBACIÓN
 # ---------------------------------------------------------
-
-
 def _get_req_with_names(req_id: int, db: Session):
     """Consulta auxiliar que devuelve el requerimiento con nombres relacionados."""
-    result = (
-        db.query(
-            Requerimiento.id,
-            Requerimiento.estatus,
-            Requerimiento.fecha,
-            Requerimiento.departamento_id,
-            Departamento.nombre.label("departamento_nombre"),
-            Requerimiento.clasificador_id,
-            Clasificador.nombre.label("clasificador_nombre"),
-            Requerimiento.unidad_negocio_id,
-            UnidadNegocio.nombre.label("unidad_negocio_nombre"),
-        )
-        .join(Departamento, Departamento.id == Requerimiento.departamento_id)
-        .join(Clasificador, Clasificador.id == Requerimiento.clasificador_id)
-        .join(UnidadNegocio, UnidadNegocio.id == Requerimiento.unidad_negocio_id)
-        .filter(Requerimiento.id == req_id)
-        .first()
-    )
-    return result
+    return db.execute(req_con_nombres(req_id)).first()
 
 
 @router.put("/requerimientos/{req_id}/revisar", response_model=ReqOut)
 def enviar_a_revision(req_id: int, db: Session = Depends(get_db)):
-    req = db.get(Requerimiento, req_id)
-    if not req:
-        raise HTTPException(404, "Requerimiento no encontrado")
-    if req.estatus != "BORRADOR":
-        raise HTTPException(400, "Solo se pueden enviar a revisión los borradores")
-
-    req.estatus = "EN_REVISION"
+    FLUJO_REQ.aplicar(db, req_id, "revisar")
     db.commit()
-    db.refresh(req)
 
     return _get_req_with_names(req_id, db)
 
 
 @router.put("/requerimientos/{req_id}/aprobar", response_model=ReqOut)
-def aprobar_requerimiento(req_id: int, db: Session = Depends(get_db)):
-    req = db.get(Requerimiento, req_id)
-    if not req:
-        raise HTTPException(404, "Requerimiento no encontrado")
-    if req.estatus not in ("EN_REVISION",):
-        raise HTTPException(400, "Solo se pueden aprobar los que están en revisión")
-
-    req.estatus = "APROBADO"
+def aprobar_requerimiento(
+    req_id: int,
+    monto_estimado: Optional[float] = Query(None, gt=0, description="Monto estimado a validar contra el presupuesto disponible"),
+    db: Session = Depends(get_db),
+):
+    FLUJO_REQ.aplicar(db, req_id, "aprobar")
+
+    # Presupuesto del período del requerimiento (la reserva se hace al aprobar la OC);
+    # si no alcanza, la excepción descarta también el cambio de estatus
+    verificar_disponible(db, db.get(Requerimiento, req_id), monto_estimado)
     db.commit()
-    db.refresh(req)
 
     return _get_req_with_names(req_id, db)
 
 
 @router.put("/requerimientos/{req_id}/rechazar", response_model=ReqOut)
 def rechazar_requerimiento(req_id: int, db: Session = Depends(get_db)):
-    req = db.get(Requerimiento, req_id)
-    if not req:
-        raise HTTPException(404, "Requerimiento no encontrado")
-    if req.estatus not in ("EN_REVISION",):
-        raise HTTPException(400, "Solo se pueden rechazar los que están en revisión")
-
-    req.estatus = "RECHAZADO"
+    FLUJO_REQ.aplicar(db, req_id, "rechazar")
     db.commit()
-    db.refresh(req)
 
     return _get_req_with_names(req_id, db)
 
+
+@router.put("/requerimientos/lote", response_model=TransicionLoteOut)
+def transicionar_requerimientos(payload: TransicionLoteIn, db: Session = Depends(get_db)):
+    """Cambia de estatus varios requerimientos a la vez; informa el resultado de cada uno."""
+
+    def validar(ids: list[int]) -> dict[int, str]:
+        # Sin monto estimado la validación solo aplica cuando el presupuesto es obligatorio
+        if payload.estatus != "APROBADO" or not settings.PRESUPUESTO_OBLIGATORIO:
+            return {}
+        errores = {}
+        for req in db.execute(select(Requerimiento).where(Requerimiento.id.in_(ids))).scalars():
+            try:
+                verificar_disponible(db, req)
+            except HTTPException as e:
+                errores[req.id] = e.detail
+        return errores
+
+    resultado = FLUJO_REQ.lote(db, payload.ids, payload.estatus, validar=validar)
+    db.commit()
+    return resultado
+
+
 @router.get("/protegido")
 def ruta_protegida(current_user: dict = Depends(get_current_user)):
     return {"mensaje": "Acceso concedido", "usuario": current_user}
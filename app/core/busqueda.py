@@ -0,0 +1,183 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.etags import versiones
+from app.db.models import Articulo
+from app.db.session import SessionLocal
+
+
+# ---------------------------------------------------------
+# 🔎 ÍNDICE DE BÚSQUEDA DE ARTÍCULOS
+# ---------------------------------------------------------
+# Índice invertido en memoria de trigramas del nombre normalizado (sin
+# acentos, minúsculas). Cada palabra se rellena con dos espacios al inicio,
+# así los primeros trigramas representan su prefijo y la búsqueda sirve
+# para autocompletar; los trigramas compartidos toleran errores de captura.
+
+_NO_ALFANUM = re.compile(r"[\W_]+")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin acentos ni signos, espacios simples: 'Lápiz  H.B.' → 'lapiz h b'."""
+    if not texto.isascii():
+        descompuesto = unicodedata.normalize("NFKD", texto)
+        texto = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(_NO_ALFANUM.sub(" ", texto.casefold()).split())
+
+
+def trigramas(normalizado: str, prefijo: bool = False) -> set[str]:
+    """
+    Trigramas de cada palabra de un texto ya normalizado. Con `prefijo` la
+    última palabra no se cierra: se considera incompleta (el usuario la sigue escribiendo).
+    """
+    rellenas = ["  " + palabra + " " for palabra in normalizado.split()]
+    if prefijo and rellenas:
+        rellenas[-1] = rellenas[-1][:-1]
+    return {r[j:j + 3] for r in rellenas for j in range(len(r) - 2)}
+
+
+class IndiceArticulos:
+    """
+    Índice de `Articulo.nombre` para búsquedas top-k.
+
+    Se construye completo en la primera búsqueda del proceso. Después se
+    actualiza de forma incremental: `agregar` al crear un artículo aquí, y al
+    cambiar la versión de la tabla `articulo` (escrituras en otros procesos,
+    importaciones) se leen solo los ids nuevos. Los artículos no se editan
+    ni se borran, así que no hay que quitar entradas.
+    """
+
+    def __init__(self, umbral: float, max_candidatos: int):
+        self.umbral = umbral                  # fracción mínima de trigramas de la consulta
+        self.max_candidatos = max_candidatos  # candidatos que se califican por búsqueda
+        self.version: Optional[int] = None
+        self._nombres: dict[int, str] = {}
+        self._normalizados: dict[int, str] = {}
+        self._postings: dict[str, array] = {}  # trigrama -> ids
+        # Por id (posición = id): trigramas del nombre y clasificador (-1 = ninguno)
+        self._num_trigramas = array("H")
+        self._clasificador = array("i")
+        self._max_id = 0
+        self._lock = threading.Lock()
+
+    # ---- Construcción ----
+    def _indexar(self, id_: int, nombre: str, clasificador_id: Optional[int]) -> None:
+        if id_ in self._nombres:
+            return
+        normalizado = normalizar(nombre)
+        grams = trigramas(normalizado)
+        self._nombres[id_] = nombre
+        self._normalizados[id_] = normalizado
+        faltan = id_ + 1 - len(self._num_trigramas)
+        if faltan > 0:
+            self._num_trigramas.extend(array("H", bytes(2 * faltan)))
+            self._clasificador.extend(array("i", [-1]) * faltan)
+        self._num_trigramas[id_] = min(len(grams), 65535)
+        self._clasificador[id_] = -1 if clasificador_id is None else clasificador_id
+        for g in grams:
+            lista = self._postings.get(g)
+            if lista is None:
+                self._postings[g] = lista = array("i")
+            lista.append(id_)
+        self._max_id = max(self._max_id, id_)
+
+    def agregar(self, id_: int, nombre: str, clasificador_id: Optional[int]) -> None:
+        with self._lock:
+            self._indexar(id_, nombre, clasificador_id)
+
+    def sincronizar(self, db: Session) -> None:
+        """Carga los artículos que falten si la tabla cambió desde la última carga."""
+        version, _ = versiones.version(db, Articulo.__tablename__)
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            stmt = select(Articulo.id, Articulo.nombre, Articulo.clasificador_id)
+            if self.version is not None:
+                # Margen hacia atrás por transacciones que confirmaron después de ids mayores
+                stmt = stmt.where(Articulo.id > self._max_id - settings.SEARCH_CATCHUP_MARGIN)
+            for id_, nombre, clasificador_id in db.execute(stmt.execution_options(yield_per=5000)):
+                self._indexar(id_, nombre, clasificador_id)
+            self.version = version
+
+    def precargar(self) -> None:
+        """Construye el índice en segundo plano (al arrancar) para no cargarlo en la primera búsqueda."""
+
+        def cargar():
+            with SessionLocal() as db:
+                self.sincronizar(db)
+
+        threading.Thread(target=cargar, name="indice-articulos", daemon=True).start()
+
+    # ---- Búsqueda ----
+    def buscar(self, consulta: str, limite: int = 20, clasificador_id: Optional[int] = None) -> list[dict]:
+        normalizada = normalizar(consulta)
+        qgrams = trigramas(normalizada, prefijo=True)
+        if not qgrams:
+            return []
+
+        # Trigramas en común de cada artículo con la consulta: un bincount sobre
+        # las listas de ids de los trigramas de la consulta (copias numpy, así
+        # las listas pueden seguir creciendo mientras tanto)
+        n = len(qgrams)
+        minimo = max(1, math.ceil(n * self.umbral))
+        listas = [np.array(lista, dtype=np.int32) for g in qgrams if (lista := self._postings.get(g))]
+        if not listas:
+            return []
+        conteo = np.bincount(np.concatenate(listas))
+        ids = np.flatnonzero(conteo >= minimo)
+        if clasificador_id is not None:
+            clasificadores = np.array(self._clasificador, dtype=np.int32)
+            ids = ids[clasificadores[ids] == clasificador_id]
+        if not ids.size:
+            return []
+
+        # Cobertura de la consulta + similitud (penaliza nombres mucho más largos)
+        comunes = conteo[ids]
+        propios = np.array(self._num_trigramas, dtype=np.int32)[ids]
+        base = comunes / n + comunes / (n + propios - comunes)
+        if ids.size > self.max_candidatos:
+            mejores = np.argpartition(-base, self.max_candidatos)[: self.max_candidatos]
+            ids, base = ids[mejores], base[mejores]
+
+        # Bonos por prefijo solo para los mejores candidatos
+        resultados = []
+        for id_, puntaje in zip(ids.tolist(), base.tolist()):
+            normalizado = self._normalizados[id_]
+            if normalizado.startswith(normalizada):
+                puntaje += 1.0
+            elif (" " + normalizada) in normalizado:
+                puntaje += 0.5
+            resultados.append((puntaje, -len(normalizado), -id_, id_))
+
+        top = heapq.nlargest(limite, resultados)
+        return [
+            {
+                "id": id_,
+                "nombre": self._nombres[id_],
+                "clasificador_id": None if self._clasificador[id_] == -1 else self._clasificador[id_],
+                "puntaje": round(puntaje, 4),
+            }
+            for puntaje, _, _, id_ in top
+        ]
+
+    def stats(self) -> dict:
+        return {"version": self.version, "articulos": len(self._nombres), "trigramas": len(self._postings)}
+
+
+# Instancia única por proceso
+indice_articulos = IndiceArticulos(
+    umbral=settings.SEARCH_MIN_MATCH,
+    max_candidatos=settings.SEARCH_MAX_CANDIDATES,
+)
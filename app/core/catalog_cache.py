@@ -0,0 +1,119 @@
+import threading
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import Articulo, Clasificador, Departamento, Proveedor, UnidadNegocio
+
+# Catálogos pequeños que se cargan completos como {id: nombre}
+TABLAS_NOMBRE = (Departamento, Clasificador, UnidadNegocio, Proveedor)
+
+
+class CatalogCache:
+    """
+    Caché en proceso de los catálogos que usan las rutas de escritura para
+    validar IDs y resolver nombres sin ir a la base en cada petición.
+
+    - Departamento, Clasificador, UnidadNegocio y Proveedor se guardan como un
+      mapa {id: nombre} completo por tabla, con TTL.
+    - Artículo se guarda por id (id → clasificador_id) en un LRU acotado, y los
+      faltantes se piden en una sola consulta `IN`.
+
+    Cada invalidación incrementa `version`; una carga que empezó con una
+    versión anterior no se guarda, para no reinstalar datos viejos.
+    """
+
+    def __init__(self, ttl: float, articulos_max: int):
+        self.version = 0
+        self._tablas = TTLCache(maxsize=len(TABLAS_NOMBRE), ttl=ttl)
+        self._articulos = TTLCache(maxsize=articulos_max, ttl=ttl)
+        self._lock = threading.Lock()
+
+    # ---- Catálogos id → nombre ----
+    def nombres(self, db: Session, modelo, recargar: bool = False) -> dict[int, str]:
+        mapa = None if recargar else self._tablas.get(modelo)
+        if mapa is None:
+            version = self.version
+            mapa = dict(db.query(modelo.id, modelo.nombre).all())
+            with self._lock:
+                if version == self.version:
+                    self._tablas.set(modelo, mapa)
+        return mapa
+
+    def nombre(self, db: Session, modelo, id_: int) -> Optional[str]:
+        """
+        Nombre del registro, o None si no existe. Un id que no está en el mapa
+        (p. ej. creado en otro proceso después de la última carga) se busca solo
+        por llave primaria y, si existe, se agrega al mapa; un id inválido
+        cuesta una consulta por índice, no la recarga de la tabla.
+        """
+        version = self.version
+        mapa = self.nombres(db, modelo)
+        if id_ in mapa:
+            return mapa[id_]
+        nombre = db.query(modelo.nombre).filter(modelo.id == id_).scalar()
+        if nombre is not None:
+            with self._lock:
+                if version == self.version:
+                    # Copia: otros hilos pueden estar recorriendo el mapa actual
+                    self._tablas.set(modelo, {**mapa, id_: nombre})
+        return nombre
+
+    def existe(self, db: Session, modelo, id_: int) -> bool:
+        return self.nombre(db, modelo, id_) is not None
+
+    # ---- Artículos id → clasificador ----
+    def articulos_clasificador(self, db: Session, ids: Iterable[int]) -> dict[int, Optional[int]]:
+        """Devuelve {articulo_id: clasificador_id} solo para los artículos que existen."""
+        encontrados: dict[int, Optional[int]] = {}
+        faltantes = []
+        for aid in set(ids):
+            entry = self._articulos.get(aid)
+            if entry is None:
+                faltantes.append(aid)
+            else:
+                encontrados[aid] = entry[0]
+
+        if faltantes:
+            version = self.version
+            rows = db.query(Articulo.id, Articulo.clasificador_id).filter(Articulo.id.in_(faltantes)).all()
+            with self._lock:
+                vigente = version == self.version
+            for aid, clas_id in rows:
+                encontrados[aid] = clas_id
+                if vigente:
+                    # Se envuelve en tupla para distinguir "sin clasificador" de "no está en caché"
+                    self._articulos.set(aid, (clas_id,))
+        return encontrados
+
+    # ---- Invalidación ----
+    def invalidar(self, modelo=None, id_: Optional[int] = None) -> None:
+        """Invalida una tabla (o un solo artículo si se da `id_`); sin argumentos, todo."""
+        with self._lock:
+            self.version += 1
+            if modelo is None:
+                self._tablas.clear()
+                self._articulos.clear()
+            elif modelo is Articulo:
+                if id_ is None:
+                    self._articulos.clear()
+                else:
+                    self._articulos.pop(id_)
+            else:
+                self._tablas.pop(modelo)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "tablas": self._tablas.stats(),
+            "articulos": self._articulos.stats(),
+        }
+
+
+# Instancia única por proceso
+catalogos = CatalogCache(
+    ttl=settings.CATALOG_CACHE_TTL,
+    articulos_max=settings.CATALOG_CACHE_ARTICULOS,
+)
@@ -0,0 +1,167 @@
+import itertools
+import math
+from typing import Optional
+
+import numpy as np
+
+
+class MatrizPrecios:
+    """
+    Matriz densa artículo × proveedor con los precios unitarios de una
+    cotización (NaN donde el proveedor no cotizó). Todo el análisis se hace
+    con operaciones vectorizadas de NumPy.
+    """
+
+    def __init__(self, articulos: np.ndarray, proveedores: np.ndarray, cantidades: np.ndarray, precios: np.ndarray):
+        self.articulos = articulos      # (A,) ids ordenados
+        self.proveedores = proveedores  # (P,) ids ordenados
+        self.cantidades = cantidades    # (A,)
+        self.precios = precios          # (A, P)
+
+    @classmethod
+    def desde_filas(cls, req_items: list, proveedores: list, cotizados: list) -> "MatrizPrecios":
+        """
+        - req_items: [(articulo_id, cantidad)] del requerimiento
+        - proveedores: [proveedor_id] invitados a la cotización
+        - cotizados: [(proveedor_id, articulo_id, precio_unit)]
+        """
+        req = np.array(req_items, dtype=np.float64).reshape(-1, 2)
+        orden = np.argsort(req[:, 0], kind="stable")
+        articulos = req[orden, 0].astype(np.int64)
+        cantidades = req[orden, 1]
+        provs = np.unique(np.array(proveedores, dtype=np.int64))
+
+        precios = np.full((len(articulos), len(provs)), np.nan)
+        filas = np.array(cotizados, dtype=np.float64).reshape(-1, 3)
+        if len(filas) and len(articulos) and len(provs):
+            pid = filas[:, 0].astype(np.int64)
+            aid = filas[:, 1].astype(np.int64)
+            i = np.searchsorted(articulos, aid).clip(max=len(articulos) - 1)
+            j = np.searchsorted(provs, pid).clip(max=len(provs) - 1)
+            # Se descartan precios de artículos/proveedores que no pertenecen a la cotización
+            validos = (articulos[i] == aid) & (provs[j] == pid)
+            precios[i[validos], j[validos]] = filas[validos, 2]
+        return cls(articulos, provs, cantidades, precios)
+
+    # ---- Análisis ----
+    def _mejor(self, activos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Mejor precio y columna ganadora por artículo, considerando solo proveedores activos."""
+        llenos = np.where(np.isnan(self.precios) | ~activos[None, :], np.inf, self.precios)
+        col = llenos.argmin(axis=1) if llenos.shape[1] else np.zeros(len(llenos), dtype=np.int64)
+        mejor = llenos[np.arange(len(llenos)), col] if llenos.shape[1] else np.full(len(llenos), np.inf)
+        return mejor, col
+
+    def adjudicar(
+        self, max_proveedores: Optional[int] = None, max_combinaciones: int = 20000
+    ) -> tuple[np.ndarray, bool]:
+        """
+        Proveedores activos para la adjudicación y si se usó la heurística. Sin
+        límite son todos (el más barato gana cada línea). Con límite se busca
+        la combinación de `max_proveedores` que deja menos líneas sin cubrir y,
+        entre ellas, el menor total: exacta si hay a lo más `max_combinaciones`
+        combinaciones; si no, eliminación voraz (no garantiza el óptimo).
+        """
+        cotizo = ~np.isnan(self.precios)
+        activos = cotizo.any(axis=0)
+        if max_proveedores is None or activos.sum() <= max_proveedores:
+            return activos, False
+
+        candidatos = np.flatnonzero(activos)
+        if math.comb(len(candidatos), max_proveedores) <= max_combinaciones:
+            return self._adjudicar_exacta(candidatos, max_proveedores), False
+        return self._adjudicar_voraz(activos, max_proveedores), True
+
+    def _adjudicar_exacta(self, candidatos: np.ndarray, k: int) -> np.ndarray:
+        """Evalúa todas las combinaciones de `k` proveedores, por bloques de combinaciones."""
+        # Basta con combinaciones de exactamente k: agregar proveedores nunca encarece
+        llenos = np.where(np.isnan(self.precios), np.inf, self.precios)[:, candidatos]
+        bloque = max(1, min(1024, 1_000_000 // max(len(llenos), 1)))  # ~8 MB por matriz (A, C)
+        combos = itertools.combinations(range(len(candidatos)), k)
+        mejor_clave, mejor_combo = None, None
+        while lote := list(itertools.islice(combos, bloque)):
+            idx = np.array(lote)                  # (C, k)
+            precio = llenos[:, idx[:, 0]]         # (A, C) mejor precio de cada combinación
+            for j in range(1, k):
+                np.minimum(precio, llenos[:, idx[:, j]], out=precio)
+            cubierta = np.isfinite(precio)
+            sin_cubrir = (~cubierta).sum(axis=0)
+            total = np.where(cubierta, precio * self.cantidades[:, None], 0.0).sum(axis=0)
+            i = np.lexsort((total, sin_cubrir))[0]
+            clave = (sin_cubrir[i], total[i])
+            if mejor_clave is None or clave < mejor_clave:
+                mejor_clave, mejor_combo = clave, idx[i]
+        activos = np.zeros(len(self.proveedores), dtype=bool)
+        activos[candidatos[mejor_combo]] = True
+        return activos
+
+    def _adjudicar_voraz(self, activos: np.ndarray, max_proveedores: int) -> np.ndarray:
+        """
+        Se eliminan uno a uno los proveedores cuya salida cuesta menos: primero
+        los que no dejan líneas sin cubrir, y entre ellos el que menos encarece
+        el total.
+        """
+        llenos = np.where(np.isnan(self.precios), np.inf, self.precios)
+        activos = activos.copy()
+        while activos.sum() > max_proveedores:
+            m = np.where(activos[None, :], llenos, np.inf)
+            col = m.argmin(axis=1)
+            mejor = m[np.arange(len(m)), col]
+            if m.shape[1] > 1:
+                segundo = np.partition(m, 1, axis=1)[:, 1]
+            else:
+                segundo = np.full(len(m), np.inf)
+
+            gana = np.isfinite(mejor)
+            pierde = gana & ~np.isfinite(segundo)
+            delta = np.where(gana & np.isfinite(segundo), (segundo - mejor) * self.cantidades, 0.0)
+
+            n = m.shape[1]
+            lineas_perdidas = np.bincount(col[pierde], minlength=n).astype(np.float64)
+            sobrecosto = np.bincount(col[gana], weights=delta[gana], minlength=n)
+            lineas_perdidas[~activos] = np.inf
+            sobrecosto[~activos] = np.inf
+            # Orden lexicográfico: menos líneas sin cubrir, luego menor sobrecosto
+            quitar = np.lexsort((sobrecosto, lineas_perdidas))[0]
+            activos[quitar] = False
+        return activos
+
+    def analizar(self, max_proveedores: Optional[int] = None, max_combinaciones: int = 20000) -> dict:
+        cotizo = ~np.isnan(self.precios)
+        importes = self.precios * self.cantidades[:, None]
+
+        todos = np.ones(len(self.proveedores), dtype=bool)
+        mejor, col = self._mejor(todos)
+        cubierto = np.isfinite(mejor)
+
+        activos, heuristica = self.adjudicar(max_proveedores, max_combinaciones)
+        adj_precio, adj_col = self._mejor(activos)
+        adj_cubierto = np.isfinite(adj_precio)
+        # Proveedor ganador por línea (solo tiene sentido donde la línea quedó cubierta)
+        ganador = self.proveedores[col[cubierto]]
+        adj_ganador = self.proveedores[adj_col[adj_cubierto]]
+        mejor_proveedor = np.full(len(self.articulos), None, dtype=object)
+        mejor_proveedor[cubierto] = ganador
+
+        return {
+            "articulos": self.articulos.tolist(),
+            "proveedores": self.proveedores.tolist(),
+            "cantidades": self.cantidades.astype(np.int64).tolist(),
+            "precios": np.where(cotizo, self.precios, None).tolist(),
+            "mejor_precio": np.where(cubierto, mejor, None).tolist(),
+            "mejor_proveedor": mejor_proveedor.tolist(),
+            "totales_proveedor": np.nansum(importes, axis=0).tolist(),
+            "articulos_cotizados": cotizo.sum(axis=0).tolist(),
+            "articulos_faltantes": (~cotizo).sum(axis=0).tolist(),
+            "sin_cotizar": self.articulos[~cubierto].tolist(),
+            "adjudicacion": {
+                "max_proveedores": max_proveedores,
+                "heuristica": heuristica,
+                "proveedores": np.unique(adj_ganador).tolist(),
+                "total": float((adj_precio[adj_cubierto] * self.cantidades[adj_cubierto]).sum()),
+                "seleccion": [
+                    {"articulo_id": a, "proveedor_id": p}
+                    for a, p in zip(self.articulos[adj_cubierto].tolist(), adj_ganador.tolist())
+                ],
+                "sin_cubrir": self.articulos[~adj_cubierto].tolist(),
+            },
+        }
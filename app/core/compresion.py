@@ -0,0 +1,83 @@
+import anyio.to_thread
+import brotli
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+# ---------------------------------------------------------
+# 🗜️ COMPRESIÓN DE RESPUESTAS (Brotli / GZip)
+# ---------------------------------------------------------
+# Se elige la codificación según Accept-Encoding: Brotli si el cliente la
+# acepta (comprime más el JSON a igual costo), si no GZip. Las respuestas
+# chicas y los tipos ya comprimidos (p. ej. exportaciones .gz) salen tal cual.
+
+# Cuerpos desde este tamaño se comprimen en un hilo para no bloquear el event loop
+_EN_HILO = 128 * 1024
+
+
+def _aceptadas(accept_encoding: str) -> set[str]:
+    """Codificaciones aceptadas por el cliente (descarta las de q=0)."""
+    aceptadas = set()
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, params = parte.partition(";")
+        q = params.strip().removeprefix("q=")
+        if q and q.replace(".", "").strip("0") == "":
+            continue
+        aceptadas.add(nombre.strip())
+    return aceptadas
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, calidad: int, exclude_content_types: tuple[str, ...]):
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.calidad = calidad
+        self._compresor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= _EN_HILO:
+            return await anyio.to_thread.run_sync(self._comprimir, body, more_body)
+        return self._comprimir(body, more_body)
+
+    def _comprimir(self, body: bytes, more_body: bool) -> bytes:
+        if self._compresor is None:
+            self._compresor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=self.calidad)
+        salida = self._compresor.process(body)
+        # En streaming se vacía cada bloque para que el cliente lo reciba de inmediato
+        return salida + (self._compresor.flush() if more_body else self._compresor.finish())
+
+
+class CompresionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimo: int = 1024,
+        nivel_gzip: int = 6,
+        calidad_brotli: int = 4,
+        usar_brotli: bool = True,
+        excluir: tuple[str, ...] = DEFAULT_EXCLUDED_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.calidad_brotli = calidad_brotli
+        self.usar_brotli = usar_brotli
+        self.excluir = excluir
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        aceptadas = _aceptadas(Headers(scope=scope).get("accept-encoding", ""))
+        if self.usar_brotli and "br" in aceptadas:
+            responder = BrotliResponder(self.app, self.minimo, self.calidad_brotli, self.excluir)
+        elif "gzip" in aceptadas:
+            responder = GZipResponder(
+                self.app, self.minimo, compresslevel=self.nivel_gzip, exclude_content_types=self.excluir
+            )
+        else:
+            responder = IdentityResponder(self.app, self.minimo, exclude_content_types=self.excluir)
+        await responder(scope, receive, send)
@@ -12,6 +12,101 @@ class Settings:
     APP_NAME: str = os.getenv("APP_NAME", "Compras API")
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
 
+    # Pool de conexiones. Por defecto la vigencia de las conexiones se controla
+    # reciclándolas (DB_POOL_RECYCLE segundos, debe ser menor al wait_timeout de
+    # MySQL) en lugar de hacer un ping antes de cada checkout.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+
+    # Carga masiva de precios de cotización (máximo de líneas por petición y tamaño de bloque)
+    PRICE_UPLOAD_MAX_LINES: int = int(os.getenv("PRICE_UPLOAD_MAX_LINES", "50000"))
+    BULK_CHUNK_SIZE: int = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+    # Adjudicación con max_proveedores: búsqueda exacta hasta este número de
+    # combinaciones de proveedores; arriba se usa la heurística voraz
+    ADJUDICACION_MAX_COMBINACIONES: int = int(os.getenv("ADJUDICACION_MAX_COMBINACIONES", "20000"))
+
+    # Importación masiva de catálogos (registros por archivo y errores reportados)
+    IMPORT_MAX_LINES: int = int(os.getenv("IMPORT_MAX_LINES", "200000"))
+    IMPORT_MAX_ERRORS: int = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+    # Exportaciones en streaming (filas por lote del cursor y nivel de gzip)
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+    EXPORT_GZIP_LEVEL: int = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+    # Compresión de respuestas HTTP (tamaño mínimo en bytes, nivel gzip 1-9, calidad brotli 0-11)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI: bool = os.getenv("COMPRESSION_BROTLI", "true").lower() == "true"
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # El esquema se administra con Alembic (`alembic upgrade head`); create_all al
+    # arrancar solo para desarrollo local con una base desechable
+    DB_CREATE_ALL: bool = os.getenv("DB_CREATE_ALL", "false").lower() == "true"
+
+    # Máximo de registros por cambio de estatus en lote
+    LOTE_MAX_IDS: int = int(os.getenv("LOTE_MAX_IDS", "1000"))
+
+    # Si es true, no se aprueban requerimientos ni OCs sin presupuesto para su clave y período
+    PRESUPUESTO_OBLIGATORIO: bool = os.getenv("PRESUPUESTO_OBLIGATORIO", "false").lower() == "true"
+
+    # Segundos que se reutiliza el resultado de /health/ready antes de volver a consultar la base
+    HEALTH_CHECK_INTERVAL: float = float(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+
+    # Instrumentación: latencia por ruta y consultas por petición; se registran
+    # las consultas desde SLOW_QUERY_MS y las sentencias repetidas más de
+    # N_PLUS_ONE_THRESHOLD veces en una petición. `?profile=1` devuelve el perfil
+    # por muestreo de la petición solo con PROFILING_ENABLED (no en producción)
+    INSTRUMENTATION_ENABLED: bool = os.getenv("INSTRUMENTATION_ENABLED", "true").lower() == "true"
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "500"))
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+
+    # Entradas del caché de SQL compilado por engine (SQLAlchemy usa 500 por defecto)
+    DB_QUERY_CACHE_SIZE: int = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
+    # Pila async opcional: rutas de lectura frecuentes con AsyncEngine
+    # (aiomysql / aiosqlite). Si no se da ASYNC_DATABASE_URL se deriva de DATABASE_URL.
+    DB_ASYNC: bool = os.getenv("DB_ASYNC", "false").lower() == "true"
+    ASYNC_DATABASE_URL: str | None = os.getenv("ASYNC_DATABASE_URL")
+
+    # Paginación de listados (tamaño por defecto y tope máximo de `limit`)
+    PAGE_SIZE: int = int(os.getenv("PAGE_SIZE", "50"))
+    PAGE_SIZE_MAX: int = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+    # Caché de catálogos en proceso (segundos de vigencia y tope de artículos)
+    CATALOG_CACHE_TTL: float = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+    CATALOG_CACHE_ARTICULOS: int = int(os.getenv("CATALOG_CACHE_ARTICULOS", "50000"))
+
+    # Búsqueda de artículos: fracción mínima de trigramas de la consulta que debe
+    # tener un resultado, candidatos calificados por búsqueda y margen de ids
+    # que se releen al sincronizar el índice
+    SEARCH_MIN_MATCH: float = float(os.getenv("SEARCH_MIN_MATCH", "0.5"))
+    SEARCH_MAX_CANDIDATES: int = int(os.getenv("SEARCH_MAX_CANDIDATES", "1000"))
+    SEARCH_CATCHUP_MARGIN: int = int(os.getenv("SEARCH_CATCHUP_MARGIN", "1000"))
+    # Construir el índice al arrancar (en un hilo) en lugar de en la primera búsqueda
+    SEARCH_WARMUP: bool = os.getenv("SEARCH_WARMUP", "false").lower() == "true"
+
+    # Caché de permisos por usuario (TTL corto y número máximo de usuarios)
+    PERMISSION_CACHE_TTL: float = float(os.getenv("PERMISSION_CACHE_TTL", "30"))
+    PERMISSION_CACHE_SIZE: int = int(os.getenv("PERMISSION_CACHE_SIZE", "10000"))
+
+    # Tokens JWT: verificador ("jose" o "hs256", ver app/core/security.py) y caché
+    # de tokens verificados (máximo de tokens y segundos que se reutiliza uno,
+    # siempre acotado por su exp)
+    JWT_VERIFIER: str = os.getenv("JWT_VERIFIER", "hs256")
+    JWT_CACHE_SIZE: int = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+    JWT_CACHE_TTL: float = float(os.getenv("JWT_CACHE_TTL", "300"))
+
+    # Caché HTTP: segundos que un proceso reutiliza la versión de una tabla
+    # sin consultarla (escrituras en otros procesos tardan a lo más esto en
+    # reflejarse en el ETag) y max-age de Cache-Control
+    ETAG_VERSION_TTL: float = float(os.getenv("ETAG_VERSION_TTL", "2"))
+    HTTP_CACHE_MAX_AGE: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+
 # Instancia única de configuración
 settings = Settings()
-
@@ -0,0 +1,142 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import VersionTabla
+from app.db.session import get_db
+
+
+# ---------------------------------------------------------
+# 🏷️ GET CONDICIONAL (ETag / If-None-Match)
+# ---------------------------------------------------------
+# Los catálogos llevan un ETag armado con la versión de sus tablas
+# (`version_tabla`, +1 en cada escritura) y los detalles con la columna
+# `version` de su fila. Si el cliente manda el mismo ETag en If-None-Match se
+# responde 304 sin cuerpo. Solo se compara If-None-Match: Last-Modified va
+# con resolución de segundos y dos escrituras en el mismo segundo lo dejarían igual.
+
+# Llave en `Session.info` con las tablas incrementadas en la transacción
+_PENDIENTES = "versiones_pendientes"
+
+
+class VersionesTablas:
+    """
+    Versión de cada tabla, cacheada en proceso por unos segundos para que
+    revalidar un catálogo no consulte la base. Las escrituras de este proceso
+    se ven de inmediato (se invalida al hacer commit); las de otros procesos,
+    a lo más en `ttl` segundos.
+    """
+
+    def __init__(self, ttl: float):
+        self._cache = TTLCache(maxsize=256, ttl=ttl)
+
+    def incrementar(self, db: Session, *modelos) -> None:
+        """Incrementa la versión de las tablas de `modelos` dentro de la transacción actual."""
+        ahora = datetime.now(timezone.utc)
+        for modelo in modelos:
+            tabla = modelo.__tablename__
+            resultado = db.execute(
+                update(VersionTabla)
+                .where(VersionTabla.tabla == tabla)
+                .values(version=VersionTabla.version + 1, fecha_actualizacion=ahora)
+            )
+            if resultado.rowcount == 0:
+                # Bases creadas con create_all no traen las filas iniciales de la migración
+                db.execute(insert(VersionTabla).values(tabla=tabla, version=1, fecha_actualizacion=ahora))
+            db.info.setdefault(_PENDIENTES, set()).add(tabla)
+
+    def version(self, db: Session, tabla: str) -> tuple[int, Optional[datetime]]:
+        entry = self._cache.get(tabla)
+        if entry is None:
+            row = db.execute(
+                select(VersionTabla.version, VersionTabla.fecha_actualizacion).where(VersionTabla.tabla == tabla)
+            ).first()
+            entry = (row.version, row.fecha_actualizacion) if row else (0, None)
+            self._cache.set(tabla, entry)
+        return entry
+
+    def olvidar(self, tablas) -> None:
+        for tabla in tablas:
+            self._cache.pop(tabla)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+# Instancia única por proceso
+versiones = VersionesTablas(ttl=settings.ETAG_VERSION_TTL)
+
+
+@event.listens_for(Session, "after_commit")
+def _olvidar_versiones(session: Session) -> None:
+    tablas = session.info.pop(_PENDIENTES, None)
+    if tablas:
+        versiones.olvidar(tablas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_versiones(session: Session) -> None:
+    session.info.pop(_PENDIENTES, None)
+
+
+# ---- Respuestas condicionales ----
+def _coincide(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (ignora el prefijo W/)."""
+    if if_none_match.strip() == "*":
+        return True
+    propio = etag.removeprefix("W/")
+    return any(e.strip().removeprefix("W/") == propio for e in if_none_match.split(","))
+
+
+def condicional(request: Request, response: Response, etag: str, modificado: Optional[datetime] = None) -> None:
+    """
+    Pone ETag, Last-Modified y Cache-Control en la respuesta, o lanza 304 si
+    el cliente ya tiene esa versión.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate",
+    }
+    if modificado is not None:
+        if modificado.tzinfo is None:
+            modificado = modificado.replace(tzinfo=timezone.utc)  # la base guarda UTC sin zona
+        headers["Last-Modified"] = format_datetime(modificado.astimezone(timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _coincide(if_none_match, etag):
+        raise HTTPException(304, headers=headers)
+    response.headers.update(headers)
+
+
+def etag_fila(modelo, id_: int, version: int) -> str:
+    return f'W/"{modelo.__tablename__}.{id_}.{version}"'
+
+
+def cache_catalogo(*modelos):
+    """
+    Dependencia para listados de catálogo: el ETag sale de las versiones de
+    las tablas de `modelos` más los parámetros de la consulta (filtros y página).
+    """
+    tablas = [m.__tablename__ for m in modelos]
+
+    def verificar(request: Request, response: Response, db: Session = Depends(get_db)) -> None:
+        partes, modificado = [], None
+        for tabla in tablas:
+            version, fecha = versiones.version(db, tabla)
+            # La fecha distingue una tabla recreada (versión reiniciada) de la anterior
+            partes.append(f"{tabla}.{version}.{int(fecha.timestamp()) if fecha else 0}")
+            if fecha is not None and (modificado is None or fecha > modificado):
+                modificado = fecha
+        if request.query_params:
+            consulta = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+            partes.append(hashlib.blake2b(consulta.encode(), digest_size=6).hexdigest())
+        condicional(request, response, f'W/"{"-".join(partes)}"', modificado)
+
+    return Depends(verificar)
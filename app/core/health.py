@@ -0,0 +1,81 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine, pool_status
+
+# Consulta de versión según el motor
+_VERSION_SQL = {
+    "mysql": "SELECT VERSION()",
+    "postgresql": "SELECT version()",
+    "sqlite": "SELECT sqlite_version()",
+}
+
+
+class ReadinessProbe:
+    """
+    Resultado cacheado de la verificación de base de datos.
+
+    La consulta real se hace como máximo una vez por `intervalo` segundos; al
+    vencer, la siguiente lectura devuelve el último resultado y dispara la
+    actualización en un hilo aparte, así los probes nunca esperan a la base.
+    """
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._estado: dict | None = None
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _verificar(self) -> None:
+        inicio = time.perf_counter()
+        try:
+            sql = _VERSION_SQL.get(engine.dialect.name, "SELECT 1")
+            with engine.connect() as conn:
+                version = conn.execute(text(sql)).scalar()
+            estado = {"database": "connected", "mysql_version": version}
+        except Exception as e:
+            estado = {"database": f"error: {str(e)}", "mysql_version": None}
+        estado["latency_ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+        estado["checked_at"] = datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            self._estado = estado
+            self._checked_at = time.monotonic()
+            self._refreshing = False
+
+    def estado(self) -> dict:
+        with self._lock:
+            estado = self._estado
+            vencido = time.monotonic() - self._checked_at > self.intervalo
+            lanzar = estado is not None and vencido and not self._refreshing
+            if lanzar:
+                self._refreshing = True
+
+        if estado is None:
+            # Primera llamada del proceso: no hay resultado previo que devolver
+            self._verificar()
+            return self._estado
+        if lanzar:
+            threading.Thread(target=self._verificar, name="readiness-probe", daemon=True).start()
+        return estado
+
+
+def pool_saturation() -> dict:
+    """Uso del pool sync como fracción de su capacidad máxima (size + overflow)."""
+    pool = pool_status()["sync"]
+    capacidad = pool.get("size", 0) + pool.get("max_overflow", 0)
+    return {
+        "checked_out": pool.get("checked_out"),
+        "capacity": capacidad or None,
+        "saturation": round(pool["checked_out"] / capacidad, 3) if capacidad else None,
+        "timeouts": pool["timeouts"],
+    }
+
+
+# Instancia única por proceso
+readiness = ReadinessProbe(intervalo=settings.HEALTH_CHECK_INTERVAL)
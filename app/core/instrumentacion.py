@@ -0,0 +1,310 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metricas import metricas, percentil
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------
+# 📏 INSTRUMENTACIÓN DE PETICIONES
+# ---------------------------------------------------------
+# Un middleware ASGI mide cada petición y abre un registro (`Peticion`) en un
+# ContextVar; los eventos de cursor de SQLAlchemy suman ahí las consultas y el
+# tiempo en base. El ContextVar llega a los endpoints sync (anyio copia el
+# contexto al threadpool) y a los async (SQLAlchemy lo pasa a sus greenlets).
+
+class Peticion:
+    """Consultas de la petición en curso."""
+
+    __slots__ = ("metodo", "path", "consultas", "tiempo_db", "sentencias")
+
+    def __init__(self, metodo: str, path: str):
+        self.metodo = metodo
+        self.path = path
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.sentencias: Counter[str] = Counter()
+
+    def repetidas(self) -> list[tuple[str, int]]:
+        """Sentencias ejecutadas más de N_PLUS_ONE_THRESHOLD veces (patrón N+1)."""
+        return [(s, n) for s, n in self.sentencias.items() if n > settings.N_PLUS_ONE_THRESHOLD]
+
+
+_peticion: ContextVar[Optional[Peticion]] = ContextVar("peticion", default=None)
+
+
+# Por ruta: etiquetas (router, method, route); el router es el tag de la ruta
+peticiones_http = metricas.contador(
+    "http_requests_total", "Peticiones HTTP atendidas", ("router", "method", "route", "status")
+)
+latencia_http = metricas.histograma(
+    "http_request_duration_seconds", "Duración de las peticiones HTTP", ("router", "method", "route")
+)
+consultas_peticion = metricas.histograma(
+    "db_queries_per_request", "Consultas SQL por petición", ("router", "method", "route"),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+tiempo_db = metricas.contador("db_query_seconds_total", "Tiempo en base de las peticiones", ("router", "method", "route"))
+peticiones_n_mas_uno = metricas.contador(
+    "db_n_plus_one_requests_total", "Peticiones con una sentencia repetida más de N_PLUS_ONE_THRESHOLD veces",
+    ("router", "method", "route"),
+)
+consultas_lentas = metricas.contador("db_slow_queries_total", "Consultas que tardaron SLOW_QUERY_MS o más")
+
+
+def _ms(segundos: Optional[float]) -> Optional[float]:
+    return None if segundos is None else round(segundos * 1000, 2)
+
+
+def _recortar(sql: str, largo: int = 500) -> str:
+    sql = " ".join(sql.split())
+    return sql if len(sql) <= largo else sql[:largo] + "…"
+
+
+class Instrumentacion:
+    """
+    Registra cada petición en las métricas (ver app/core/metricas.py) y
+    guarda las últimas consultas lentas y N+1 para /internal/instrumentacion.
+    """
+
+    def __init__(self, recientes: int = 50):
+        self.lentas: deque[dict] = deque(maxlen=recientes)
+        self.n_mas_uno: deque[dict] = deque(maxlen=recientes)
+
+    def registrar(self, router: str, metodo: str, ruta: str, status: int, duracion: float, peticion: Peticion) -> None:
+        peticiones_http.inc(router, metodo, ruta, str(status))
+        latencia_http.observar(duracion, router, metodo, ruta)
+        consultas_peticion.observar(peticion.consultas, router, metodo, ruta)
+        if peticion.tiempo_db:
+            tiempo_db.inc(router, metodo, ruta, n=peticion.tiempo_db)
+        repetidas = peticion.repetidas()
+        if repetidas:
+            peticiones_n_mas_uno.inc(router, metodo, ruta)
+        for sql, veces in repetidas:
+            logger.warning("Posible N+1 en %s %s: %d ejecuciones de %s", metodo, ruta, veces, _recortar(sql, 200))
+            self.n_mas_uno.append(
+                {"ruta": f"{metodo} {ruta}", "veces": veces, "sql": _recortar(sql), "fecha": _ahora()}
+            )
+
+    def consulta_lenta(self, sql: str, duracion: float, peticion: Optional[Peticion]) -> None:
+        consultas_lentas.inc()
+        origen = f"{peticion.metodo} {peticion.path}" if peticion else "(fuera de una petición)"
+        logger.warning("Consulta lenta (%.1f ms) en %s: %s", duracion * 1000, origen, _recortar(sql, 200))
+        self.lentas.append({"ms": round(duracion * 1000, 2), "origen": origen, "sql": _recortar(sql), "fecha": _ahora()})
+
+    def snapshot(self) -> dict:
+        leidos = metricas.leer()
+        errores: Counter = Counter()
+        for (nombre, etiquetas), v in leidos.items():
+            if nombre == peticiones_http.nombre and etiquetas[3].startswith("5"):
+                errores[etiquetas[:3]] += v
+        rutas: dict[str, dict] = {}
+        for (router, metodo, ruta), cuentas in sorted(latencia_http.cuentas(leidos).items(), key=lambda x: x[0][2]):
+            n = sum(cuentas[:-1])
+            por_consultas = consultas_peticion.cuentas(leidos).get((router, metodo, ruta))
+            rutas[f"{metodo} {ruta}"] = {
+                "router": router,
+                "peticiones": n,
+                "errores": errores.get((router, metodo, ruta), 0),
+                "latencia_ms": {
+                    "promedio": round(cuentas[-1] / n * 1000, 2),
+                    "p50": _ms(percentil(latencia_http.buckets, cuentas, 0.5)),
+                    "p95": _ms(percentil(latencia_http.buckets, cuentas, 0.95)),
+                    "p99": _ms(percentil(latencia_http.buckets, cuentas, 0.99)),
+                },
+                "consultas_promedio": round(por_consultas[-1] / n, 2),
+                "consultas_p95": percentil(consultas_peticion.buckets, por_consultas, 0.95),
+                "db_ms_promedio": round(leidos.get((tiempo_db.nombre, (router, metodo, ruta)), 0) / n * 1000, 2),
+                "n_mas_uno": leidos.get((peticiones_n_mas_uno.nombre, (router, metodo, ruta)), 0),
+            }
+        return {
+            "rutas": rutas,
+            "consultas_lentas": list(self.lentas),
+            "n_mas_uno": list(self.n_mas_uno),
+        }
+
+
+def _ahora() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# Instancia única por proceso
+instrumentacion = Instrumentacion()
+
+
+# ---- Eventos de SQLAlchemy ----
+def instrumentar_consultas(engine) -> None:
+    """Cuenta consultas y tiempo en base por petición y registra las lentas (SLOW_QUERY_MS)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _inicio(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _fin(conn, cursor, statement, parameters, context, executemany):
+        duracion = time.perf_counter() - conn.info["inicio_consulta"].pop()
+        peticion = _peticion.get()
+        if peticion is not None:
+            peticion.consultas += 1
+            peticion.tiempo_db += duracion
+            peticion.sentencias[statement] += 1
+        if duracion * 1000 >= settings.SLOW_QUERY_MS:
+            instrumentacion.consulta_lenta(statement, duracion, peticion)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        # La consulta falló: no habrá after_cursor_execute que saque su inicio
+        if contexto.connection is not None:
+            inicios = contexto.connection.info.get("inicio_consulta")
+            if inicios:
+                inicios.pop()
+
+
+# ---------------------------------------------------------
+# 🔬 PERFIL DE UNA PETICIÓN (?profile=1)
+# ---------------------------------------------------------
+# Los endpoints sync corren en hilos del threadpool, fuera del alcance de
+# cProfile (que solo ve el hilo donde se activa). Por eso el perfil es por
+# muestreo: un hilo toma la pila de los demás cada PROFILE_INTERVAL_MS y se
+# quedan las que pasan por código de `app`. Con otras peticiones en curso
+# en el mismo proceso sus muestras se mezclan: usar en un entorno sin carga.
+
+_DIR_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_RAIZ = os.path.dirname(_DIR_APP.rstrip(os.sep)) + os.sep
+
+
+def _archivo(ruta: str) -> str:
+    """Ruta corta para el reporte: relativa al proyecto o al site-packages."""
+    if ruta.startswith(_RAIZ):
+        return ruta.removeprefix(_RAIZ)
+    return ruta.rpartition("site-packages" + os.sep)[2]
+
+
+class Muestreador:
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.muestras = 0
+        self.propias: Counter = Counter()
+        self.acumuladas: Counter = Counter()
+        self.profundidad: dict = {}  # menor distancia a la raíz de la pila, para ordenar empates
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name="perfil", daemon=True)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._fin.set()
+        self._hilo.join()
+
+    def _muestrear(self) -> None:
+        propio = threading.get_ident()
+        while not self._fin.wait(self.intervalo):
+            for hilo, frame in sys._current_frames().items():
+                if hilo == propio:
+                    continue
+                pila = []
+                while frame is not None:
+                    pila.append(frame.f_code)
+                    frame = frame.f_back
+                if not any(c.co_filename.startswith(_DIR_APP) and c.co_filename != __file__ for c in pila):
+                    continue
+                self.muestras += 1
+                self.propias[pila[0]] += 1
+                for codigo in set(pila):
+                    self.acumuladas[codigo] += 1
+                for nivel, codigo in enumerate(reversed(pila)):
+                    if nivel < self.profundidad.get(codigo, nivel + 1):
+                        self.profundidad[codigo] = nivel
+
+    def reporte(self, limite: int = 40) -> str:
+        if not self.muestras:
+            return "Sin muestras (la petición fue más corta que el intervalo de muestreo)\n"
+        lineas = [f"{'acum %':>7} {'propio %':>8}  función", ""]
+        orden = sorted(self.acumuladas.items(), key=lambda x: (-x[1], self.profundidad[x[0]]))
+        for codigo, n in orden[:limite]:
+            lineas.append(
+                f"{n / self.muestras:7.1%} {self.propias[codigo] / self.muestras:8.1%}  "
+                f"{codigo.co_qualname}  ({_archivo(codigo.co_filename)}:{codigo.co_firstlineno})"
+            )
+        return "\n".join(lineas) + "\n"
+
+
+# ---------------------------------------------------------
+# ⏱️ MIDDLEWARE
+# ---------------------------------------------------------
+class InstrumentacionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        peticion = Peticion(scope["method"], scope["path"])
+        token = _peticion.set(peticion)
+        perfilar = settings.PROFILING_ENABLED and QueryParams(scope["query_string"]).get("profile") == "1"
+        status = 500
+
+        async def enviar(mensaje) -> None:
+            nonlocal status
+            if mensaje["type"] == "http.response.start":
+                status = mensaje["status"]
+                if perfilar:
+                    return
+                MutableHeaders(scope=mensaje).append(
+                    "Server-Timing", f'db;dur={peticion.tiempo_db * 1000:.1f};desc="{peticion.consultas} consultas"'
+                )
+            elif perfilar:
+                return  # el cuerpo se reemplaza por el reporte
+            await send(mensaje)
+
+        inicio = time.perf_counter()
+        try:
+            if perfilar:
+                with Muestreador(settings.PROFILE_INTERVAL_MS / 1000) as muestreador:
+                    await self.app(scope, receive, enviar)
+            else:
+                await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _peticion.reset(token)
+            route = scope.get("route")
+            ruta = getattr(route, "path", None) or "(sin ruta)"
+            router = (getattr(route, "tags", None) or [""])[0]
+            instrumentacion.registrar(router, scope["method"], ruta, status, duracion, peticion)
+
+        if perfilar:
+            await self._enviar_reporte(send, ruta, status, duracion, peticion, muestreador)
+
+    @staticmethod
+    async def _enviar_reporte(send: Send, ruta, status, duracion, peticion: Peticion, muestreador: Muestreador):
+        encabezado = [
+            f"{peticion.metodo} {ruta} → {status} en {duracion * 1000:.1f} ms",
+            f"{peticion.consultas} consultas, {peticion.tiempo_db * 1000:.1f} ms en base",
+            f"{muestreador.muestras} muestras cada {settings.PROFILE_INTERVAL_MS:g} ms",
+        ]
+        for sql, veces in peticion.repetidas():
+            encabezado.append(f"N+1: {veces} ejecuciones de {_recortar(sql, 200)}")
+        cuerpo = ("\n".join(encabezado) + "\n\n" + muestreador.reporte()).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(cuerpo)).encode())],
+        })
+        await send({"type": "http.response.body", "body": cuerpo})
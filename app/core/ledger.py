@@ -0,0 +1,294 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.bulk import insert_ignore_stmt
+from app.db.models import (
+    DetallePago,
+    MovimientoPresupuesto,
+    OCItem,
+    OrdenCompra,
+    Presupuesto,
+    PresupuestoSaldo,
+    ProgramacionPago,
+    Requerimiento,
+)
+
+
+# ---------------------------------------------------------
+# 📒 BITÁCORA DE CONSUMO DE PRESUPUESTO
+# ---------------------------------------------------------
+# Cada presupuesto tiene una fila en `presupuesto_saldo` con lo comprometido
+# (OCs aprobadas) y lo pagado (detalles de pago marcados como PAGADO). Las
+# transiciones de OC y pago suman sobre esa fila con UPDATE incremental y
+# dejan el movimiento en `movimiento_presupuesto`.
+
+
+def periodos_candidatos(fecha: datetime) -> list[str]:
+    """Claves de período que cubren `fecha`, de la más específica a la más general."""
+    trimestre = (fecha.month - 1) // 3 + 1
+    return [f"{fecha.year}-{fecha.month:02d}", f"{fecha.year}-Q{trimestre}", f"{fecha.year}"]
+
+
+def disponibilidad(
+    db: Session, departamento_id: int, clasificador_id: int, unidad_negocio_id: int, fecha: datetime
+):
+    """
+    Presupuesto que aplica a la combinación y fecha (mensual, luego trimestral,
+    luego anual) con su monto y lo comprometido. Es una sola consulta sobre
+    `uq_presupuesto_clave` más la fila de saldo; devuelve None si no hay presupuesto.
+    """
+    candidatos = periodos_candidatos(fecha)
+    filas = db.execute(
+        select(
+            Presupuesto.id,
+            Presupuesto.periodo,
+            Presupuesto.monto,
+            func.coalesce(PresupuestoSaldo.comprometido, 0.0).label("comprometido"),
+        )
+        .outerjoin(PresupuestoSaldo, PresupuestoSaldo.presupuesto_id == Presupuesto.id)
+        .where(
+            Presupuesto.departamento_id == departamento_id,
+            Presupuesto.clasificador_id == clasificador_id,
+            Presupuesto.unidad_negocio_id == unidad_negocio_id,
+            Presupuesto.periodo.in_(candidatos),
+        )
+    ).all()
+    por_periodo = {f.periodo: f for f in filas}
+    return next((por_periodo[c] for c in candidatos if c in por_periodo), None)
+
+
+def saldo_de(db: Session, presupuesto_id: int) -> PresupuestoSaldo:
+    """
+    Fila de saldo del presupuesto; se crea en cero si aún no existe. Dos
+    primeros compromisos concurrentes no chocan: el INSERT ignora la llave
+    repetida y la fila se vuelve a leer con bloqueo (lectura actual también
+    en REPEATABLE READ de MySQL).
+    """
+    saldo = db.get(PresupuestoSaldo, presupuesto_id)
+    if saldo is None:
+        db.execute(
+            insert_ignore_stmt(db, PresupuestoSaldo.__table__, ["presupuesto_id"]),
+            {"presupuesto_id": presupuesto_id, "comprometido": 0, "pagado": 0, "version": 0,
+             "fecha_actualizacion": datetime.now(timezone.utc)},
+        )
+        saldo = db.execute(
+            select(PresupuestoSaldo)
+            .where(PresupuestoSaldo.presupuesto_id == presupuesto_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalar_one()
+    return saldo
+
+
+def total_oc(db: Session, oc_id: int) -> float:
+    return db.execute(
+        select(func.coalesce(func.sum(OCItem.cantidad * OCItem.precio_unit), 0)).where(OCItem.orden_compra_id == oc_id)
+    ).scalar_one()
+
+
+def _aplicar(
+    db: Session, presupuesto_id: int, tipo: str, monto: float, limitar: bool = False, **refs
+) -> MovimientoPresupuesto:
+    saldo = saldo_de(db, presupuesto_id)
+    columna = PresupuestoSaldo.comprometido if tipo == "COMPROMISO" else PresupuestoSaldo.pagado
+
+    # UPDATE incremental `SET x = x + :monto`: la base serializa las reservas
+    # concurrentes sobre la fila, sin leer-modificar-escribir en Python
+    stmt = (
+        update(PresupuestoSaldo)
+        .where(PresupuestoSaldo.presupuesto_id == presupuesto_id)
+        .values({
+            columna: columna + monto,
+            PresupuestoSaldo.version: PresupuestoSaldo.version + 1,
+            PresupuestoSaldo.fecha_actualizacion: datetime.now(timezone.utc),
+        })
+        .execution_options(synchronize_session=False)
+    )
+    if limitar:
+        # Solo aplica si cabe en el monto vigente del presupuesto
+        monto_presupuesto = select(Presupuesto.monto).where(Presupuesto.id == presupuesto_id).scalar_subquery()
+        stmt = stmt.where(PresupuestoSaldo.comprometido + monto <= monto_presupuesto)
+    if db.execute(stmt).rowcount == 0:
+        raise HTTPException(400, f"Presupuesto insuficiente para comprometer {monto:,.2f}")
+    db.expire(saldo)
+
+    mov = MovimientoPresupuesto(presupuesto_id=presupuesto_id, tipo=tipo, monto=monto, **refs)
+    db.add(mov)
+    db.flush()
+    return mov
+
+
+def _sin_presupuesto():
+    if settings.PRESUPUESTO_OBLIGATORIO:
+        raise HTTPException(400, "No hay presupuesto para esta combinación y período")
+
+
+def verificar_disponible(db: Session, req: Requerimiento, monto: Optional[float] = None) -> None:
+    """
+    Valida el presupuesto al aprobar un requerimiento (solo lectura; la reserva
+    se hace al aprobar la OC, cuando ya hay precios). Sin `monto` solo exige
+    que exista presupuesto cuando es obligatorio.
+    """
+    disp = disponibilidad(db, req.departamento_id, req.clasificador_id, req.unidad_negocio_id, req.fecha)
+    if disp is None:
+        _sin_presupuesto()
+        return
+    if monto is not None and disp.comprometido + monto > disp.monto:
+        raise HTTPException(
+            400, f"Presupuesto insuficiente: disponible {disp.monto - disp.comprometido:,.2f}, requerido {monto:,.2f}"
+        )
+
+
+def registrar_compromiso(db: Session, oc: OrdenCompra, validar: bool = True) -> Optional[MovimientoPresupuesto]:
+    """
+    Compromete el total de una OC aprobada contra su presupuesto. Con `validar`
+    la reserva falla (400) si excede lo disponible. No hace commit.
+    """
+    req = db.get(Requerimiento, oc.requerimiento_id)
+    disp = disponibilidad(db, req.departamento_id, req.clasificador_id, req.unidad_negocio_id, oc.fecha)
+    if disp is None:
+        if validar:
+            _sin_presupuesto()
+        return None
+    return _aplicar(db, disp.id, "COMPROMISO", total_oc(db, oc.id), limitar=validar, orden_compra_id=oc.id)
+
+
+def comprometer_lote(db: Session, oc_ids: list[int]) -> dict[int, str]:
+    """
+    Reserva el presupuesto de varias OCs (aprobación en lote). Los totales y las
+    claves se leen en dos consultas; cada reserva es un UPDATE condicional.
+    Devuelve {oc_id: error} de las OCs que no se pudieron reservar. No hace commit.
+    """
+    totales = dict(
+        db.execute(
+            select(OCItem.orden_compra_id, func.sum(OCItem.cantidad * OCItem.precio_unit))
+            .where(OCItem.orden_compra_id.in_(oc_ids))
+            .group_by(OCItem.orden_compra_id)
+        ).all()
+    )
+    filas = db.execute(
+        select(
+            OrdenCompra.id,
+            OrdenCompra.fecha,
+            Requerimiento.departamento_id,
+            Requerimiento.clasificador_id,
+            Requerimiento.unidad_negocio_id,
+        )
+        .join(Requerimiento, Requerimiento.id == OrdenCompra.requerimiento_id)
+        .where(OrdenCompra.id.in_(oc_ids))
+        .order_by(OrdenCompra.id)
+    ).all()
+
+    errores: dict[int, str] = {}
+    presupuestos: dict[tuple, object] = {}
+    for f in filas:
+        clave = (f.departamento_id, f.clasificador_id, f.unidad_negocio_id, periodos_candidatos(f.fecha)[0])
+        if clave not in presupuestos:
+            presupuestos[clave] = disponibilidad(db, *clave[:3], f.fecha)
+        disp = presupuestos[clave]
+        if disp is None:
+            if settings.PRESUPUESTO_OBLIGATORIO:
+                errores[f.id] = "No hay presupuesto para esta combinación y período"
+            continue
+        try:
+            _aplicar(db, disp.id, "COMPROMISO", totales.get(f.id, 0.0), limitar=True, orden_compra_id=f.id)
+        except HTTPException as e:
+            errores[f.id] = e.detail
+    return errores
+
+
+def registrar_pago(db: Session, detalle: DetallePago) -> Optional[MovimientoPresupuesto]:
+    """
+    Registra un pago realizado. Se carga al mismo presupuesto que comprometió la
+    OC; si la OC no tiene compromiso se resuelve por la unidad de negocio y la
+    fecha del pago. No hace commit.
+    """
+    oc_id = db.execute(
+        select(ProgramacionPago.orden_compra_id).where(ProgramacionPago.id == detalle.programacion_pago_id)
+    ).scalar_one()
+    presupuesto_id = db.execute(
+        select(MovimientoPresupuesto.presupuesto_id).where(
+            MovimientoPresupuesto.orden_compra_id == oc_id,
+            MovimientoPresupuesto.tipo == "COMPROMISO",
+        ).limit(1)
+    ).scalar()
+    if presupuesto_id is None:
+        req = db.execute(
+            select(Requerimiento).join(OrdenCompra, OrdenCompra.requerimiento_id == Requerimiento.id)
+            .where(OrdenCompra.id == oc_id)
+        ).scalar_one()
+        disp = disponibilidad(
+            db, req.departamento_id, req.clasificador_id, detalle.unidad_negocio_id, detalle.fecha_pago
+        )
+        if disp is None:
+            return None
+        presupuesto_id = disp.id
+    return _aplicar(
+        db, presupuesto_id, "PAGO", detalle.monto, orden_compra_id=oc_id, detalle_pago_id=detalle.id
+    )
+
+
+def consumo(presupuesto: Presupuesto, saldo: Optional[PresupuestoSaldo]) -> dict:
+    comprometido = saldo.comprometido if saldo else 0.0
+    pagado = saldo.pagado if saldo else 0.0
+    return {
+        "presupuesto_id": presupuesto.id,
+        "departamento_id": presupuesto.departamento_id,
+        "clasificador_id": presupuesto.clasificador_id,
+        "unidad_negocio_id": presupuesto.unidad_negocio_id,
+        "periodo": presupuesto.periodo,
+        "monto": presupuesto.monto,
+        "comprometido": comprometido,
+        "pagado": pagado,
+        "por_pagar": comprometido - pagado,
+        "disponible": presupuesto.monto - comprometido,
+        "version": saldo.version if saldo else 0,
+    }
+
+
+def recalcular_saldos(db: Session) -> dict:
+    """
+    Reconstruye la bitácora: registra los compromisos de OCs aprobadas y los
+    pagos realizados que aún no tengan movimiento (p. ej. anteriores a la
+    bitácora) y vuelve a sumar los saldos desde los movimientos. No hace commit.
+    """
+    ocs_sin_mov = db.execute(
+        select(OrdenCompra).where(
+            OrdenCompra.estatus == "APROBADA",
+            ~select(MovimientoPresupuesto.id).where(
+                MovimientoPresupuesto.orden_compra_id == OrdenCompra.id,
+                MovimientoPresupuesto.tipo == "COMPROMISO",
+            ).exists(),
+        )
+    ).scalars().all()
+    # Histórico: se registra aunque exceda el presupuesto
+    compromisos = sum(1 for oc in ocs_sin_mov if registrar_compromiso(db, oc, validar=False))
+
+    pagos_sin_mov = db.execute(
+        select(DetallePago).where(
+            DetallePago.estatus == "PAGADO",
+            ~select(MovimientoPresupuesto.id).where(MovimientoPresupuesto.detalle_pago_id == DetallePago.id).exists(),
+        )
+    ).scalars().all()
+    pagos = sum(1 for d in pagos_sin_mov if registrar_pago(db, d))
+
+    # Saldos = suma de movimientos (una consulta agrupada)
+    totales = db.execute(
+        select(MovimientoPresupuesto.presupuesto_id, MovimientoPresupuesto.tipo, func.sum(MovimientoPresupuesto.monto))
+        .group_by(MovimientoPresupuesto.presupuesto_id, MovimientoPresupuesto.tipo)
+    ).all()
+    por_presupuesto: dict[int, dict[str, float]] = {}
+    for pid, tipo, monto in totales:
+        por_presupuesto.setdefault(pid, {})[tipo] = monto
+    for pid, montos in por_presupuesto.items():
+        saldo = saldo_de(db, pid)
+        saldo.comprometido = montos.get("COMPROMISO", 0.0)
+        saldo.pagado = montos.get("PAGO", 0.0)
+        saldo.version = PresupuestoSaldo.version + 1
+    db.flush()
+    return {"compromisos_registrados": compromisos, "pagos_registrados": pagos, "presupuestos": len(por_presupuesto)}
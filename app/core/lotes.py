@@ -0,0 +1,80 @@
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+# ---------------------------------------------------------
+# 📦 CAMBIOS DE ESTATUS EN LOTE
+# ---------------------------------------------------------
+def transicionar_lote(
+    db: Session,
+    modelo,
+    ids: list[int],
+    destino: str,
+    transiciones: dict[str, str],
+    valores: Optional[dict] = None,
+    validar: Optional[Callable[[list[int]], dict[int, str]]] = None,
+) -> dict:
+    """
+    Cambia el estatus de varios registros de `modelo` con una consulta de
+    lectura y un solo `UPDATE ... WHERE id IN (...) AND estatus = origen`.
+
+    - `transiciones`: estatus destino -> estatus origen requerido
+    - `valores`: columnas adicionales a fijar junto con el estatus
+    - `validar`: recibe los ids que pueden transicionar y devuelve {id: error}
+      de los que deben quedarse fuera (p. ej. sin presupuesto)
+
+    Devuelve el resultado por id en el orden recibido. No hace commit.
+    """
+    origen = transiciones.get(destino)
+    if origen is None:
+        raise HTTPException(400, f"Estatus destino no válido: {destino}")
+
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.LOTE_MAX_IDS:
+        raise HTTPException(400, f"Máximo {settings.LOTE_MAX_IDS} registros por lote")
+
+    # Una sola lectura; FOR UPDATE evita que otra transacción los mueva entre la validación y el UPDATE
+    actuales = dict(
+        db.execute(select(modelo.id, modelo.estatus).where(modelo.id.in_(ids)).with_for_update()).all()
+    )
+
+    errores: dict[int, str] = {}
+    for id_ in ids:
+        if id_ not in actuales:
+            errores[id_] = "No encontrado"
+        elif actuales[id_] != origen:
+            errores[id_] = f"Está en {actuales[id_]}; se requiere {origen}"
+
+    candidatos = [id_ for id_ in ids if id_ not in errores]
+    if validar and candidatos:
+        errores.update(validar(candidatos))
+        candidatos = [id_ for id_ in candidatos if id_ not in errores]
+
+    if candidatos:
+        resultado = db.execute(
+            update(modelo)
+            .where(modelo.id.in_(candidatos), modelo.estatus == origen)
+            .values(estatus=destino, **(valores or {}))
+            .execution_options(synchronize_session=False)
+        )
+        if resultado.rowcount != len(candidatos):
+            db.rollback()
+            raise HTTPException(409, "Algunos registros cambiaron de estatus durante la operación; intente de nuevo")
+        # Los objetos ya cargados en la sesión no deben mostrar el estatus viejo
+        db.expire_all()
+
+    return {
+        "estatus": destino,
+        "aplicados": len(candidatos),
+        "resultados": [
+            {"id": id_, "ok": False, "estatus": actuales.get(id_), "error": errores[id_]}
+            if id_ in errores
+            else {"id": id_, "ok": True, "estatus": destino}
+            for id_ in ids
+        ],
+    }
@@ -0,0 +1,196 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+
+# ---------------------------------------------------------
+# 📈 MÉTRICAS (formato de exposición de Prometheus)
+# ---------------------------------------------------------
+# Los contadores no llevan lock: cada hilo escribe en su propio dict
+# (`threading.local`) y solo el scrape recorre y suma los de todos los hilos.
+# Así incrementar cuesta un acceso a dict sin contención entre el event loop
+# y los hilos del threadpool. Los valores de hilos terminados se consolidan
+# al leer para que la lista de hilos no crezca sin límite.
+
+# Límites de los buckets de latencia en segundos (más +Inf)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _PorHilo:
+    def __init__(self):
+        self._local = threading.local()
+        self._hilos: list[tuple[threading.Thread, dict]] = []
+        self._retirados: dict = {}
+        self._lock = threading.Lock()  # solo al registrar un hilo nuevo y al leer
+
+    def propio(self) -> dict:
+        try:
+            return self._local.valores
+        except AttributeError:
+            valores = self._local.valores = {}
+            with self._lock:
+                self._hilos.append((threading.current_thread(), valores))
+            return valores
+
+    def leer(self) -> dict:
+        """Suma de los valores de todos los hilos (los histogramas son listas)."""
+        total: dict = {}
+        with self._lock:
+            vivos = []
+            for hilo, valores in self._hilos:
+                if hilo.is_alive():
+                    vivos.append((hilo, valores))
+                else:
+                    _sumar(self._retirados, valores)
+            self._hilos = vivos
+            _sumar(total, self._retirados)
+            for _, valores in vivos:
+                _sumar(total, valores)
+        return total
+
+
+def _sumar(destino: dict, origen: dict) -> None:
+    for llave, valor in list(origen.items()):
+        if isinstance(valor, list):
+            actual = destino.get(llave)
+            destino[llave] = list(valor) if actual is None else [a + b for a, b in zip(actual, valor)]
+        else:
+            destino[llave] = destino.get(llave, 0) + valor
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, registro: "Registro", nombre: str, ayuda: str, etiquetas: tuple[str, ...]):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self._por_hilo = registro._por_hilo
+
+    def inc(self, *valores_etiquetas, n: float = 1) -> None:
+        valores = self._por_hilo.propio()
+        llave = (self.nombre, valores_etiquetas)
+        valores[llave] = valores.get(llave, 0) + n
+
+    def series(self, leidos: dict) -> Iterable[tuple[str, list, float]]:
+        for (nombre, etiquetas), valor in leidos.items():
+            if nombre == self.nombre:
+                yield "", list(zip(self.etiquetas, etiquetas)), valor
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, registro: "Registro", nombre: str, ayuda: str, etiquetas: tuple[str, ...], buckets: tuple):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self.buckets = buckets
+        self._por_hilo = registro._por_hilo
+
+    def observar(self, valor: float, *valores_etiquetas) -> None:
+        valores = self._por_hilo.propio()
+        llave = (self.nombre, valores_etiquetas)
+        cuentas = valores.get(llave)
+        if cuentas is None:
+            # Un conteo por bucket (no acumulado), +Inf y al final la suma
+            cuentas = valores[llave] = [0] * (len(self.buckets) + 1) + [0.0]
+        cuentas[bisect_left(self.buckets, valor)] += 1
+        cuentas[-1] += valor
+
+    def series(self, leidos: dict) -> Iterable[tuple[str, list, float]]:
+        limites = [_numero(b) for b in self.buckets] + ["+Inf"]
+        for etiquetas, cuentas in self.cuentas(leidos).items():
+            pares = list(zip(self.etiquetas, etiquetas))
+            acumulado = 0
+            for limite, cuenta in zip(limites, cuentas):
+                acumulado += cuenta
+                yield "_bucket", pares + [("le", limite)], acumulado
+            yield "_sum", pares, cuentas[-1]
+            yield "_count", pares, acumulado
+
+    def cuentas(self, leidos: dict) -> dict[tuple, list]:
+        """{etiquetas: [conteo por bucket..., +Inf, suma]} para calcular percentiles fuera de Prometheus."""
+        return {etiquetas: c for (nombre, etiquetas), c in leidos.items() if nombre == self.nombre}
+
+
+def percentil(buckets: tuple, cuentas: list, p: float):
+    """Límite superior del bucket donde cae el percentil `p` (0-1); None si no hay datos o cae en +Inf."""
+    total = sum(cuentas[:-1])
+    if not total:
+        return None
+    acumulado = 0
+    for limite, cuenta in zip(buckets, cuentas):
+        acumulado += cuenta
+        if acumulado >= p * total:
+            return limite
+    return None
+
+
+# Función de un colector: [(nombre, tipo, ayuda, [(etiquetas dict, valor), ...]), ...]
+Colector = Callable[[], Iterable[tuple[str, str, str, list[tuple[dict, float]]]]]
+
+
+class Registro:
+    def __init__(self):
+        self._por_hilo = _PorHilo()
+        self._metricas: list = []
+        self._colectores: list[Colector] = []
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()) -> Contador:
+        metrica = Contador(self, nombre, ayuda, etiquetas)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(
+        self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = (), buckets: tuple = BUCKETS_LATENCIA
+    ) -> Histograma:
+        metrica = Histograma(self, nombre, ayuda, etiquetas, buckets)
+        self._metricas.append(metrica)
+        return metrica
+
+    def colector(self, funcion: Colector) -> Colector:
+        """Registra una función que da gauges/contadores calculados al momento del scrape."""
+        self._colectores.append(funcion)
+        return funcion
+
+    def leer(self) -> dict:
+        return self._por_hilo.leer()
+
+    def exponer(self) -> str:
+        leidos = self.leer()
+        lineas = []
+        for metrica in self._metricas:
+            lineas += [f"# HELP {metrica.nombre} {metrica.ayuda}", f"# TYPE {metrica.nombre} {metrica.tipo}"]
+            for sufijo, etiquetas, valor in metrica.series(leidos):
+                lineas.append(f"{metrica.nombre}{sufijo}{_etiquetas(etiquetas)} {_numero(valor)}")
+        for colector in self._colectores:
+            for nombre, tipo, ayuda, muestras in colector():
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+                for etiquetas, valor in muestras:
+                    lineas.append(f"{nombre}{_etiquetas(etiquetas.items())} {_numero(valor)}")
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(pares) -> str:
+    pares = list(pares)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _numero(valor) -> str:
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return "NaN"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor)) if abs(valor) < 1e15 else repr(valor)
+    return str(valor) if isinstance(valor, str) else repr(valor)
+
+
+# Registro único por proceso
+metricas = Registro()
+
+# ---- Métricas de negocio ----
+ocs_generadas = metricas.contador("compras_ocs_generadas_total", "Órdenes de compra generadas desde cotizaciones")
+pagos_pagados = metricas.contador("compras_pagos_pagados_total", "Detalles de pago marcados como pagados")
@@ -0,0 +1,91 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import DateTime, and_, or_
+
+from app.core.config import settings
+
+
+# ---------------------------------------------------------
+# 📑 PAGINACIÓN POR CURSOR (KEYSET)
+# ---------------------------------------------------------
+# En lugar de OFFSET, cada página se pide con el cursor de la última fila
+# recibida. La consulta filtra "después de" esos valores de orden, así que el
+# costo de una página no depende de qué tan lejos esté en la tabla.
+
+
+@dataclass
+class PageParams:
+    after: Optional[str]
+    limit: int
+
+
+def page_params(
+    after: Optional[str] = Query(None, description="Cursor opaco (next_cursor de la página anterior)"),
+    limit: int = Query(settings.PAGE_SIZE, ge=1, le=settings.PAGE_SIZE_MAX, description="Tamaño de página"),
+) -> PageParams:
+    return PageParams(after=after, limit=limit)
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """Serializa los valores de orden de una fila en un cursor opaco."""
+    plain = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(plain, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> list[Any]:
+    """Recupera los valores de orden de un cursor, respetando el tipo de cada columna."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if isinstance(col.type, DateTime) and v is not None else v
+            for col, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Cursor inválido")
+
+
+def keyset(query, columns: list, params: PageParams, descending: bool = True):
+    """
+    Ordena por `columns`, aplica la condición del cursor y limita a `limit + 1`
+    filas (la fila extra solo indica si existe una página siguiente).
+    Funciona igual con `db.query(...)` y con `select(...)`.
+    """
+    if params.after:
+        values = decode_cursor(params.after, columns)
+        # Comparación lexicográfica: (c1 < v1) OR (c1 = v1 AND c2 < v2) ...
+        condiciones = []
+        for i, (col, val) in enumerate(zip(columns, values)):
+            iguales = [c == v for c, v in zip(columns[:i], values[:i])]
+            condiciones.append(and_(*iguales, col < val if descending else col > val))
+        query = query.where(or_(*condiciones))
+
+    orden = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(*orden).limit(params.limit + 1)
+
+
+def page(rows, columns: list, params: PageParams) -> dict:
+    """Arma la respuesta paginada a partir de las filas obtenidas con `keyset`."""
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[: params.limit]
+        next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def date_range(query, column, desde: Optional[date], hasta: Optional[date]):
+    """Filtra `column` entre dos fechas, ambas inclusivas (día completo)."""
+    if desde:
+        query = query.where(column >= datetime.combine(desde, time.min))
+    if hasta and hasta < date.max:  # con date.max no hay día siguiente ni límite que poner
+        query = query.where(column < datetime.combine(hasta + timedelta(days=1), time.min))
+    return query
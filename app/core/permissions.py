@@ -1,9 +1,95 @@
+import threading
+from dataclasses import dataclass
+from typing import Iterable
+
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import get_current_user
 from app.db.session import get_db
 from app.db.models import UsuarioRol, Permiso
 
+# Cada permiso es la tupla exacta (perfil, clasificador, departamento): la
+# verificación es una búsqueda en un set, sin empaquetar los ids (un id
+# truncado podría coincidir con el de otro permiso).
+Clave = tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class PermisosUsuario:
+    roles: frozenset[str]
+    claves: frozenset[Clave]
+
+    def permite(self, perfil_id: int, clasificador_id: int, departamento_id: int) -> bool:
+        return (perfil_id, clasificador_id, departamento_id) in self.claves
+
+
+class PermissionEngine:
+    """
+    Resuelve los permisos de un usuario con una sola consulta (roles + permisos
+    de esos roles) y los guarda por `sub` con un TTL corto. Las rutas que
+    modifican roles o permisos invalidan la caché.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.version = 0
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def cargar(self, db: Session, sub) -> PermisosUsuario:
+        key = str(sub)
+        permisos = self._cache.get(key)
+        if permisos is None:
+            version = self.version
+            rows = (
+                db.query(UsuarioRol.rol, Permiso.perfil_id, Permiso.clasificador_id, Permiso.departamento_id)
+                .outerjoin(Permiso, Permiso.rol == UsuarioRol.rol)
+                .filter(UsuarioRol.usuario_id == sub)
+                .all()
+            )
+            permisos = PermisosUsuario(
+                roles=frozenset(r.rol for r in rows),
+                claves=frozenset(
+                    (r.perfil_id, r.clasificador_id, r.departamento_id)
+                    for r in rows
+                    if r.perfil_id is not None
+                ),
+            )
+            with self._lock:
+                if version == self.version:
+                    self._cache.set(key, permisos)
+        return permisos
+
+    def allowed(self, db: Session, user_data: dict, tuplas: Iterable[tuple[int, int, int]]) -> list[bool]:
+        """Evalúa varias tuplas (perfil, clasificador, departamento) con una sola carga."""
+        permisos = self.cargar(db, user_data.get("sub"))
+        return [permisos.permite(*t) for t in tuplas]
+
+    def invalidar(self, sub=None) -> None:
+        """Invalida los permisos de un usuario, o de todos si no se indica."""
+        with self._lock:
+            self.version += 1
+            if sub is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(str(sub))
+
+    def stats(self) -> dict:
+        return {"version": self.version, **self._cache.stats()}
+
+
+# Instancia única por proceso
+motor_permisos = PermissionEngine(
+    ttl=settings.PERMISSION_CACHE_TTL,
+    maxsize=settings.PERMISSION_CACHE_SIZE,
+)
+
+
+def allowed(db: Session, user_data: dict, tuplas: Iterable[tuple[int, int, int]]) -> list[bool]:
+    return motor_permisos.allowed(db, user_data, tuplas)
+
+
 def validar_permiso(
     perfil_id: int,
     clasificador_id: int,
@@ -12,23 +98,10 @@ def validar_permiso(
     user_data: dict = Depends(get_current_user),
 ):
     user_id = user_data.get("sub")  # tomado del JWT
-    roles = db.query(UsuarioRol).filter_by(usuario_id=user_id).all()
+    permisos = motor_permisos.cargar(db, user_id)
 
-    if not roles:
+    if not permisos.roles:
         raise HTTPException(403, "El usuario no tiene roles asignados")
 
-    rol_nombres = [r.rol for r in roles]
-
-    tiene_permiso = (
-        db.query(Permiso)
-        .filter(
-            Permiso.rol.in_(rol_nombres),
-            Permiso.perfil_id == perfil_id,
-            Permiso.clasificador_id == clasificador_id,
-            Permiso.departamento_id == departamento_id,
-        )
-        .first()
-    )
-
-    if not tiene_permiso:
+    if not permisos.permite(perfil_id, clasificador_id, departamento_id):
         raise HTTPException(403, "No tienes permisos para esta acción")
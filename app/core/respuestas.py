@@ -0,0 +1,116 @@
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, Literal
+
+import orjson
+from fastapi import Query
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from app.core.pagination import PageParams, page
+
+
+# ---------------------------------------------------------
+# ⚡ LECTURA RÁPIDA: SELECT DE COLUMNAS → JSON
+# ---------------------------------------------------------
+# Para listados grandes: el SELECT trae exactamente los campos del schema de
+# respuesta y las filas se serializan directo con orjson, sin objetos ORM
+# (identity map) ni validación Pydantic por fila. El schema sigue siendo la
+# fuente de verdad: de sus campos salen las columnas y las llaves del JSON.
+
+
+def _default(obj: Any):
+    # MySQL puede devolver DECIMAL en columnas numéricas
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+
+class JSONRapido(Response):
+    """Respuesta JSON serializada con orjson."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def columnas(schema: type[BaseModel], modelo, **extra) -> list:
+    """
+    Columnas del SELECT para los campos de `schema`: cada campo se toma de la
+    columna del mismo nombre en `modelo`, o de `extra` (p. ej. nombres que
+    vienen de un JOIN). Falla al importar si el schema tiene un campo sin columna.
+    """
+    cols = []
+    for nombre in schema.model_fields:
+        if nombre in extra:
+            cols.append(extra[nombre].label(nombre))
+            continue
+        col = getattr(modelo, nombre, None)
+        if col is None:
+            raise AttributeError(f"{schema.__name__}.{nombre} no tiene columna en {modelo.__name__}")
+        cols.append(col)
+    return cols
+
+
+def select_schema(schema: type[BaseModel], modelo, orden: list = (), **extra):
+    """
+    `select()` con las columnas de `schema` más las columnas de `orden` que no
+    estén en el schema (las necesita el cursor de la paginación).
+    """
+    cols = columnas(schema, modelo, **extra)
+    nombres = set(schema.model_fields)
+    return select(*cols, *[c for c in orden if c.key not in nombres])
+
+
+def filas(result, schema: type[BaseModel], rows=None) -> list[dict]:
+    """Filas como dicts con solo los campos del schema, en su orden."""
+    campos = list(schema.model_fields)
+    llaves = list(result.keys())
+    rows = result.all() if rows is None else rows
+    if not rows:
+        return []
+    if len(campos) == 1:
+        i = llaves.index(campos[0])
+        return [{campos[0]: r[i]} for r in rows]
+    tomar = itemgetter(*[llaves.index(c) for c in campos])
+    return [dict(zip(campos, tomar(r))) for r in rows]
+
+
+def por_columnas(result, schema: type[BaseModel], rows=None) -> dict[str, list]:
+    """Las mismas filas que `filas`, como {campo: [valores]}: cada nombre va una sola vez."""
+    campos = list(schema.model_fields)
+    llaves = list(result.keys())
+    rows = result.all() if rows is None else rows
+    if not rows:
+        return {c: [] for c in campos}
+    indices = [llaves.index(c) for c in campos]
+    transpuestas = list(zip(*rows))
+    return {c: list(transpuestas[i]) for c, i in zip(campos, indices)}
+
+
+# ---- Formato de listados ----
+FormatoLista = Literal["objetos", "columnar"]
+
+
+def formato_lista(
+    formato: FormatoLista = Query(
+        "objetos",
+        alias="format",
+        description="objetos: lista de items. columnar: {campo: [valores]} en `columnas`, más compacto en páginas grandes",
+    ),
+) -> FormatoLista:
+    return formato
+
+
+def pagina_json(
+    result, schema: type[BaseModel], orden: list, params: PageParams, formato: FormatoLista = "objetos"
+) -> JSONRapido:
+    """Página keyset (ver `pagination.page`) serializada directo a JSON."""
+    pagina = page(result.all(), orden, params)
+    if formato == "columnar":
+        contenido = {"columnas": por_columnas(result, schema, pagina["items"]), "next_cursor": pagina["next_cursor"]}
+    else:
+        contenido = {"items": filas(result, schema, pagina["items"]), "next_cursor": pagina["next_cursor"]}
+    return JSONRapido(contenido)
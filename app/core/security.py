@@ -1,10 +1,20 @@
+import base64
+import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta
+from typing import Callable
+
+import orjson
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer
 from fastapi.security import HTTPAuthorizationCredentials
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+
 SECRET_KEY = "clave_super_secreta_para_pruebas"  # luego la mueves a tu .env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
@@ -19,10 +29,122 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+
+# ---------------------------------------------------------
+# 🔐 VERIFICACIÓN DE TOKENS
+# ---------------------------------------------------------
+# Dos verificadores equivalentes, elegibles con JWT_VERIFIER: "jose" usa
+# python-jose; "hs256" lo hace con hmac de la biblioteca estándar y orjson,
+# sin las capas genéricas de jose, y repite las validaciones de claims que
+# jose hace por defecto (exp, nbf, iat, aud, sub, jti, at_hash). Ambos lanzan
+# JWTError. Comparar con `python -m app.core.security`.
+
+def _verificar_jose(token: str) -> dict:
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except TypeError:
+        # jose solo atrapa ValueError al convertir exp/nbf/iat (p. ej. "exp": null)
+        raise JWTError("Claim de tiempo no válido")
+
+
+def _b64(segmento: str) -> bytes:
+    return base64.urlsafe_b64decode(segmento + "=" * (-len(segmento) % 4))
+
+
+def _entero(claims: dict, claim: str) -> int:
+    # Igual que jose: int() acepta números y textos numéricos ("123")
+    try:
+        return int(claims[claim])
+    except (TypeError, ValueError):
+        raise JWTError(f"El claim {claim} debe ser un entero")
+
+
+def _validar_claims(claims: dict) -> None:
+    """Las validaciones de jwt.decode con sus opciones por defecto (sin audience, issuer ni access_token)."""
+    ahora = int(time.time())  # segundos enteros, como jose
+    if "iat" in claims:
+        _entero(claims, "iat")
+    if "nbf" in claims and _entero(claims, "nbf") > ahora:
+        raise JWTError("Token aún no válido")
+    if "exp" in claims and _entero(claims, "exp") < ahora:
+        raise JWTError("Token expirado")
+    if "aud" in claims:
+        # Sin audiencia configurada, jose rechaza cualquier token que traiga aud
+        raise JWTError("Audiencia no válida")
+    if "sub" in claims and not isinstance(claims["sub"], str):
+        raise JWTError("El claim sub debe ser texto")
+    if "jti" in claims and not isinstance(claims["jti"], str):
+        raise JWTError("El claim jti debe ser texto")
+    if "at_hash" in claims:
+        # No se recibe access_token con qué compararlo
+        raise JWTError("Claim at_hash sin access_token")
+
+
+def _verificar_hs256(token: str) -> dict:
+    try:
+        encabezado, cuerpo, firma = token.split(".")
+        firmado = f"{encabezado}.{cuerpo}".encode("ascii")
+        if orjson.loads(_b64(encabezado)).get("alg") != ALGORITHM:
+            raise JWTError("Algoritmo no permitido")
+        esperada = hmac.new(SECRET_KEY.encode(), firmado, hashlib.sha256).digest()
+        if not hmac.compare_digest(_b64(firma), esperada):
+            raise JWTError("Firma no válida")
+        claims = orjson.loads(_b64(cuerpo))
+    except (ValueError, AttributeError):
+        # Segmentos faltantes, base64 o JSON mal formados, encabezado que no es objeto
+        raise JWTError("Token mal formado")
+    if not isinstance(claims, dict):
+        raise JWTError("Token mal formado")
+    _validar_claims(claims)
+    return claims
+
+
+VERIFICADORES: dict[str, Callable[[str], dict]] = {
+    "jose": _verificar_jose,
+    "hs256": _verificar_hs256,
+}
+
+
+class CacheTokens:
+    """
+    Claims de tokens ya verificados, por sha256 del token. Cada entrada vence
+    con el `exp` del token (o antes, a los `ttl` segundos), así un token
+    expirado nunca sale del caché. Los tokens rechazados no se guardan.
+    """
+
+    def __init__(self, verificador: Callable[[str], dict], maxsize: int, ttl: float):
+        self.verificador = verificador
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def verificar(self, token: str) -> dict:
+        llave = hashlib.sha256(token.encode()).digest()
+        claims = self._cache.get(llave)
+        if claims is None:
+            claims = self.verificador(token)
+            vigencia = self.ttl
+            if "exp" in claims:
+                vigencia = min(vigencia, int(claims["exp"]) + 1 - time.time())
+            if vigencia > 0:
+                self._cache.set(llave, claims, ttl=vigencia)
+        # Copia: el dict del caché lo comparten todas las peticiones con el mismo token
+        return dict(claims)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+# Instancia única por proceso
+tokens = CacheTokens(
+    VERIFICADORES[settings.JWT_VERIFIER],
+    maxsize=settings.JWT_CACHE_SIZE,
+    ttl=settings.JWT_CACHE_TTL,
+)
+
+
 def decode_access_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        return tokens.verificar(token)
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
 
@@ -30,8 +152,21 @@ def decode_access_token(token: str):
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme)):
     if not credentials:
         raise HTTPException(status_code=401, detail="Token ausente o no autorizado")
-    token = credentials.credentials
-    payload = decode_access_token(token)
-    return payload
+    return decode_access_token(credentials.credentials)
+
 
+# ---------------------------------------------------------
+# ⏱️ MICROBENCHMARK: python -m app.core.security
+# ---------------------------------------------------------
+if __name__ == "__main__":
+    import timeit
 
+    token = create_access_token({"sub": "usuario_demo", "rol": "tester"})
+    n = 20000
+    casos = {f"verificador {nombre}": (lambda v=v: v(token)) for nombre, v in VERIFICADORES.items()}
+    caliente = CacheTokens(VERIFICADORES[settings.JWT_VERIFIER], maxsize=16, ttl=300)
+    casos[f"caché ({settings.JWT_VERIFIER}), token repetido"] = lambda: caliente.verificar(token)
+    for nombre, fn in casos.items():
+        fn()
+        mejor = min(timeit.repeat(fn, number=n, repeat=5)) / n
+        print(f"{nombre:40} {mejor * 1e6:8.2f} µs/token")
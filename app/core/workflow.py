@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.lotes import transicionar_lote
+from app.core.pagination import PageParams, keyset
+from app.db.models import (
+    Cotizacion,
+    DetallePago,
+    OrdenCompra,
+    ProgramacionPago,
+    Requerimiento,
+)
+
+
+# ---------------------------------------------------------
+# 🔄 FLUJOS DE ESTATUS
+# ---------------------------------------------------------
+# Estados y transiciones de cada entidad en un solo lugar. Los cambios se
+# aplican con compare-and-swap (`UPDATE ... WHERE id = :id AND estatus = :origen`),
+# así dos aprobaciones simultáneas no pueden aplicar la misma transición.
+
+
+@dataclass(frozen=True)
+class Transicion:
+    accion: str
+    origen: str
+    destino: str
+    error: str  # mensaje cuando el registro no está en `origen`
+
+
+class Flujo:
+    def __init__(self, modelo, columna_fecha, no_encontrado: str, estados: tuple[str, ...], transiciones: list[Transicion]):
+        self.modelo = modelo
+        self.columna_fecha = columna_fecha
+        self.no_encontrado = no_encontrado
+        self.estados = estados
+        self.transiciones = {t.accion: t for t in transiciones}
+        # Estatus destino -> estatus origen (para cambios en lote)
+        self.por_destino = {t.destino: t.origen for t in transiciones}
+        # Estados con transiciones de salida: los que forman colas de trabajo
+        self.pendientes = tuple(e for e in estados if any(t.origen == e for t in transiciones))
+        self.orden_cola = [columna_fecha, modelo.id]
+        # Modelos con columna `version` (ETag de su detalle): cada transición la incrementa
+        self.version = getattr(modelo, "version", None)
+
+    def _valores(self, valores: Optional[dict]) -> dict:
+        valores = dict(valores or {})
+        if self.version is not None:
+            valores["version"] = self.version + 1
+        return valores
+
+    def aplicar(self, db: Session, id_: int, accion: str, **valores) -> None:
+        """Aplica la transición `accion` a un registro. No hace commit."""
+        t = self.transiciones[accion]
+        resultado = db.execute(
+            update(self.modelo)
+            .where(self.modelo.id == id_, self.modelo.estatus == t.origen)
+            .values(estatus=t.destino, **self._valores(valores))
+        )
+        if resultado.rowcount == 1:
+            return
+        # No aplicó: o no existe o ya no está en el estatus de origen
+        existe = db.execute(select(self.modelo.id).where(self.modelo.id == id_)).first()
+        if not existe:
+            raise HTTPException(404, self.no_encontrado)
+        raise HTTPException(400, t.error)
+
+    def lote(
+        self,
+        db: Session,
+        ids: list[int],
+        destino: str,
+        valores: Optional[dict] = None,
+        validar: Optional[Callable[[list[int]], dict[int, str]]] = None,
+    ) -> dict:
+        return transicionar_lote(
+            db, self.modelo, ids, destino, self.por_destino, valores=self._valores(valores), validar=validar
+        )
+
+    def cola(self, estatus: str, params: PageParams):
+        """
+        SELECT de la cola de un estatus, del más antiguo al más reciente. Solo
+        lee columnas del índice (estatus, fecha, id), sin tocar la tabla.
+        """
+        if estatus not in self.pendientes:
+            raise HTTPException(400, f"Estatus sin cola de trabajo; use uno de: {', '.join(self.pendientes)}")
+        columnas = [self.modelo.id, self.modelo.estatus, self.columna_fecha]
+        if self.columna_fecha.key != "fecha":
+            columnas.append(self.columna_fecha.label("fecha"))
+        stmt = select(*columnas).where(self.modelo.estatus == estatus)
+        return keyset(stmt, self.orden_cola, params, descending=False)
+
+
+FLUJO_REQ = Flujo(
+    Requerimiento,
+    Requerimiento.fecha,
+    "Requerimiento no encontrado",
+    ("BORRADOR", "EN_REVISION", "APROBADO", "RECHAZADO"),
+    [
+        Transicion("revisar", "BORRADOR", "EN_REVISION", "Solo se pueden enviar a revisión los borradores"),
+        Transicion("aprobar", "EN_REVISION", "APROBADO", "Solo se pueden aprobar los que están en revisión"),
+        Transicion("rechazar", "EN_REVISION", "RECHAZADO", "Solo se pueden rechazar los que están en revisión"),
+    ],
+)
+
+FLUJO_COT = Flujo(
+    Cotizacion,
+    Cotizacion.fecha,
+    "Cotización no encontrada",
+    ("ABIERTA", "APROBADA", "RECHAZADA"),
+    [
+        Transicion("aprobar", "ABIERTA", "APROBADA", "Solo se pueden aprobar cotizaciones abiertas"),
+        Transicion("rechazar", "ABIERTA", "RECHAZADA", "Solo se pueden rechazar cotizaciones abiertas"),
+    ],
+)
+
+FLUJO_OC = Flujo(
+    OrdenCompra,
+    OrdenCompra.fecha,
+    "OC no encontrada",
+    ("BORRADOR", "EN_REVISION", "APROBADA", "RECHAZADA"),
+    [
+        Transicion("revisar", "BORRADOR", "EN_REVISION", "Solo se pueden enviar a revisión los borradores"),
+        Transicion("aprobar", "EN_REVISION", "APROBADA", "Solo se pueden aprobar las OCs en revisión"),
+        Transicion("rechazar", "EN_REVISION", "RECHAZADA", "Solo se pueden rechazar las OCs en revisión"),
+    ],
+)
+
+FLUJO_PROGRAMACION = Flujo(
+    ProgramacionPago,
+    ProgramacionPago.fecha_creacion,
+    "Programación de pago no encontrada",
+    ("BORRADOR", "PRIMERA_APROBACION", "APROBADA"),
+    [
+        Transicion(
+            "primera-aprobacion", "BORRADOR", "PRIMERA_APROBACION",
+            "Solo se puede aprobar programaciones en estado BORRADOR",
+        ),
+        Transicion(
+            "segunda-aprobacion", "PRIMERA_APROBACION", "APROBADA",
+            "Solo se puede realizar la segunda aprobación después de la primera",
+        ),
+    ],
+)
+
+FLUJO_DETALLE_PAGO = Flujo(
+    DetallePago,
+    DetallePago.fecha_pago,
+    "Detalle de pago no encontrado",
+    ("PENDIENTE", "PAGADO"),
+    [
+        Transicion("pagar", "PENDIENTE", "PAGADO", "Este pago ya está marcado como PAGADO"),
+    ],
+)
@@ -0,0 +1,77 @@
+from typing import Iterable, Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def chunks(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    """Agrupa un iterable de filas en listas de a lo más `size` elementos."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def upsert_stmt(db: Session, table, index_elements: list[str], update_cols: list[str]):
+    """
+    INSERT que actualiza `update_cols` cuando choca con la llave única
+    `index_elements`, usando la sintaxis nativa del motor:
+    MySQL `ON DUPLICATE KEY UPDATE`, SQLite/PostgreSQL `ON CONFLICT DO UPDATE`.
+    """
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_cols})
+    if dialecto in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialecto == "sqlite" else postgresql).insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={c: stmt.excluded[c] for c in update_cols},
+        )
+    raise RuntimeError(f"Upsert no soportado para el motor '{dialecto}' (solo MySQL, SQLite y PostgreSQL)")
+
+
+def insert_ignore_stmt(db: Session, table, index_elements: list[str]):
+    """
+    INSERT que no hace nada si la fila ya existe (choque con `index_elements`):
+    MySQL `INSERT IGNORE`, SQLite/PostgreSQL `ON CONFLICT DO NOTHING`. Sirve
+    para crear filas "si no existen" sin carreras entre transacciones.
+    """
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "mysql":
+        return mysql.insert(table).prefix_with("IGNORE")
+    if dialecto in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialecto == "sqlite" else postgresql).insert(table)
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    raise RuntimeError(f"Insert-ignore no soportado para el motor '{dialecto}' (solo MySQL, SQLite y PostgreSQL)")
+
+
+def bulk_upsert(
+    db: Session,
+    table,
+    rows: Iterable[dict],
+    index_elements: list[str],
+    update_cols: list[str],
+    chunk_size: int = 1000,
+) -> int:
+    """Ejecuta el upsert por bloques (executemany) dentro de la transacción actual."""
+    stmt = upsert_stmt(db, table, index_elements, update_cols)
+    total = 0
+    for chunk in chunks(rows, chunk_size):
+        db.execute(stmt, chunk)
+        total += len(chunk)
+    return total
+
+
+def bulk_insert(db: Session, table, rows: Iterable[dict], chunk_size: int = 1000) -> int:
+    """INSERT por bloques (executemany) dentro de la transacción actual."""
+    total = 0
+    for chunk in chunks(rows, chunk_size):
+        db.execute(insert(table), chunk)
+        total += len(chunk)
+    return total
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, ForeignKey, DateTime, Float
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Float, Index, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, timezone
 from app.db.base import Base
@@ -21,8 +21,8 @@ class Clasificador(Base):
 class Articulo(Base):
     __tablename__ = "articulo"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    nombre: Mapped[str] = mapped_column(String(150), nullable=False)
-    clasificador_id: Mapped[int] = mapped_column(ForeignKey("clasificador.id"), nullable=True)
+    nombre: Mapped[str] = mapped_column(String(150), nullable=False, index=True)
+    clasificador_id: Mapped[int] = mapped_column(ForeignKey("clasificador.id"), nullable=True, index=True)
 
     clasificador_rel: Mapped["Clasificador"] = relationship(back_populates="articulos")
 
@@ -35,11 +35,21 @@ class Departamento(Base):
 class Proveedor(Base):
     __tablename__ = "proveedor"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    nombre: Mapped[str] = mapped_column(String(255), nullable=False)
+    nombre: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+
+
+# La importación masiva compara nombres sin distinguir mayúsculas (lower(nombre) IN ...)
+Index("ix_articulo_nombre_lower", func.lower(Articulo.nombre))
+Index("ix_proveedor_nombre_lower", func.lower(Proveedor.nombre))
 
 # ---- Requerimientos ----
 class Requerimiento(Base):
     __tablename__ = "requerimiento"
+    # Colas de trabajo por estatus (/cola) sin leer la tabla
+    __table_args__ = (
+        Index("ix_requerimiento_estatus_fecha", "estatus", "fecha", "id"),
+        {"mysql_engine": "InnoDB"},
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     departamento_id: Mapped[int] = mapped_column(ForeignKey("departamento.id"), nullable=False)
     clasificador_id: Mapped[int] = mapped_column(ForeignKey("clasificador.id"), nullable=False)
@@ -56,7 +66,7 @@ class Requerimiento(Base):
 class ReqItem(Base):
     __tablename__ = "req_item"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    requerimiento_id: Mapped[int] = mapped_column(ForeignKey("requerimiento.id"), nullable=False)
+    requerimiento_id: Mapped[int] = mapped_column(ForeignKey("requerimiento.id"), nullable=False, index=True)
     articulo_id: Mapped[int] = mapped_column(ForeignKey("articulo.id"), nullable=False)
     cantidad: Mapped[int] = mapped_column(Integer, nullable=False)
     requerimiento: Mapped["Requerimiento"] = relationship(back_populates="items")
@@ -64,8 +74,12 @@ class ReqItem(Base):
 # ---- Cotizaciones ----
 class Cotizacion(Base):
     __tablename__ = "cotizacion"
+    __table_args__ = (
+        Index("ix_cotizacion_estatus_fecha", "estatus", "fecha", "id"),
+        {"mysql_engine": "InnoDB"},
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    requerimiento_id: Mapped[int] = mapped_column(ForeignKey("requerimiento.id"), nullable=False)
+    requerimiento_id: Mapped[int] = mapped_column(ForeignKey("requerimiento.id"), nullable=False, index=True)
     fecha: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     estatus: Mapped[str] = mapped_column(String(50), default="ABIERTA")  # ABIERTA | APROBADA | RECHAZADA
     proveedores: Mapped[list["CotizacionProveedor"]] = relationship(back_populates="cotizacion", cascade="all, delete-orphan")
@@ -73,13 +87,18 @@ class Cotizacion(Base):
 class CotizacionProveedor(Base):
     __tablename__ = "cotizacion_proveedor"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    cotizacion_id: Mapped[int] = mapped_column(ForeignKey("cotizacion.id"), nullable=False)
+    cotizacion_id: Mapped[int] = mapped_column(ForeignKey("cotizacion.id"), nullable=False, index=True)
     proveedor_id: Mapped[int] = mapped_column(ForeignKey("proveedor.id"), nullable=False)
     cotizacion: Mapped["Cotizacion"] = relationship(back_populates="proveedores")
     items: Mapped[list["CotItem"]] = relationship(back_populates="cot_proveedor", cascade="all, delete-orphan")
 
 class CotItem(Base):
     __tablename__ = "cot_item"
+    # Un precio por artículo y proveedor de la cotización (permite el upsert masivo)
+    __table_args__ = (
+        UniqueConstraint("cotizacion_proveedor_id", "articulo_id", name="uq_cot_item_proveedor_articulo"),
+        {"mysql_engine": "InnoDB"},
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     cotizacion_proveedor_id: Mapped[int] = mapped_column(ForeignKey("cotizacion_proveedor.id"), nullable=False)
     articulo_id: Mapped[int] = mapped_column(ForeignKey("articulo.id"), nullable=False)
@@ -90,18 +109,23 @@ class CotItem(Base):
 # ---- Órdenes de compra ----
 class OrdenCompra(Base):
     __tablename__ = "orden_compra"
+    __table_args__ = (
+        Index("ix_orden_compra_estatus_fecha", "estatus", "fecha", "id"),
+        {"mysql_engine": "InnoDB"},
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     proveedor_id: Mapped[int] = mapped_column(ForeignKey("proveedor.id"), nullable=False)
-    requerimiento_id: Mapped[int] = mapped_column(ForeignKey("requerimiento.id"), nullable=False)
-    cotizacion_id: Mapped[int] = mapped_column(ForeignKey("cotizacion.id"), nullable=False)
+    requerimiento_id: Mapped[int] = mapped_column(ForeignKey("requerimiento.id"), nullable=False, index=True)
+    cotizacion_id: Mapped[int] = mapped_column(ForeignKey("cotizacion.id"), nullable=False, index=True)
     fecha: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     estatus: Mapped[str] = mapped_column(String(50), default="BORRADOR")  # BORRADOR → EN_APROBACION → APROBADA...
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")  # +1 en cada cambio (ETag)
     items: Mapped[list["OCItem"]] = relationship(back_populates="oc", cascade="all, delete-orphan")
 
 class OCItem(Base):
     __tablename__ = "oc_item"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    orden_compra_id: Mapped[int] = mapped_column(ForeignKey("orden_compra.id"), nullable=False)
+    orden_compra_id: Mapped[int] = mapped_column(ForeignKey("orden_compra.id"), nullable=False, index=True)
     articulo_id: Mapped[int] = mapped_column(ForeignKey("articulo.id"), nullable=False)
     cantidad: Mapped[int] = mapped_column(Integer, nullable=False)
     precio_unit: Mapped[float] = mapped_column(Float, nullable=False)
@@ -119,12 +143,17 @@ class Perfil(Base):
 class UsuarioRol(Base):
     __tablename__ = "usuario_rol"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    usuario_id: Mapped[int] = mapped_column(Integer, nullable=False)  # id del usuario del sistema principal
+    usuario_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)  # id del usuario del sistema principal
     rol: Mapped[str] = mapped_column(String(50), nullable=False)
 
 # --- Permisos combinados ---
 class Permiso(Base):
     __tablename__ = "permiso"
+    # Cubre el join por rol de la carga de permisos (sin leer la tabla)
+    __table_args__ = (
+        Index("ix_permiso_rol_perfil", "rol", "perfil_id", "clasificador_id", "departamento_id"),
+        {"mysql_engine": "InnoDB"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     rol: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -140,6 +169,13 @@ class Permiso(Base):
 # ---- Presupuestos ----
 class Presupuesto(Base):
     __tablename__ = "presupuesto"
+    # Un presupuesto por clave y período; el índice también resuelve la búsqueda al aprobar
+    __table_args__ = (
+        UniqueConstraint(
+            "departamento_id", "clasificador_id", "unidad_negocio_id", "periodo", name="uq_presupuesto_clave"
+        ),
+        {"mysql_engine": "InnoDB"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     departamento_id: Mapped[int] = mapped_column(ForeignKey("departamento.id"), nullable=False)
@@ -154,19 +190,53 @@ class Presupuesto(Base):
     departamento: Mapped["Departamento"] = relationship()
     clasificador: Mapped["Clasificador"] = relationship()
     unidad_negocio: Mapped["UnidadNegocio"] = relationship()
+    saldo: Mapped["PresupuestoSaldo"] = relationship(back_populates="presupuesto", cascade="all, delete-orphan", uselist=False)
+
+# ---- Consumo de presupuesto ----
+# Totales acumulados por presupuesto; se actualizan en cada aprobación de OC
+# y en cada pago realizado, así leer lo disponible es una sola fila.
+class PresupuestoSaldo(Base):
+    __tablename__ = "presupuesto_saldo"
+
+    presupuesto_id: Mapped[int] = mapped_column(ForeignKey("presupuesto.id"), primary_key=True)
+    comprometido: Mapped[float] = mapped_column(Float, nullable=False, default=0)  # OCs aprobadas
+    pagado: Mapped[float] = mapped_column(Float, nullable=False, default=0)        # pagos realizados
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    fecha_actualizacion: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    presupuesto: Mapped["Presupuesto"] = relationship(back_populates="saldo")
+
+
+# Bitácora de movimientos que alimentan los saldos (permite auditar y recalcular)
+class MovimientoPresupuesto(Base):
+    __tablename__ = "movimiento_presupuesto"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    presupuesto_id: Mapped[int] = mapped_column(ForeignKey("presupuesto.id"), nullable=False, index=True)
+    tipo: Mapped[str] = mapped_column(String(20), nullable=False)  # COMPROMISO | PAGO
+    monto: Mapped[float] = mapped_column(Float, nullable=False)
+    orden_compra_id: Mapped[int] = mapped_column(ForeignKey("orden_compra.id"), nullable=True, index=True)
+    detalle_pago_id: Mapped[int] = mapped_column(ForeignKey("detalle_pago.id"), nullable=True, index=True)
+    fecha: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
 
 # ---- Programación de Pagos ----
 class ProgramacionPago(Base):
     __tablename__ = "programacion_pago"
+    __table_args__ = (
+        Index("ix_programacion_pago_estatus_fecha", "estatus", "fecha_creacion", "id"),
+        {"mysql_engine": "InnoDB"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    orden_compra_id: Mapped[int] = mapped_column(ForeignKey("orden_compra.id"), nullable=False)
+    orden_compra_id: Mapped[int] = mapped_column(ForeignKey("orden_compra.id"), nullable=False, index=True)
     estatus: Mapped[str] = mapped_column(String(50), default="BORRADOR")  # BORRADOR → PRIMERA_APROBACION → SEGUNDA_APROBACION → APROBADA
     fecha_creacion: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
     aprobador_1: Mapped[int] = mapped_column(Integer, nullable=True)  # ID del primer aprobador
     fecha_aprobacion_1: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     aprobador_2: Mapped[int] = mapped_column(Integer, nullable=True)  # ID del segundo aprobador
     fecha_aprobacion_2: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # +1 en cada cambio de la programación o de sus detalles (ETag)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     # Relaciones
     orden_compra: Mapped["OrdenCompra"] = relationship()
@@ -175,9 +245,14 @@ class ProgramacionPago(Base):
 
 class DetallePago(Base):
     __tablename__ = "detalle_pago"
+    # Pagos pendientes por fecha (cola y flujo de efectivo)
+    __table_args__ = (
+        Index("ix_detalle_pago_estatus_fecha", "estatus", "fecha_pago", "id"),
+        {"mysql_engine": "InnoDB"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    programacion_pago_id: Mapped[int] = mapped_column(ForeignKey("programacion_pago.id"), nullable=False)
+    programacion_pago_id: Mapped[int] = mapped_column(ForeignKey("programacion_pago.id"), nullable=False, index=True)
     unidad_negocio_id: Mapped[int] = mapped_column(ForeignKey("unidad_negocio.id"), nullable=False)
     fecha_pago: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     monto: Mapped[float] = mapped_column(Float, nullable=False)
@@ -191,3 +266,12 @@ class DetallePago(Base):
     unidad_negocio: Mapped["UnidadNegocio"] = relationship()
 
 
+# ---- Versiones de tablas ----
+# Contador por tabla que se incrementa en cada escritura; de aquí salen los
+# ETag / Last-Modified de los catálogos.
+class VersionTabla(Base):
+    __tablename__ = "version_tabla"
+
+    tabla: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    fecha_actualizacion: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,110 @@
+import threading
+import time
+
+from sqlalchemy import event, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+
+class PoolStats:
+    """Contadores del pool de conexiones: espera en checkout, timeouts e invalidaciones."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+
+    def record_wait(self, segundos: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += segundos
+            if segundos > self.wait_max:
+                self.wait_max = segundos
+
+    def incr(self, campo: str) -> None:
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def snapshot(self, pool) -> dict:
+        """Estado actual del pool más los contadores acumulados."""
+        data = {
+            "pool": type(pool).__name__,
+            "checkouts": self.checkouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "soft_invalidations": self.soft_invalidations,
+        }
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        return data
+
+
+class _TimedCheckout:
+    """Mide cuánto espera cada checkout por una conexión libre."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.incr("timeouts")
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - inicio)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    stats = PoolStats()
+
+
+class InstrumentedAsyncPool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+
+def es_sqlite_en_memoria(url: str) -> bool:
+    """`sqlite://`, `sqlite:///:memory:` o una URI con `mode=memory`."""
+    u = make_url(url)
+    return u.get_backend_name() == "sqlite" and (
+        u.database in (None, "", ":memory:") or u.query.get("mode") == "memory"
+    )
+
+
+def pool_kwargs(url: str, asincrono: bool = False) -> dict:
+    """Parámetros del pool tomados de Settings."""
+    if es_sqlite_en_memoria(url):
+        # Cada conexión sería otra base vacía: se deja el pool por defecto de
+        # SQLAlchemy, que reutiliza una sola conexión
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncPool if asincrono else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def instrument(engine, stats: PoolStats) -> None:
+    """Registra los eventos del pool que alimentan `stats`."""
+    event.listen(engine, "connect", lambda *a: stats.incr("connects"))
+    event.listen(engine, "invalidate", lambda *a: stats.incr("invalidations"))
+    event.listen(engine, "soft_invalidate", lambda *a: stats.incr("soft_invalidations"))
@@ -0,0 +1,113 @@
+import threading
+
+from sqlalchemy import event, lambda_stmt
+from sqlalchemy.engine.interfaces import CacheStats
+
+from app.core.respuestas import select_schema
+from app.db.models import (
+    Articulo,
+    Clasificador,
+    Departamento,
+    Presupuesto,
+    ReqItem,
+    Requerimiento,
+    UnidadNegocio,
+)
+from app.schemas.presupuestos import PresupuestoOut
+from app.schemas.requerimientos import ReqItemOut, ReqOut
+
+
+# ---------------------------------------------------------
+# 📚 CONSULTAS FRECUENTES
+# ---------------------------------------------------------
+# Los SELECT base se construyen una sola vez al importar. Las búsquedas por id
+# usan `lambda_stmt`: la construcción del statement y su cache key se
+# resuelven una vez y cada llamada solo cambia el parámetro, así el SQL
+# compilado sale del caché del engine.
+
+# Requerimiento con los nombres de sus catálogos (listado, detalle y transiciones)
+SELECT_REQ = (
+    select_schema(
+        ReqOut,
+        Requerimiento,
+        departamento_nombre=Departamento.nombre,
+        clasificador_nombre=Clasificador.nombre,
+        unidad_negocio_nombre=UnidadNegocio.nombre,
+    )
+    .join(Departamento, Departamento.id == Requerimiento.departamento_id)
+    .join(Clasificador, Clasificador.id == Requerimiento.clasificador_id)
+    .join(UnidadNegocio, UnidadNegocio.id == Requerimiento.unidad_negocio_id)
+)
+
+SELECT_REQ_ITEMS = select_schema(ReqItemOut, ReqItem, articulo_nombre=Articulo.nombre).join(
+    Articulo, Articulo.id == ReqItem.articulo_id
+)
+
+# Presupuesto con los nombres de sus catálogos
+SELECT_PRESUPUESTO = (
+    select_schema(
+        PresupuestoOut,
+        Presupuesto,
+        departamento_nombre=Departamento.nombre,
+        clasificador_nombre=Clasificador.nombre,
+        unidad_negocio_nombre=UnidadNegocio.nombre,
+    )
+    .join(Departamento, Departamento.id == Presupuesto.departamento_id)
+    .join(Clasificador, Clasificador.id == Presupuesto.clasificador_id)
+    .join(UnidadNegocio, UnidadNegocio.id == Presupuesto.unidad_negocio_id)
+)
+
+
+def req_con_nombres(req_id: int):
+    return lambda_stmt(lambda: SELECT_REQ.where(Requerimiento.id == req_id))
+
+
+def req_items(req_id: int):
+    return lambda_stmt(lambda: SELECT_REQ_ITEMS.where(ReqItem.requerimiento_id == req_id))
+
+
+def presupuesto_con_nombres(presupuesto_id: int):
+    return lambda_stmt(lambda: SELECT_PRESUPUESTO.where(Presupuesto.id == presupuesto_id))
+
+
+# ---------------------------------------------------------
+# 📈 ACIERTOS DEL CACHÉ DE SQL COMPILADO
+# ---------------------------------------------------------
+class StatementCacheStats:
+    """Cuántas ejecuciones reutilizaron SQL compilado del caché del engine."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sin_cache = 0  # statements sin cache key (texto plano, DDL)
+
+    def record(self, cache_hit) -> None:
+        with self._lock:
+            if cache_hit is CacheStats.CACHE_HIT:
+                self.hits += 1
+            elif cache_hit is CacheStats.CACHE_MISS:
+                self.misses += 1
+            else:
+                self.sin_cache += 1
+
+    def snapshot(self, engine) -> dict:
+        total = self.hits + self.misses
+        cache = engine._compiled_cache
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sin_cache": self.sin_cache,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "entradas": len(cache) if cache is not None else 0,
+            "capacidad": cache.capacity if cache is not None else 0,
+        }
+
+
+def instrument_cache(engine, stats: StatementCacheStats) -> None:
+    """Registra en `stats` si cada ejecución encontró su SQL compilado en caché."""
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            stats.record(context.cache_hit)
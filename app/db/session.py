@@ -1,22 +1,81 @@
-import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.instrumentacion import instrumentar_consultas
 from app.db.base import Base
+from app.db.pool import InstrumentedAsyncPool, InstrumentedQueuePool, instrument, pool_kwargs
+from app.db.queries import StatementCacheStats, instrument_cache
 
-# Leer URL desde variable de entorno (ya embebida en el contenedor)
-DATABASE_URL = os.getenv("DATABASE_URL")
+# URL desde la configuración (variable de entorno / .env, ya embebida en el contenedor)
+DATABASE_URL = settings.DATABASE_URL
 
-# Crear motor dinámico
+# Crear motor dinámico (tamaño, reciclado y liveness del pool vienen de Settings)
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,  # Verifica la conexión antes de usarla
     connect_args={"charset": "utf8mb4"} if DATABASE_URL.startswith("mysql") else {},
-    echo=False
+    echo=False,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    **pool_kwargs(DATABASE_URL),
 )
+instrument(engine, InstrumentedQueuePool.stats)
+cache_stats = StatementCacheStats()
+instrument_cache(engine, cache_stats)
+instrumentar_consultas(engine)
 
 # Crear sesión
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+
+# ---- Motor async (opcional, se activa con DB_ASYNC=true) ----
+def async_url(url: str) -> str:
+    """Cambia el driver sync de la URL por su equivalente async."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    driver = {"mysql": "aiomysql", "sqlite": "aiosqlite"}.get(dialect)
+    if driver is None:
+        raise ValueError(f"No hay driver async configurado para '{dialect}'; define ASYNC_DATABASE_URL")
+    return f"{dialect}+{driver}://{rest}"
+
+
+async_engine = None
+AsyncSessionLocal = None
+async_cache_stats = None
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_url(DATABASE_URL),
+        connect_args={"charset": "utf8mb4"} if DATABASE_URL.startswith("mysql") else {},
+        echo=False,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        **pool_kwargs(DATABASE_URL, asincrono=True),
+    )
+    instrument(async_engine.sync_engine, InstrumentedAsyncPool.stats)
+    async_cache_stats = StatementCacheStats()
+    instrument_cache(async_engine.sync_engine, async_cache_stats)
+    instrumentar_consultas(async_engine.sync_engine)
+    # expire_on_commit=False: en async no se puede recargar un atributo de forma implícita
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_status() -> dict:
+    """Estado y métricas de los pools de conexiones activos."""
+    data = {"sync": InstrumentedQueuePool.stats.snapshot(engine.pool)}
+    if async_engine is not None:
+        data["async"] = InstrumentedAsyncPool.stats.snapshot(async_engine.sync_engine.pool)
+    return data
+
+def sql_cache_status() -> dict:
+    """Aciertos del caché de SQL compilado por engine."""
+    data = {"sync": cache_stats.snapshot(engine)}
+    if async_engine is not None:
+        data["async"] = async_cache_stats.snapshot(async_engine.sync_engine)
+    return data
+
+
 # Inicializar las tablas
 def init_db():
     from app.db import models  # noqa
@@ -29,3 +88,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependencia async para FastAPI (solo con DB_ASYNC=true)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
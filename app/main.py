@@ -1,18 +1,36 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.config import settings
 from app.db.session import init_db
+from app.core.busqueda import indice_articulos
+from app.core.compresion import CompresionMiddleware
+from app.core.instrumentacion import InstrumentacionMiddleware
+from app.core.respuestas import JSONRapido
 from app.api.v1.catalogos import router as catalogos_router
-from app.api.v1.requerimientos import router as reqs_router
+from app.api.v1.requerimientos import router as reqs_router, async_router as reqs_async_router
 from app.api.v1.cotizaciones import router as cot_router
-from app.api.v1.ocs import router as oc_router
+from app.api.v1.ocs import router as oc_router, async_router as oc_async_router
 from app.api.v1.auth import router as auth_router
-from sqlalchemy import text
-from app.db.session import SessionLocal
 from app.api.v1.permisos import router as permisos_router
-from app.api.v1.presupuestos import router as presupuestos_router
-from app.api.v1.pagos import router as pagos_router
+from app.api.v1.presupuestos import router as presupuestos_router, async_router as presupuestos_async_router
+from app.api.v1.pagos import router as pagos_router, async_router as pagos_async_router
+from app.api.v1.exportaciones import router as exportaciones_router
+from app.api.v1.importaciones import router as importaciones_router
+from app.api.v1.internal import router as internal_router
+from app.api.v1.metricas import router as metricas_router
+from app.api.v1.health import router as health_router
 
-app = FastAPI(title="Compras API")
+# Respuestas JSON con orjson por defecto (más rápido y compacto que json.dumps)
+app = FastAPI(title="Compras API", default_response_class=JSONRapido)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompresionMiddleware,
+        minimo=settings.COMPRESSION_MIN_SIZE,
+        nivel_gzip=settings.COMPRESSION_GZIP_LEVEL,
+        calidad_brotli=settings.COMPRESSION_BROTLI_QUALITY,
+        usar_brotli=settings.COMPRESSION_BROTLI,
+    )
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,30 +40,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Al final para quedar por fuera: la latencia medida incluye CORS y compresión
+if settings.INSTRUMENTATION_ENABLED:
+    app.add_middleware(InstrumentacionMiddleware)
+
 @app.on_event("startup")
 def startup():
-    init_db()
-
-
-@app.get("/health")
-def health_check():
-    db = SessionLocal()
-    try:
-        # Probar conexión a MySQL
-        version = db.execute(text("SELECT VERSION();")).fetchone()
-        db_status = "connected"
-        mysql_version = version[0]
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-        mysql_version = None
-    finally:
-        db.close()
-
-    return {
-        "status": "ok",
-        "database": db_status,
-        "mysql_version": mysql_version
-    }
+    # Sin DDL al arrancar: el esquema lo aplican las migraciones
+    if settings.DB_CREATE_ALL:
+        init_db()
+    if settings.SEARCH_WARMUP:
+        indice_articulos.precargar()
+
+
+app.include_router(health_router)
+
+if settings.DB_ASYNC:
+    # Las variantes async se registran antes, así atienden esas rutas en lugar de las sync
+    app.include_router(reqs_async_router)
+    app.include_router(oc_async_router)
+    app.include_router(presupuestos_async_router)
+    app.include_router(pagos_async_router)
 
 app.include_router(auth_router)
 app.include_router(catalogos_router)
@@ -55,6 +70,10 @@ app.include_router(oc_router)
 app.include_router(permisos_router)
 app.include_router(presupuestos_router)
 app.include_router(pagos_router)
+app.include_router(exportaciones_router)
+app.include_router(importaciones_router)
+app.include_router(internal_router)
+app.include_router(metricas_router)
 
 
 
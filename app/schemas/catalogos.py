@@ -42,6 +42,12 @@ class ArticuloOut(BaseModel):
     class Config:
         from_attributes = True
 
+class ArticuloBusquedaOut(BaseModel):
+    id: int
+    nombre: str
+    clasificador_id: Optional[int] = None
+    puntaje: float  # mayor es mejor; >= 1 cuando el nombre empieza con la consulta
+
 
 # ---- DEPARTAMENTO ----
 class DepartamentoCreate(BaseModel):
@@ -53,3 +59,18 @@ class DepartamentoOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# ---- IMPORTACIÓN MASIVA ----
+class ErrorImportacion(BaseModel):
+    fila: int   # número de fila del archivo (en CSV cuenta el encabezado)
+    error: str
+
+class ImportacionOut(BaseModel):
+    catalogo: str
+    leidas: int        # registros leídos del archivo
+    insertadas: int
+    duplicadas: int    # ya existían (en la base o antes en el archivo)
+    con_error: int
+    errores: list[ErrorImportacion]  # primeros IMPORT_MAX_ERRORS errores
+    simulada: bool = False
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, conint, condecimal
-from typing import List
+from typing import List, Optional
 
 class CotCreate(BaseModel):
     requerimiento_id: int
@@ -24,6 +24,15 @@ class CotItemIn(BaseModel):
     articulo_id: int
     precio_unit: condecimal(ge=0)  # cantidad se toma del requerimiento
 
+class PrecioProveedorIn(BaseModel):
+    proveedor_id: int
+    articulo_id: int
+    precio_unit: condecimal(ge=0)
+
+class CargaPreciosOut(BaseModel):
+    lineas: int       # líneas escritas (insertadas o actualizadas)
+    proveedores: int  # proveedores distintos en la carga
+
 class CotComparativo(BaseModel):
     # Estructura simple para ver precios por proveedor
     items: List[dict]
@@ -35,3 +44,28 @@ class SeleccionLinea(BaseModel):
 
 class GenerarOCsResponse(BaseModel):
     oc_ids: List[int]
+
+class Adjudicacion(BaseModel):
+    max_proveedores: Optional[int]
+    heuristica: bool                # con límite y demasiadas combinaciones: voraz, sin garantía de óptimo
+    proveedores: List[int]          # proveedores que ganan al menos una línea
+    total: float
+    seleccion: List[SeleccionLinea] # se puede enviar tal cual a /ocs/generar-ocs/{cot_id}
+    sin_cubrir: List[int]           # artículos que ningún proveedor elegido cotizó
+
+class CotAnalisis(BaseModel):
+    # Matriz artículo × proveedor (mismo orden que `articulos` y `proveedores`)
+    cotizacion_id: int
+    articulos: List[int]
+    proveedores: List[int]
+    cantidades: List[int]
+    precios: List[List[Optional[float]]]
+    # Por artículo
+    mejor_precio: List[Optional[float]]
+    mejor_proveedor: List[Optional[int]]
+    sin_cotizar: List[int]
+    # Por proveedor
+    totales_proveedor: List[float]
+    articulos_cotizados: List[int]
+    articulos_faltantes: List[int]
+    adjudicacion: Adjudicacion
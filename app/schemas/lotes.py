@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+
+# ---- CAMBIO DE ESTATUS EN LOTE ----
+class TransicionLoteIn(BaseModel):
+    ids: List[int] = Field(..., min_length=1, description="IDs a cambiar de estatus")
+    estatus: str = Field(..., description="Estatus destino")
+
+
+class TransicionPagosLoteIn(TransicionLoteIn):
+    aprobador_id: int = Field(..., description="ID del usuario que aprueba")
+
+
+class ResultadoTransicion(BaseModel):
+    id: int
+    ok: bool
+    estatus: Optional[str] = None  # estatus final (o el actual si no se aplicó)
+    error: Optional[str] = None
+
+
+class TransicionLoteOut(BaseModel):
+    estatus: str
+    aplicados: int
+    resultados: List[ResultadoTransicion]  # en el mismo orden que los ids recibidos
+
+
+# ---- COLA DE TRABAJO ----
+class ItemCola(BaseModel):
+    id: int
+    estatus: str
+    fecha: datetime
+
+    class Config:
+        from_attributes = True
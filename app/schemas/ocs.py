@@ -41,3 +41,18 @@ class SeleccionLinea(BaseModel):
 
 class GenerarOCsResponse(BaseModel):
     oc_ids: List[int]
+
+
+class GenerarOCsLote(BaseModel):
+    cotizacion_id: int
+    seleccion: List[SeleccionLinea]
+
+
+class GenerarOCsResultado(BaseModel):
+    cotizacion_id: int
+    oc_ids: List[int]
+
+
+class GenerarOCsLoteResponse(BaseModel):
+    resultados: List[GenerarOCsResultado]
+    oc_ids: List[int]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 
 
@@ -62,3 +62,23 @@ class MarcarPagadoIn(BaseModel):
     """Esquema para marcar un pago como pagado"""
     referencia: Optional[str] = Field(None, description="Número de referencia o comprobante")
     observaciones: Optional[str] = Field(None, description="Observaciones del pago")
+
+
+# ---- FLUJO DE EFECTIVO ----
+class SerieFlujo(BaseModel):
+    """Montos de una unidad de negocio, alineados con `FlujoCajaOut.periodos`"""
+    unidad_negocio_id: int
+    unidad_negocio_nombre: Optional[str]
+    pendiente: List[float]
+    pagado: List[float]
+
+
+class FlujoCajaOut(BaseModel):
+    """Proyección de flujo en formato columnar: cada lista tiene un valor por período"""
+    granularidad: str
+    fecha_desde: date
+    fecha_hasta: date
+    periodos: List[date]  # inicio de cada período (día, lunes de la semana o día 1 del mes)
+    pendiente: List[float]
+    pagado: List[float]
+    series: List[SerieFlujo]
@@ -37,3 +37,27 @@ class PresupuestoOut(BaseModel):
 class PresupuestoUpdate(BaseModel):
     monto: Optional[float] = Field(None, gt=0, description="Nuevo monto del presupuesto")
     descripcion: Optional[str] = Field(None, description="Nueva descripción")
+
+
+# ---- CONSUMO ----
+class ConsumoPresupuestoOut(BaseModel):
+    presupuesto_id: int
+    departamento_id: int
+    clasificador_id: int
+    unidad_negocio_id: int
+    periodo: str
+    monto: float
+    comprometido: float  # OCs aprobadas
+    pagado: float        # pagos realizados
+    por_pagar: float     # comprometido - pagado
+    disponible: float    # monto - comprometido
+    version: int
+
+    class Config:
+        from_attributes = True
+
+
+class RecalculoConsumoOut(BaseModel):
+    compromisos_registrados: int
+    pagos_registrados: int
+    presupuestos: int
@@ -0,0 +1,204 @@
+"""esquema inicial
+
+Tablas tal como las creaba `Base.metadata.create_all` al arrancar. En bases
+que ya existían (creadas por create_all) las tablas presentes se omiten, así
+que `alembic upgrade head` funciona igual en una base nueva que en producción.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS = [
+    "clasificador", "departamento", "perfil", "proveedor", "unidad_negocio", "usuario_rol",
+    "articulo", "permiso", "presupuesto", "requerimiento", "cotizacion", "req_item",
+    "cotizacion_proveedor", "orden_compra", "cot_item", "oc_item", "programacion_pago", "detalle_pago",
+]
+
+
+def _crear(existentes: set, nombre: str, *columnas) -> None:
+    if nombre in existentes:
+        return
+    op.create_table(nombre, *columnas, sa.PrimaryKeyConstraint("id"), mysql_engine="InnoDB")
+    op.create_index(op.f(f"ix_{nombre}_id"), nombre, ["id"], unique=False)
+
+
+def _tablas_existentes() -> set:
+    # En modo --sql no hay conexión: se genera el DDL completo
+    if context.is_offline_mode():
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    existentes = _tablas_existentes()
+
+    # ---- Catálogos ----
+    _crear(existentes, "clasificador",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=100), nullable=False),
+        sa.UniqueConstraint("nombre"),
+    )
+    _crear(existentes, "departamento",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=255), nullable=False),
+        sa.UniqueConstraint("nombre"),
+    )
+    _crear(existentes, "perfil",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=100), nullable=False),
+        sa.UniqueConstraint("nombre"),
+    )
+    _crear(existentes, "proveedor",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=255), nullable=False),
+    )
+    _crear(existentes, "unidad_negocio",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=150), nullable=False),
+        sa.UniqueConstraint("nombre"),
+    )
+    _crear(existentes, "usuario_rol",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("rol", sa.String(length=50), nullable=False),
+    )
+    _crear(existentes, "articulo",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nombre", sa.String(length=150), nullable=False),
+        sa.Column("clasificador_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["clasificador_id"], ["clasificador.id"]),
+    )
+
+    # ---- Permisos y presupuestos ----
+    _crear(existentes, "permiso",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("rol", sa.String(length=50), nullable=False),
+        sa.Column("clasificador_id", sa.Integer(), nullable=False),
+        sa.Column("departamento_id", sa.Integer(), nullable=False),
+        sa.Column("perfil_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["clasificador_id"], ["clasificador.id"]),
+        sa.ForeignKeyConstraint(["departamento_id"], ["departamento.id"]),
+        sa.ForeignKeyConstraint(["perfil_id"], ["perfil.id"]),
+    )
+    _crear(existentes, "presupuesto",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("departamento_id", sa.Integer(), nullable=False),
+        sa.Column("clasificador_id", sa.Integer(), nullable=False),
+        sa.Column("unidad_negocio_id", sa.Integer(), nullable=False),
+        sa.Column("monto", sa.Float(), nullable=False),
+        sa.Column("periodo", sa.String(length=50), nullable=False),
+        sa.Column("descripcion", sa.String(length=255), nullable=True),
+        sa.Column("fecha_creacion", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["clasificador_id"], ["clasificador.id"]),
+        sa.ForeignKeyConstraint(["departamento_id"], ["departamento.id"]),
+        sa.ForeignKeyConstraint(["unidad_negocio_id"], ["unidad_negocio.id"]),
+    )
+
+    # ---- Requerimientos y cotizaciones ----
+    _crear(existentes, "requerimiento",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("departamento_id", sa.Integer(), nullable=False),
+        sa.Column("clasificador_id", sa.Integer(), nullable=False),
+        sa.Column("unidad_negocio_id", sa.Integer(), nullable=False),
+        sa.Column("fecha", sa.DateTime(), nullable=False),
+        sa.Column("estatus", sa.String(length=50), nullable=False),
+        sa.ForeignKeyConstraint(["clasificador_id"], ["clasificador.id"]),
+        sa.ForeignKeyConstraint(["departamento_id"], ["departamento.id"]),
+        sa.ForeignKeyConstraint(["unidad_negocio_id"], ["unidad_negocio.id"]),
+    )
+    _crear(existentes, "cotizacion",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("requerimiento_id", sa.Integer(), nullable=False),
+        sa.Column("fecha", sa.DateTime(), nullable=False),
+        sa.Column("estatus", sa.String(length=50), nullable=False),
+        sa.ForeignKeyConstraint(["requerimiento_id"], ["requerimiento.id"]),
+    )
+    _crear(existentes, "req_item",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("requerimiento_id", sa.Integer(), nullable=False),
+        sa.Column("articulo_id", sa.Integer(), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["articulo_id"], ["articulo.id"]),
+        sa.ForeignKeyConstraint(["requerimiento_id"], ["requerimiento.id"]),
+    )
+    _crear(existentes, "cotizacion_proveedor",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cotizacion_id", sa.Integer(), nullable=False),
+        sa.Column("proveedor_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["cotizacion_id"], ["cotizacion.id"]),
+        sa.ForeignKeyConstraint(["proveedor_id"], ["proveedor.id"]),
+    )
+
+    # ---- Órdenes de compra ----
+    _crear(existentes, "orden_compra",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("proveedor_id", sa.Integer(), nullable=False),
+        sa.Column("requerimiento_id", sa.Integer(), nullable=False),
+        sa.Column("cotizacion_id", sa.Integer(), nullable=False),
+        sa.Column("fecha", sa.DateTime(), nullable=False),
+        sa.Column("estatus", sa.String(length=50), nullable=False),
+        sa.ForeignKeyConstraint(["cotizacion_id"], ["cotizacion.id"]),
+        sa.ForeignKeyConstraint(["proveedor_id"], ["proveedor.id"]),
+        sa.ForeignKeyConstraint(["requerimiento_id"], ["requerimiento.id"]),
+    )
+    _crear(existentes, "cot_item",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cotizacion_proveedor_id", sa.Integer(), nullable=False),
+        sa.Column("articulo_id", sa.Integer(), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+        sa.Column("precio_unit", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["articulo_id"], ["articulo.id"]),
+        sa.ForeignKeyConstraint(["cotizacion_proveedor_id"], ["cotizacion_proveedor.id"]),
+    )
+    _crear(existentes, "oc_item",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("orden_compra_id", sa.Integer(), nullable=False),
+        sa.Column("articulo_id", sa.Integer(), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+        sa.Column("precio_unit", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["articulo_id"], ["articulo.id"]),
+        sa.ForeignKeyConstraint(["orden_compra_id"], ["orden_compra.id"]),
+    )
+
+    # ---- Pagos ----
+    _crear(existentes, "programacion_pago",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("orden_compra_id", sa.Integer(), nullable=False),
+        sa.Column("estatus", sa.String(length=50), nullable=False),
+        sa.Column("fecha_creacion", sa.DateTime(), nullable=False),
+        sa.Column("aprobador_1", sa.Integer(), nullable=True),
+        sa.Column("fecha_aprobacion_1", sa.DateTime(), nullable=True),
+        sa.Column("aprobador_2", sa.Integer(), nullable=True),
+        sa.Column("fecha_aprobacion_2", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["orden_compra_id"], ["orden_compra.id"]),
+    )
+    _crear(existentes, "detalle_pago",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("programacion_pago_id", sa.Integer(), nullable=False),
+        sa.Column("unidad_negocio_id", sa.Integer(), nullable=False),
+        sa.Column("fecha_pago", sa.DateTime(), nullable=False),
+        sa.Column("monto", sa.Float(), nullable=False),
+        sa.Column("estatus", sa.String(length=50), nullable=False),
+        sa.Column("fecha_pago_realizado", sa.DateTime(), nullable=True),
+        sa.Column("referencia", sa.String(length=255), nullable=True),
+        sa.Column("observaciones", sa.String(length=500), nullable=True),
+        sa.ForeignKeyConstraint(["programacion_pago_id"], ["programacion_pago.id"]),
+        sa.ForeignKeyConstraint(["unidad_negocio_id"], ["unidad_negocio.id"]),
+    )
+
+
+def downgrade() -> None:
+    for nombre in reversed(TABLAS):
+        op.drop_table(nombre)
@@ -0,0 +1,122 @@
+"""bitácora de presupuesto e índices de consulta
+
+- cot_item: unique (cotizacion_proveedor_id, articulo_id) para el upsert de
+  precios; también sirve de índice por cotizacion_proveedor_id.
+- presupuesto_saldo y movimiento_presupuesto (consumo de presupuesto).
+- presupuesto: unique (departamento, clasificador, unidad de negocio, periodo).
+  Falla si ya hay presupuestos duplicados; hay que depurarlos antes.
+- Índices por FK usados en joins y filtros de los routers, el índice cubriente
+  de permisos por rol y los (estatus, fecha, id) de las colas de trabajo.
+
+Los objetos que ya existan (bases creadas con create_all) se omiten.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ("ix_articulo_clasificador_id", "articulo", ["clasificador_id"]),
+    ("ix_req_item_requerimiento_id", "req_item", ["requerimiento_id"]),
+    ("ix_cotizacion_requerimiento_id", "cotizacion", ["requerimiento_id"]),
+    ("ix_cotizacion_proveedor_cotizacion_id", "cotizacion_proveedor", ["cotizacion_id"]),
+    ("ix_orden_compra_requerimiento_id", "orden_compra", ["requerimiento_id"]),
+    ("ix_orden_compra_cotizacion_id", "orden_compra", ["cotizacion_id"]),
+    ("ix_oc_item_orden_compra_id", "oc_item", ["orden_compra_id"]),
+    ("ix_programacion_pago_orden_compra_id", "programacion_pago", ["orden_compra_id"]),
+    ("ix_detalle_pago_programacion_pago_id", "detalle_pago", ["programacion_pago_id"]),
+    ("ix_usuario_rol_usuario_id", "usuario_rol", ["usuario_id"]),
+    ("ix_permiso_rol_perfil", "permiso", ["rol", "perfil_id", "clasificador_id", "departamento_id"]),
+    ("ix_requerimiento_estatus_fecha", "requerimiento", ["estatus", "fecha", "id"]),
+    ("ix_cotizacion_estatus_fecha", "cotizacion", ["estatus", "fecha", "id"]),
+    ("ix_orden_compra_estatus_fecha", "orden_compra", ["estatus", "fecha", "id"]),
+    ("ix_programacion_pago_estatus_fecha", "programacion_pago", ["estatus", "fecha_creacion", "id"]),
+    ("ix_detalle_pago_estatus_fecha", "detalle_pago", ["estatus", "fecha_pago", "id"]),
+]
+
+# (nombre, tabla, columnas)
+UNICOS = [
+    ("uq_cot_item_proveedor_articulo", "cot_item", ["cotizacion_proveedor_id", "articulo_id"]),
+    ("uq_presupuesto_clave", "presupuesto", ["departamento_id", "clasificador_id", "unidad_negocio_id", "periodo"]),
+]
+
+
+def _nombres(tabla: str) -> set:
+    """Índices y constraints únicos que ya tiene la tabla (ninguno en modo --sql)."""
+    if context.is_offline_mode():
+        return set()
+    insp = sa.inspect(op.get_bind())
+    return {i["name"] for i in insp.get_indexes(tabla)} | {u["name"] for u in insp.get_unique_constraints(tabla)}
+
+
+def upgrade() -> None:
+    existentes = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "presupuesto_saldo" not in existentes:
+        op.create_table(
+            "presupuesto_saldo",
+            sa.Column("presupuesto_id", sa.Integer(), nullable=False),
+            sa.Column("comprometido", sa.Float(), nullable=False),
+            sa.Column("pagado", sa.Float(), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("fecha_actualizacion", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["presupuesto_id"], ["presupuesto.id"]),
+            sa.PrimaryKeyConstraint("presupuesto_id"),
+            mysql_engine="InnoDB",
+        )
+    if "movimiento_presupuesto" not in existentes:
+        op.create_table(
+            "movimiento_presupuesto",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("presupuesto_id", sa.Integer(), nullable=False),
+            sa.Column("tipo", sa.String(length=20), nullable=False),
+            sa.Column("monto", sa.Float(), nullable=False),
+            sa.Column("orden_compra_id", sa.Integer(), nullable=True),
+            sa.Column("detalle_pago_id", sa.Integer(), nullable=True),
+            sa.Column("fecha", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["detalle_pago_id"], ["detalle_pago.id"]),
+            sa.ForeignKeyConstraint(["orden_compra_id"], ["orden_compra.id"]),
+            sa.ForeignKeyConstraint(["presupuesto_id"], ["presupuesto.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            mysql_engine="InnoDB",
+        )
+        op.create_index("ix_movimiento_presupuesto_id", "movimiento_presupuesto", ["id"])
+        op.create_index("ix_movimiento_presupuesto_presupuesto_id", "movimiento_presupuesto", ["presupuesto_id"])
+        op.create_index("ix_movimiento_presupuesto_orden_compra_id", "movimiento_presupuesto", ["orden_compra_id"])
+        op.create_index("ix_movimiento_presupuesto_detalle_pago_id", "movimiento_presupuesto", ["detalle_pago_id"])
+
+    for nombre, tabla, columnas in UNICOS:
+        if nombre not in _nombres(tabla):
+            # batch: en SQLite el constraint requiere recrear la tabla
+            with op.batch_alter_table(tabla) as batch:
+                batch.create_unique_constraint(nombre, columnas)
+
+    # Índice previo de la clave de presupuesto, ahora cubierto por uq_presupuesto_clave
+    if "ix_presupuesto_clave" in _nombres("presupuesto"):
+        op.drop_index("ix_presupuesto_clave", table_name="presupuesto")
+
+    for nombre, tabla, columnas in INDICES:
+        if nombre not in _nombres(tabla):
+            op.create_index(nombre, tabla, columnas)
+
+
+def downgrade() -> None:
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
+    for nombre, tabla, _ in reversed(UNICOS):
+        with op.batch_alter_table(tabla) as batch:
+            batch.drop_constraint(nombre, type_="unique")
+    op.drop_table("movimiento_presupuesto")
+    op.drop_table("presupuesto_saldo")
@@ -0,0 +1,65 @@
+"""versiones para ETag
+
+- orden_compra.version y programacion_pago.version: +1 en cada cambio de la
+  fila (ETag de los detalles).
+- version_tabla: contador por tabla de catálogo (ETag de los listados), con
+  una fila inicial por catálogo.
+
+Los objetos que ya existan (bases creadas con create_all) se omiten.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS_CON_VERSION = ["orden_compra", "programacion_pago"]
+
+# Catálogos con listados cacheables
+CATALOGOS = ["unidad_negocio", "clasificador", "articulo", "departamento", "proveedor", "perfil"]
+
+
+def _columnas(tabla: str) -> set:
+    if context.is_offline_mode():
+        return set()
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(tabla)}
+
+
+def upgrade() -> None:
+    for tabla in TABLAS_CON_VERSION:
+        if "version" not in _columnas(tabla):
+            op.add_column(tabla, sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+
+    existentes = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+    if "version_tabla" not in existentes:
+        version_tabla = op.create_table(
+            "version_tabla",
+            sa.Column("tabla", sa.String(length=64), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("fecha_actualizacion", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("tabla"),
+            mysql_engine="InnoDB",
+        )
+        ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+        op.bulk_insert(
+            version_tabla,
+            [{"tabla": t, "version": 0, "fecha_actualizacion": ahora} for t in CATALOGOS],
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("version_tabla")
+    for tabla in reversed(TABLAS_CON_VERSION):
+        with op.batch_alter_table(tabla) as batch:
+            batch.drop_column("version")
@@ -0,0 +1,43 @@
+"""índices por nombre de artículo y proveedor
+
+La importación masiva de catálogos descarta los nombres existentes con
+`nombre IN (...)` por bloque; sin índice cada bloque recorre la tabla.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ("ix_articulo_nombre", "articulo", ["nombre"]),
+    ("ix_proveedor_nombre", "proveedor", ["nombre"]),
+]
+
+
+def _indices(tabla: str) -> set:
+    if context.is_offline_mode():
+        return set()
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(tabla)}
+
+
+def upgrade() -> None:
+    for nombre, tabla, columnas in INDICES:
+        if nombre not in _indices(tabla):
+            op.create_index(nombre, tabla, columnas)
+
+
+def downgrade() -> None:
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
@@ -0,0 +1,51 @@
+"""índices por lower(nombre) de artículo y proveedor
+
+La importación masiva descarta los nombres existentes sin distinguir
+mayúsculas (`lower(nombre) IN (...)` por bloque); con el índice de 0004
+sobre `nombre` esa consulta recorría la tabla.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla)
+INDICES = [
+    ("ix_articulo_nombre_lower", "articulo"),
+    ("ix_proveedor_nombre_lower", "proveedor"),
+]
+
+
+def _indices(tabla: str) -> set:
+    if context.is_offline_mode():
+        return set()
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        # El inspector de SQLite omite los índices por expresión
+        filas = bind.execute(
+            sa.text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"), {"t": tabla}
+        )
+        return set(filas.scalars())
+    return {i["name"] for i in sa.inspect(bind).get_indexes(tabla)}
+
+
+def upgrade() -> None:
+    for nombre, tabla in INDICES:
+        if nombre not in _indices(tabla):
+            op.create_index(nombre, tabla, [sa.func.lower(sa.column("nombre"))])
+
+
+def downgrade() -> None:
+    for nombre, tabla in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
@@ -0,0 +1,4 @@
+import os
+
+# Base en memoria: las pruebas no deben tocar compras.db
+os.environ.setdefault("DATABASE_URL", "sqlite://")
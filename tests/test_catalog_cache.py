@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.catalog_cache import CatalogCache
+from app.db.base import Base
+from app.db.models import Proveedor
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add_all([Proveedor(id=i, nombre=f"Proveedor {i}") for i in range(1, 101)])
+        s.commit()
+        s.consultas = []
+        event.listen(engine, "before_cursor_execute", lambda c, cur, sql, *a: s.consultas.append(sql))
+        yield s
+
+
+def test_id_conocido_sale_del_cache(db):
+    cache = CatalogCache(ttl=60, articulos_max=10)
+    assert cache.nombre(db, Proveedor, 5) == "Proveedor 5"
+    db.consultas.clear()
+    assert cache.nombre(db, Proveedor, 7) == "Proveedor 7"
+    assert db.consultas == []
+
+
+def test_id_invalido_no_recarga_la_tabla(db):
+    cache = CatalogCache(ttl=60, articulos_max=10)
+    cache.nombres(db, Proveedor)
+    for _ in range(3):
+        db.consultas.clear()
+        assert not cache.existe(db, Proveedor, 999)
+        # Una sola consulta por llave primaria, no el SELECT id, nombre de toda la tabla
+        assert len(db.consultas) == 1 and "WHERE" in db.consultas[0]
+
+
+def test_id_nuevo_se_agrega_al_mapa(db):
+    cache = CatalogCache(ttl=60, articulos_max=10)
+    cache.nombres(db, Proveedor)
+    db.add(Proveedor(id=101, nombre="Nuevo"))  # p. ej. creado por otro proceso
+    db.commit()
+    db.consultas.clear()
+    assert cache.nombre(db, Proveedor, 101) == "Nuevo"
+    assert len(db.consultas) == 1
+    db.consultas.clear()
+    assert cache.nombre(db, Proveedor, 101) == "Nuevo"
+    assert cache.nombre(db, Proveedor, 1) == "Proveedor 1"
+    assert db.consultas == []
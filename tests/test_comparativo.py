@@ -0,0 +1,63 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from app.core.comparativo import MatrizPrecios
+
+
+def _matriz(precios, cantidades=None) -> MatrizPrecios:
+    precios = np.array(precios, dtype=np.float64)
+    a, p = precios.shape
+    cantidades = np.ones(a) if cantidades is None else np.array(cantidades, dtype=np.float64)
+    return MatrizPrecios(np.arange(1, a + 1), np.arange(101, 101 + p), cantidades, precios)
+
+
+def _fuerza_bruta(m: MatrizPrecios, k: int) -> tuple[int, float]:
+    """(líneas sin cubrir, total) de la mejor combinación de a lo más k proveedores."""
+    llenos = np.where(np.isnan(m.precios), np.inf, m.precios)
+    mejor = (math.inf, math.inf)
+    for r in range(1, k + 1):
+        for combo in itertools.combinations(range(llenos.shape[1]), r):
+            precio = llenos[:, combo].min(axis=1)
+            cubierta = np.isfinite(precio)
+            mejor = min(mejor, ((~cubierta).sum(), float((precio[cubierta] * m.cantidades[cubierta]).sum())))
+    return mejor
+
+
+def test_adjudicacion_exacta_donde_la_voraz_falla():
+    # A=[1,100], B=[100,1], C=[50,50]: con un proveedor gana C (100), no B (101)
+    m = _matriz([[1, 100, 50], [100, 1, 50]])
+    adj = m.analizar(max_proveedores=1)["adjudicacion"]
+    assert adj["proveedores"] == [103]
+    assert adj["total"] == 100
+    assert adj["heuristica"] is False
+
+
+def test_sin_limite_gana_el_mas_barato_por_linea():
+    adj = _matriz([[1, 100, 50], [100, 1, 50]]).analizar()["adjudicacion"]
+    assert adj["proveedores"] == [101, 102]
+    assert adj["total"] == 2
+    assert adj["heuristica"] is False
+
+
+@pytest.mark.parametrize("semilla", range(30))
+def test_adjudicacion_coincide_con_fuerza_bruta(semilla):
+    rng = np.random.default_rng(semilla)
+    a, p = rng.integers(1, 8), rng.integers(2, 7)
+    precios = rng.integers(1, 100, size=(a, p)).astype(np.float64)
+    precios[rng.random((a, p)) < 0.3] = np.nan
+    m = _matriz(precios, rng.integers(1, 10, size=a))
+    for k in range(1, p + 1):
+        adj = m.analizar(max_proveedores=k)["adjudicacion"]
+        assert len(adj["proveedores"]) <= k
+        assert (len(adj["sin_cubrir"]), adj["total"]) == pytest.approx(_fuerza_bruta(m, k))
+
+
+def test_demasiadas_combinaciones_usa_la_heuristica():
+    m = _matriz([[1, 100, 50], [100, 1, 50]])
+    activos, heuristica = m.adjudicar(max_proveedores=1, max_combinaciones=2)
+    assert heuristica is True
+    assert activos.sum() == 1
+    assert m.analizar(max_proveedores=1, max_combinaciones=2)["adjudicacion"]["heuristica"] is True
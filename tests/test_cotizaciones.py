@@ -0,0 +1,99 @@
+import io
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.cotizaciones import _cargar_precios, _lineas_csv
+from app.db.base import Base
+from app.db.models import Cotizacion, CotizacionProveedor, CotItem, ReqItem, Requerimiento
+
+
+def _csv(contenido: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(contenido), filename="precios.csv")
+
+
+def _leer(contenido: bytes) -> list:
+    return list(_lineas_csv(_csv(contenido)))
+
+
+# ---- Lectura del CSV ----
+def test_csv_valido():
+    lineas = _leer("proveedor_id,articulo_id,precio_unit\n1,2, 10.50\n".encode("utf-8-sig"))
+    assert lineas == [(1, 2, Decimal("10.50"))]
+
+
+@pytest.mark.parametrize("contenido", [
+    "proveedor_id,articulo_id,precio_unit\n1,2,10\n1,3,Tornillería\n".encode("latin-1"),
+    b"proveedor_id,articulo_id,precio_unit\n1,2," + b"9" * 200_000 + b"\n",  # csv.Error: campo > field_size_limit
+    b"proveedor_id,articulo_id\n1,2\n",
+], ids=["latin-1", "campo-enorme", "sin-columna"])
+def test_csv_no_legible_es_400(contenido):
+    with pytest.raises(HTTPException) as e:
+        _leer(contenido)
+    assert e.value.status_code == 400
+
+
+@pytest.mark.parametrize("precio", ["Infinity", "-Infinity", "NaN", "sNaN", "-1", "abc"])
+def test_csv_precio_no_valido_es_400(precio):
+    with pytest.raises(HTTPException) as e:
+        _leer(f"proveedor_id,articulo_id,precio_unit\n1,2,10\n1,2,{precio}\n".encode())
+    assert e.value.status_code == 400
+    assert "Fila 3" in e.value.detail
+
+
+# ---- Escritura con upsert ----
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as s:
+        yield s
+
+
+@pytest.fixture
+def cot(db):
+    req = Requerimiento(departamento_id=1, clasificador_id=1, unidad_negocio_id=1)
+    db.add(req)
+    db.flush()
+    db.add_all([ReqItem(requerimiento_id=req.id, articulo_id=a, cantidad=5) for a in (10, 11)])
+    cot = Cotizacion(requerimiento_id=req.id)
+    db.add(cot)
+    db.flush()
+    db.add_all([CotizacionProveedor(cotizacion_id=cot.id, proveedor_id=p) for p in (1, 2)])
+    db.flush()
+    return cot
+
+
+def _precios(db, cot) -> dict:
+    filas = db.execute(
+        select(CotizacionProveedor.proveedor_id, CotItem.articulo_id, CotItem.cantidad, CotItem.precio_unit)
+        .join(CotItem, CotItem.cotizacion_proveedor_id == CotizacionProveedor.id)
+        .where(CotizacionProveedor.cotizacion_id == cot.id)
+    ).all()
+    return {(p, a): (c, precio) for p, a, c, precio in filas}
+
+
+def test_upsert_inserta_y_actualiza(db, cot):
+    r = _cargar_precios(db, cot, [(1, 10, Decimal("3")), (2, 10, Decimal("4")), (1, 10, Decimal("2.5"))])
+    assert r == {"lineas": 2, "proveedores": 2}
+    assert _precios(db, cot) == {(1, 10): (5, 2.5), (2, 10): (5, 4.0)}
+
+    # Segunda carga: actualiza la fila existente y agrega otra
+    _cargar_precios(db, cot, _lineas_csv(_csv(b"proveedor_id,articulo_id,precio_unit\n1,10,2\n1,11,7\n")))
+    assert _precios(db, cot) == {(1, 10): (5, 2.0), (1, 11): (5, 7.0), (2, 10): (5, 4.0)}
+
+
+@pytest.mark.parametrize("linea, codigo", [
+    ((3, 10, Decimal("1")), 404),     # proveedor fuera de la cotización
+    ((1, 99, Decimal("1")), 400),     # artículo fuera del requerimiento
+    ((1, 10, Decimal("1e999")), 400),  # finito como Decimal, inf como float
+])
+def test_upsert_rechaza_la_carga_completa(db, cot, linea, codigo):
+    with pytest.raises(HTTPException) as e:
+        _cargar_precios(db, cot, [(2, 11, Decimal("1")), linea])
+    assert e.value.status_code == codigo
+    assert _precios(db, cot) == {}
@@ -0,0 +1,18 @@
+from app.core.permissions import PermisosUsuario
+
+
+def _permisos(*claves):
+    return PermisosUsuario(roles=frozenset({"comprador"}), claves=frozenset(claves))
+
+
+def test_permite_la_tupla_exacta():
+    assert _permisos((1, 1, 1)).permite(1, 1, 1)
+
+
+def test_ids_grandes_no_coinciden_con_otro_permiso():
+    # Con las claves empaquetadas a 21 bits, 1 + 2**21 coincidía con 1
+    permisos = _permisos((1, 1, 1), (2**21 - 1, 0, 0))
+    assert not permisos.permite(1 + 2**21, 1, 1)
+    assert not permisos.permite(1, 1 + 2**21, 1)
+    assert not permisos.permite(1, 1, 1 + 2**21)
+    assert not permisos.permite(-1, 0, 0)
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db.pool import InstrumentedQueuePool, es_sqlite_en_memoria, pool_kwargs
+
+
+@pytest.mark.parametrize("url", [
+    "sqlite://",
+    "sqlite:///:memory:",
+    "sqlite+pysqlite://",
+    "sqlite:///file:compras?mode=memory&uri=true",
+])
+def test_sqlite_en_memoria_usa_el_pool_por_defecto(url):
+    assert es_sqlite_en_memoria(url)
+    assert pool_kwargs(url) == {}
+
+
+@pytest.mark.parametrize("url", ["sqlite:///compras.db", "mysql+pymysql://u:p@localhost/compras"])
+def test_bases_en_archivo_o_servidor_usan_el_pool_instrumentado(url):
+    assert not es_sqlite_en_memoria(url)
+    assert pool_kwargs(url)["poolclass"] is InstrumentedQueuePool
+
+
+def test_sqlite_en_memoria_comparte_el_esquema():
+    # Con QueuePool cada conexión era otra base vacía: "no such table"
+    engine = create_engine("sqlite://", **pool_kwargs("sqlite://"))
+    with engine.begin() as c:
+        c.execute(text("CREATE TABLE articulo (id INTEGER PRIMARY KEY)"))
+    with engine.connect() as c1, engine.connect() as c2:
+        assert c1.execute(text("SELECT count(*) FROM articulo")).scalar() == 0
+        assert c2.execute(text("SELECT count(*) FROM articulo")).scalar() == 0
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from jose import JWTError, jwt
+
+from app.core.security import ALGORITHM, SECRET_KEY, VERIFICADORES
+
+AHORA = int(time.time())
+
+# Claims que python-jose acepta o rechaza con sus opciones por defecto
+CASOS = [
+    {"sub": "usuario_demo"},
+    {"sub": "usuario_demo", "exp": AHORA + 600},
+    {"sub": "usuario_demo", "exp": AHORA - 10},
+    {"sub": "usuario_demo", "exp": str(AHORA + 600)},
+    {"sub": "usuario_demo", "exp": "mañana"},
+    {"sub": "usuario_demo", "exp": None},
+    {"sub": "usuario_demo", "nbf": AHORA + 600},
+    {"sub": "usuario_demo", "nbf": AHORA - 10, "iat": AHORA - 10},
+    {"sub": "usuario_demo", "iat": "ayer"},
+    {"sub": "usuario_demo", "aud": "compras"},
+    {"sub": "usuario_demo", "aud": ["compras", "otra"]},
+    {"sub": 42},
+    {"sub": None},
+    {"sub": "usuario_demo", "jti": 7},
+    {"sub": "usuario_demo", "jti": "abc"},
+    {"sub": "usuario_demo", "at_hash": "xyz"},
+]
+
+
+def _acepta(verificador, token) -> bool:
+    try:
+        verificador(token)
+        return True
+    except JWTError:
+        return False
+
+
+@pytest.mark.parametrize("claims", CASOS, ids=[str(c) for c in CASOS])
+def test_hs256_valida_claims_igual_que_jose(claims):
+    token = jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+    assert _acepta(VERIFICADORES["hs256"], token) == _acepta(VERIFICADORES["jose"], token)
+
+
+@pytest.mark.parametrize("token", [
+    jwt.encode({"sub": "a"}, "otra_clave", algorithm=ALGORITHM),
+    jwt.encode({"sub": "a"}, SECRET_KEY, algorithm="HS512"),
+    "abc",
+    "a.b",
+    "á.b.c",
+])
+def test_hs256_rechaza_firma_o_formato_no_validos(token):
+    assert not _acepta(VERIFICADORES["hs256"], token)
+    assert not _acepta(VERIFICADORES["jose"], token)